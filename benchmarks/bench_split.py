@@ -0,0 +1,155 @@
+"""Benchmark split_pdf with and without resource pruning
+
+Usage:
+    python benchmarks/bench_split.py [input.pdf] [--pages N] [--repeat N]
+
+Without an input file two PDFs are generated: one whose pages all share a
+single /Resources dictionary (a common producer pattern), and one whose
+first page is a table of contents linking to every other page. Both are
+cases pruning targets. Reports total output bytes and split time for each
+mode.
+"""
+import os
+import sys
+import time
+import argparse
+from io import BytesIO
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.backend.utils.pdf_operations import PDFOperations
+
+
+def build_image(writer, page_num: int):
+    """Add a 200x200 noise JPEG image XObject to writer, returning its reference"""
+    from PIL import Image
+    from PyPDF2.generic import NameObject, NumberObject, StreamObject
+
+    image = Image.effect_noise((200, 200), 40 + page_num % 50).convert("RGB")
+    image_buffer = BytesIO()
+    image.save(image_buffer, "JPEG")
+
+    image_stream = StreamObject()
+    image_stream._data = image_buffer.getvalue()
+    image_stream.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(200),
+        NameObject("/Height"): NumberObject(200),
+        NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject("/DCTDecode"),
+    })
+    return writer._add_object(image_stream)
+
+
+def build_shared_resources_pdf(page_count: int) -> bytes:
+    """Generate a PDF with one image per page, all listed in one shared resource dictionary"""
+    from PyPDF2 import PageObject, PdfWriter
+    from PyPDF2.generic import DictionaryObject, NameObject, StreamObject
+
+    writer = PdfWriter()
+    images = DictionaryObject()
+    shared = DictionaryObject({NameObject("/XObject"): images})
+    shared_ref = writer._add_object(shared)
+
+    for page_num in range(page_count):
+        images[NameObject(f"/Im{page_num}")] = build_image(writer, page_num)
+
+        content = StreamObject()
+        content._data = f"q 200 0 0 200 72 500 cm /Im{page_num} Do Q".encode()
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = shared_ref
+        writer.add_page(page)
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def build_linked_toc_pdf(page_count: int) -> bytes:
+    """Generate a PDF whose first page links to every other page, each with an image of its own"""
+    from PyPDF2 import PageObject, PdfWriter
+    from PyPDF2.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, StreamObject
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    for page_num in range(1, page_count):
+        content = StreamObject()
+        content._data = b"q 200 0 0 200 72 500 cm /Im0 Do Q"
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): build_image(writer, page_num)})
+        })
+        writer.add_page(page)
+
+    links = ArrayObject()
+    for page_num in range(1, page_count):
+        top = FloatObject(760 - 12 * page_num)
+        destination = ArrayObject([writer.pages[page_num].indirect_reference, NameObject("/Fit")])
+        link = DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Link"),
+            NameObject("/Rect"): ArrayObject([FloatObject(72), top, FloatObject(300), FloatObject(top + 10)]),
+            NameObject("/Border"): ArrayObject([FloatObject(0), FloatObject(0), FloatObject(0)]),
+        })
+        if page_num % 2:
+            link[NameObject("/Dest")] = destination
+        else:
+            link[NameObject("/A")] = DictionaryObject({
+                NameObject("/S"): NameObject("/GoTo"), NameObject("/D"): destination
+            })
+        links.append(writer._add_object(link))
+    writer.pages[0][NameObject("/Annots")] = links
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def run(pdf_data: bytes, split_options: dict, repeat: int):
+    best_time = None
+    total_bytes = 0
+    parts = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        buffers = PDFOperations.split_pdf(pdf_data, split_options)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+        total_bytes = sum(buffer.getbuffer().nbytes for buffer in buffers)
+        parts = len(buffers)
+    return parts, total_bytes, best_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="PDF to split (default: generated)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages in the generated PDF")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode, best time is reported")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            inputs = [(args.input, f.read())]
+    else:
+        inputs = [("generated, shared resources", build_shared_resources_pdf(args.pages)),
+                  ("generated, linked contents page", build_linked_toc_pdf(args.pages))]
+
+    for name, pdf_data in inputs:
+        print(f"Input: {name} ({len(pdf_data):,} bytes)")
+        print(f"{'mode':<12}{'parts':>8}{'output bytes':>16}{'time (s)':>12}")
+        results = {}
+        for mode, prune in (("current", False), ("pruned", True)):
+            parts, total_bytes, best_time = run(pdf_data, {'prune_resources': prune}, args.repeat)
+            results[mode] = total_bytes
+            print(f"{mode:<12}{parts:>8}{total_bytes:>16,}{best_time:>12.3f}")
+
+        if results["current"]:
+            print(f"Output reduction: {100 * (1 - results['pruned'] / results['current']):.1f}%")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark cold import time of the backend
+
+Usage:
+    python benchmarks/bench_startup.py [--module NAME] [--repeat N] [--top N] [--budget-ms MS]
+
+Imports the module in fresh interpreters with `python -X importtime` and
+reports the median cumulative import time, the slowest imports, and which
+conversion libraries were loaded eagerly. Those libraries should only load
+when an operation needs them, so the script exits with status 1 if any of
+them is imported at startup, or if the median exceeds --budget-ms.
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Conversion libraries that must not be imported at startup
+LAZY_MODULES = ["fitz", "pymupdf", "PyPDF2", "PIL.Image", "docx", "docx2pdf", "pdf2docx", "cv2", "numpy"]
+
+
+def import_times(module: str) -> dict:
+    """Import a module in a fresh interpreter and return {imported module: cumulative microseconds}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.backend.main", help="Module to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median exceeds this")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    totals = [run[args.module] / 1000 for run in runs]
+    median = statistics.median(totals)
+    last = runs[-1]
+
+    print(f"{args.module}: median {median:.1f} ms over {args.repeat} runs "
+          f"(min {min(totals):.1f} ms, max {max(totals):.1f} ms)")
+
+    print(f"\nSlowest top-level imports:")
+    top_level = {name: us for name, us in last.items() if "." not in name and name != args.module}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in last]
+    failed = False
+    if eager:
+        print(f"\nLoaded at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\nMedian import time {median:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
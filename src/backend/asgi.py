@@ -0,0 +1,255 @@
+"""ASGI entry point for production serving
+
+    uvicorn src.backend.asgi:app --host 0.0.0.0 --port 8000
+
+The event loop receives request bodies and sends response bodies, so slow
+uploads and downloads only cost a coroutine each. Once a body has arrived
+(spooled to disk above UPLOAD_SPOOL_THRESHOLD) the Flask route runs on a
+thread pool, and the conversions it starts run in their own worker
+processes, so CPU-bound work proceeds in parallel with the event loop.
+"""
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from .main import app as flask_app
+from .utils.operations.config import ASGI_THREADS, ASGI_MAX_BODY_BYTES, UPLOAD_SPOOL_THRESHOLD
+from .utils.operations.temp_files import disk_arena_dir
+from .utils.operations.tracing import run_attached
+
+logger = logging.getLogger(__name__)
+
+# Response bytes collected from the WSGI iterator before they are sent, so small
+# file chunks do not each cost a round trip to the thread pool
+SEND_CHUNK_SIZE = 256 * 1024
+
+
+class RequestTooLargeError(Exception):
+    """The request body exceeds the configured maximum"""
+
+
+def _next_chunk(iterator: Iterator[bytes]) -> Optional[bytes]:
+    """Read at least SEND_CHUNK_SIZE bytes from a response iterator, or None at its end"""
+    parts = []
+    size = 0
+    for part in iterator:
+        if part:
+            parts.append(part)
+            size += len(part)
+            if size >= SEND_CHUNK_SIZE:
+                break
+    return b"".join(parts) if parts else None
+
+
+class ASGIApp:
+    """Serve a WSGI application from an ASGI server
+
+    Args:
+        wsgi_app: WSGI application to run for each request
+        threads: Requests whose handlers may run at the same time
+        max_body_bytes: Largest request body accepted; larger ones get 413
+    """
+
+    def __init__(self, wsgi_app, threads: int = ASGI_THREADS, max_body_bytes: int = ASGI_MAX_BODY_BYTES):
+        self.wsgi_app = wsgi_app
+        self.max_body_bytes = max_body_bytes
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._reject_websocket(receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _reject_websocket(self, receive, send):
+        """Close a WebSocket connection, which the Flask app has no routes for"""
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.connect":
+                # Closing before accepting makes the server answer the handshake with 403
+                await send({"type": "websocket.close", "code": 1003})
+                return
+            if message["type"] == "websocket.disconnect":
+                return
+
+    async def _read_body(self, receive, body) -> Tuple[int, bool]:
+        """Receive the request body into a file
+
+        Returns:
+            Tuple of (bytes received, whether the whole body arrived before the client disconnected)
+
+        Raises:
+            RequestTooLargeError: The body exceeds max_body_bytes; what was received is discarded
+        """
+        loop = asyncio.get_running_loop()
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return size, False
+            chunk = message.get("body", b"")
+            if chunk:
+                size += len(chunk)
+                if size > self.max_body_bytes:
+                    raise RequestTooLargeError(size)
+                if size > UPLOAD_SPOOL_THRESHOLD:
+                    # The body is on disk by now; write through the thread pool so the loop never stalls
+                    await loop.run_in_executor(self.executor, body.write, chunk)
+                else:
+                    body.write(chunk)
+            if not message.get("more_body", False):
+                return size, True
+
+    @staticmethod
+    def _keeps_partial_body(scope) -> bool:
+        """Check whether a request still counts when its body was cut off
+
+        Chunks of resumable uploads (PUT with an Upload-Offset header) keep
+        the bytes that arrived, so the client only resends the rest.
+        """
+        return scope["method"] == "PUT" and any(name.lower() == b"upload-offset"
+                                                for name, _ in scope.get("headers", []))
+
+    def _environ(self, scope, body, content_length: int) -> dict:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+            "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "REMOTE_PORT": str(client[1]),
+            "CONTENT_LENGTH": str(content_length),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope.get("headers", []):
+            name = name.decode("latin1").upper().replace("-", "_")
+            value = value.decode("latin1")
+            if name == "CONTENT_LENGTH":
+                continue
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+                continue
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ: dict) -> Tuple[str, List[Tuple[str, str]], Iterator[bytes], object,
+                                                  Optional[bytes]]:
+        """Run the WSGI application up to its first response chunk (in a pool thread)"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+            return lambda data: response.setdefault("written", []).append(data)
+
+        result = self.wsgi_app(environ, start_response)
+        iterator = iter(result)
+        first = _next_chunk(iterator)
+        written = b"".join(response.get("written", []))
+        if written:
+            first = written + (first or b"")
+        return response["status"], response["headers"], iterator, result, first
+
+    async def _send_too_large(self, send):
+        body = json.dumps({"error": f"Request body exceeds {self.max_body_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        # A declared length over the limit is rejected before any of the body is received
+        for name, value in scope.get("headers", []):
+            if name.lower() == b"content-length" and value.strip().isdigit() and int(value) > self.max_body_bytes:
+                await self._send_too_large(send)
+                return
+        body = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD, dir=disk_arena_dir())
+        # Every step of one request runs in the same context, so Flask's request
+        # context stays valid when a streamed response resumes on another thread
+        context = contextvars.copy_context()
+        result = None
+        try:
+            try:
+                content_length, complete = await self._read_body(receive, body)
+            except RequestTooLargeError:
+                await self._send_too_large(send)
+                return
+            if not complete and not self._keeps_partial_body(scope):
+                return
+            body.seek(0)
+
+            environ = self._environ(scope, body, content_length)
+            # run_attached samples whichever pool thread runs a step of a profiled request
+            status, headers, iterator, result, chunk = await loop.run_in_executor(
+                self.executor, context.run, run_attached, self._call_wsgi, environ)
+            if not complete:
+                # The route has stored what arrived; there is nobody left to answer
+                logger.info(f"Kept {content_length} bytes of a cut-off {scope['method']} {scope['path']}")
+                return
+
+            # Watch for the client going away while the response is produced
+            disconnected = asyncio.Event()
+
+            async def watch_disconnect():
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                disconnected.set()
+
+            watcher = asyncio.ensure_future(watch_disconnect())
+            try:
+                await send({
+                    "type": "http.response.start",
+                    "status": int(status.split(" ", 1)[0]),
+                    "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+                })
+                while chunk is not None:
+                    if disconnected.is_set():
+                        logger.info(f"Client disconnected during {scope['method']} {scope['path']}")
+                        return
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    chunk = await loop.run_in_executor(self.executor, context.run, run_attached, _next_chunk, iterator)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                watcher.cancel()
+        finally:
+            # Closing the response stops streamed operations and their workers
+            if result is not None and hasattr(result, "close"):
+                await loop.run_in_executor(self.executor, context.run, run_attached, result.close)
+            body.close()
+
+
+app = ASGIApp(flask_app)
@@ -1,35 +1,367 @@
 import os
+import json
 import shutil
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, request, send_file, jsonify, Response, stream_with_context, url_for, g
 from werkzeug.utils import secure_filename
 import tempfile
 from .utils.pdf_operations import PDFOperations
+from .utils.zip_stream import zip_response
+from .utils.uploads import SpoolingRequest, upload_data
+from .utils.operations.temp_files import sweep_stale_temp_dirs, data_size, TempQuotaExceededError
+from .utils.operations.isolation import run_isolated, iter_isolated, cancel_operation, OperationAbortedError
+from .utils.operations.admission import get_admission_controller, estimate_cost, operation_workers, ServerBusyError
+from .utils.operations.libreoffice_pool import get_libreoffice_pool
+from .utils.operations.result_cache import get_result_cache
+from .utils.operations.jobs import get_job_manager, JobNotCancellableError
+from .utils.operations.batch import iter_batch
+from .utils.operations.document_store import get_document_store
+from .utils.operations.resumable_uploads import get_resumable_uploads, UploadOffsetError
+from .utils.operations.metrics import (track_operation, track_iterator, count_pages, render_metrics,
+                                       HTTP_REQUEST_DURATION, HTTP_REQUESTS_TOTAL)
+from .utils.operations.tracing import create_trace, set_trace, set_sampler, now_us, Sampler
+from .utils.operations.config import format_size, get_buffer_size, PROFILE_DIR, PROFILE_TOKEN, BATCH_MAX_FILES
+import re
+import hmac
+import time
+import threading
 import logging
 from io import BytesIO
-import zipfile
-from PyPDF2 import PdfReader
+from itertools import chain
+from contextlib import closing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Large uploads are spooled to disk and passed to operations as file paths
+app.request_class = SpoolingRequest
 
-# Create a temporary directory for file operations
-TEMP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "temp"))
-os.makedirs(TEMP_DIR, exist_ok=True)
+def profiling_allowed(flag):
+    """Check a profiling flag from the X-Profile header or profile query parameter
+    
+    The flag must be PDFCONV_PROFILE_TOKEN; without the token profiling is
+    disabled, since behind a reverse proxy every client looks local.
+    """
+    if not flag or not PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(flag.encode(), PROFILE_TOKEN.encode())
 
-def handle_error(e):
-    """Handle errors and return appropriate response"""
-    logger.error(f"Error occurred: {str(e)}")
-    if isinstance(e, RuntimeError):
-        return jsonify({"error": str(e)}), 500
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Threads of the server are reused, so a previous request's trace must not leak
+    set_trace(None)
+    set_sampler(None)
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    if request.endpoint != "get_profile" and profiling_allowed(flag):
+        g.trace = create_trace()
+        g.trace_started = now_us()
+        set_trace(g.trace)
+        g.sampler = Sampler(threading.get_ident()).start()
+        set_sampler(g.sampler)
+
+@app.before_request
+def check_documents():
+    # Handles sent as "document" or "documents" fields are resolved while the form is parsed
+    if request.method == "POST" and request.missing_documents:
+        return jsonify({"error": f"Unknown or expired document: {request.missing_documents[0]}"}), 404
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed until their first byte is ready
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    started = g.get("request_started")
+    if started is not None:
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, route=route, method=request.method)
+    HTTP_REQUESTS_TOTAL.inc(route=route, method=request.method, status=response.status_code)
+    
+    if g.get("trace") is not None:
+        response.headers["X-Profile-Id"] = g.trace.trace_id
+        g.trace_args = {"route": route, "method": request.method, "status": response.status_code}
+    return response
+
+# Runs once a streamed body has been sent, so streamed responses are profiled to the end
+@app.teardown_request
+def finish_profile(error=None):
+    trace = g.pop("trace", None)
+    if trace is None:
+        return
+    trace.add_span("request", g.trace_started, now_us() - g.trace_started, g.get("trace_args"))
+    trace.add_stacks(g.sampler.stop(), prefix="server")
+    set_trace(None)
+    set_sampler(None)
+
+# Remove temporary files left behind by previous server processes
+sweep_stale_temp_dirs()
+
+# Resume background jobs stored by previous server processes and drop expired documents and uploads
+# (not in worker processes started from this module)
+if __name__ != "__mp_main__":
+    get_job_manager()
+    get_document_store().purge_expired()
+    get_resumable_uploads().purge_expired()
+
+def error_details(e):
+    """Get the error body and HTTP status code reported to clients for an exception"""
+    if isinstance(e, OperationAbortedError):
+        return e.to_dict(), e.status_code
+    elif isinstance(e, RuntimeError):
+        return {"error": str(e)}, 500
     elif isinstance(e, ValueError):
-        return jsonify({"error": str(e)}), 400
+        return {"error": str(e)}, 400
     elif isinstance(e, NotImplementedError):
-        return jsonify({"error": str(e)}), 501
+        return {"error": str(e)}, 501
     else:
-        return jsonify({"error": "An unexpected error occurred"}), 500
+        return {"error": "An unexpected error occurred"}, 500
+
+def handle_error(e):
+    """Handle errors and return appropriate response"""
+    logger.error(f"Error occurred: {str(e)}")
+    body, status_code = error_details(e)
+    if isinstance(e, (ServerBusyError, TempQuotaExceededError)):
+        return jsonify(body), status_code, {"Retry-After": str(e.retry_after)}
+    return jsonify(body), status_code
+
+def run_operation(operation, *args, isolate=True, **kwargs):
+    """Run a PDFOperations method in a killable worker with its time and memory limits
+    
+    The operation first waits for capacity from the admission controller,
+    which raises ServerBusyError (429) when none frees up in time. Clients
+    can send an X-Task-ID header and cancel the operation with
+    DELETE /tasks/<task_id> while it runs.
+    """
+    func = getattr(PDFOperations, operation)
+    with get_admission_controller().admit(operation, args, kwargs), track_operation(operation, args) as record:
+        if not isolate:
+            result = func(*args, **kwargs)
+            record.add_pages(count_pages(args[:1], result))
+        else:
+            result = run_isolated(func, *args, task_id=request.headers.get("X-Task-ID"), on_pages=record.add_pages,
+                                  **kwargs)
+        record.add_output(result)
+        return result
+
+def iter_operation(operation, *args, **kwargs):
+    """Run a generator PDFOperations method in a killable worker, yielding its items as they arrive
+    
+    Admission is checked before returning, so a busy server is reported
+    before the response starts; the capacity is held until the iterator is
+    exhausted or closed.
+    """
+    func = getattr(PDFOperations, operation)
+    task_id = request.headers.get("X-Task-ID")
+    ticket = get_admission_controller().acquire(operation, estimate_cost(operation, args, kwargs),
+                                                slots=operation_workers(kwargs))
+    
+    def generate():
+        try:
+            yield from track_iterator(operation, args, lambda record: iter_isolated(
+                func, *args, task_id=task_id, on_pages=record.add_pages, **kwargs))
+        finally:
+            ticket.release()
+    
+    return generate()
+
+def cache_enabled():
+    """Check whether the request allows using the result cache
+    
+    Clients can skip the cache with a "cache=false" form field or a
+    Cache-Control: no-cache / no-store header.
+    """
+    cache_control = request.headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return False
+    return request.form.get("cache", "true").lower() != "false"
+
+def run_cached(operation, data, isolate=True, tuning=None, **params):
+    """Run an operation through the result cache
+    
+    Only params are part of the cache key; tuning holds keyword arguments
+    that affect speed but not the result, such as worker counts.
+    
+    Returns:
+        Tuple of (result BytesIO, X-Cache value: HIT, MISS or BYPASS)
+    """
+    if not cache_enabled():
+        return run_operation(operation, data, isolate=isolate, **params, **(tuning or {})), "BYPASS"
+    
+    cache = get_result_cache()
+    key = cache.make_key(operation, data, params)
+    cached = cache.get(key)
+    if cached is not None:
+        return BytesIO(cached), "HIT"
+    
+    result = run_operation(operation, data, isolate=isolate, **params, **(tuning or {}))
+    cache.put(key, result.getvalue())
+    return result, "MISS"
+
+def parse_page_numbers(text):
+    """Parse a page selection such as "1-3,5" into page numbers and (start, end) ranges
+
+    Ranges are kept unexpanded; the operation checks them against the page count.
+    """
+    page_numbers = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = map(int, part.split('-'))
+            if start < 1 or start > end:
+                raise ValueError(f"Invalid page range: {part}")
+            page_numbers.append((start, end))
+        else:
+            page = int(part)
+            if page < 1:
+                raise ValueError(f"Invalid page number: {part}")
+            page_numbers.append(page)
+    return page_numbers
+
+# Option parsers shared by the routes and the job API. Each reads a request
+# form and returns keyword arguments for the operation, raising ValueError
+# with a message for the client when an option is invalid.
+
+def parse_split_options(form):
+    split_options = {}
+    
+    # Handle specific pages
+    pages = form.get("pages", "")
+    if pages:
+        try:
+            split_options['pages'] = [int(p.strip()) for p in pages.split(',') if p.strip()]
+        except ValueError:
+            raise ValueError("Invalid page numbers provided")
+    
+    # Handle page ranges
+    ranges = form.get("ranges", "")
+    if ranges:
+        try:
+            range_pairs = []
+            for r in ranges.split(','):
+                if r.strip():
+                    start, end = map(int, r.strip().split('-'))
+                    range_pairs.append([start, end])
+            split_options['ranges'] = range_pairs
+            logger.info(f"Parsed ranges: {range_pairs}")
+        except Exception as e:
+            logger.error(f"Error parsing ranges: {str(e)}")
+            raise ValueError("Invalid page ranges provided")
+    
+    # Handle first N pages
+    first_n = form.get("first_n", "")
+    if first_n:
+        try:
+            split_options['first_n'] = int(first_n)
+        except ValueError:
+            raise ValueError("Invalid number for first pages")
+    
+    # Handle last N pages
+    last_n = form.get("last_n", "")
+    if last_n:
+        try:
+            split_options['last_n'] = int(last_n)
+        except ValueError:
+            raise ValueError("Invalid number for last pages")
+    
+    # Handle size-limited parts
+    max_bytes_per_part = form.get("max_bytes_per_part", "")
+    if max_bytes_per_part:
+        try:
+            split_options['max_bytes_per_part'] = int(max_bytes_per_part)
+        except ValueError:
+            raise ValueError("Invalid maximum part size")
+    
+    # Handle bookmark-based parts
+    by_outline_level = form.get("by_outline_level", "")
+    if by_outline_level:
+        try:
+            split_options['by_outline_level'] = int(by_outline_level)
+        except ValueError:
+            raise ValueError("Invalid outline level")
+    
+    return {"split_options": split_options or None}
+
+def split_part_name(split_options):
+    """Name pattern of split parts; multi-page parts are named by part rather than by page"""
+    if split_options and {'max_bytes_per_part', 'by_outline_level'} & split_options.keys():
+        return "part_{n}.pdf"
+    return "page_{n}.pdf"
+
+def parse_image_options(form):
+    try:
+        dpi = int(form.get("dpi", 200))
+    except ValueError:
+        raise ValueError("Invalid DPI value")
+    if dpi < 72 or dpi > 600:
+        raise ValueError("DPI must be between 72 and 600")
+    return {"dpi": dpi}
+
+def parse_compress_options(form):
+    quality = form.get("quality", "medium")
+    if quality not in ["low", "medium", "high"]:
+        raise ValueError("Invalid quality value")
+    return {"quality": quality}
+
+def parse_pdf_to_word_options(form):
+    # Handle page selection, e.g. "1-5,8"
+    try:
+        pages = parse_page_numbers(form.get("pages", "")) or None
+    except ValueError:
+        raise ValueError("Invalid page numbers provided")
+    
+    # Handle worker count
+    try:
+        workers = int(form.get("workers", 1))
+    except ValueError:
+        raise ValueError("Invalid number of workers")
+    if workers < 1:
+        raise ValueError("Workers must be at least 1")
+    
+    # 'layout' keeps the original layout, 'fast' extracts editable text only
+    mode = form.get("mode", "layout")
+    if mode not in ["layout", "fast"]:
+        raise ValueError("Invalid conversion mode")
+    return {"pages": pages, "workers": workers, "mode": mode}
+
+def parse_renderer_options(form):
+    # 'auto' renders simple documents in-process and sends the rest to LibreOffice or Word
+    renderer = form.get("renderer", "auto")
+    if renderer not in ["auto", "builtin", "external"]:
+        raise ValueError("Invalid renderer value")
+    return {"renderer": renderer}
+
+def parse_page_edit_options(form):
+    # Operations are sent as a JSON list, e.g. [{"op": "rotate", "angle": 90, "pages": [1]}]
+    try:
+        operations = json.loads(form.get("operations", ""))
+    except ValueError:
+        raise ValueError("Invalid page operations provided")
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Page operations must be a non-empty list")
+    
+    incremental = form.get("incremental", "true").lower() != "false"
+    return {"operations": operations, "incremental": incremental}
+
+def batch_names(files, suffix=".pdf"):
+    """Name each output after its upload, keeping names unique"""
+    names = []
+    used = set()
+    for i, file in enumerate(files, 1):
+        stem = os.path.splitext(secure_filename(file.filename))[0] or f"document_{i}"
+        name = f"{stem}{suffix}"
+        n = i
+        # Compared case-insensitively, as archives are often extracted on such file systems
+        while name.lower() in used:
+            name = f"{stem}_{n}{suffix}"
+            n += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+def batch_pdf_names(files):
+    """Name each converted PDF after its upload, keeping names unique"""
+    return batch_names(files, ".pdf")
 
 @app.route("/merge-pdfs", methods=["POST"])
 def merge_pdfs():
@@ -45,10 +377,10 @@ def merge_pdfs():
                 return jsonify({"error": "Only PDF files are allowed"}), 400
         
         # Get PDF data from files
-        pdf_data_list = [file.read() for file in files]
+        pdf_data_list = [upload_data(file) for file in files]
         
         # Merge PDFs
-        merged_pdf = PDFOperations.merge_pdfs(pdf_data_list)
+        merged_pdf = run_operation("merge_pdfs", pdf_data_list)
         logger.info("Created merged PDF in memory")
         
         return send_file(
@@ -73,64 +405,20 @@ def split_pdf():
     
     try:
         # Get PDF data
-        pdf_data = file.read()
+        pdf_data = upload_data(file)
         
         # Get splitting options from the request
-        split_options = {}
-        
-        # Handle specific pages
-        pages = request.form.get("pages", "")
-        if pages:
-            try:
-                split_options['pages'] = [int(p.strip()) for p in pages.split(',') if p.strip()]
-            except ValueError:
-                return jsonify({"error": "Invalid page numbers provided"}), 400
-        
-        # Handle page ranges
-        ranges = request.form.get("ranges", "")
-        if ranges:
-            try:
-                range_pairs = []
-                for r in ranges.split(','):
-                    if r.strip():
-                        start, end = map(int, r.strip().split('-'))
-                        range_pairs.append([start, end])
-                split_options['ranges'] = range_pairs
-                logger.info(f"Parsed ranges: {range_pairs}")
-            except Exception as e:
-                logger.error(f"Error parsing ranges: {str(e)}")
-                return jsonify({"error": "Invalid page ranges provided"}), 400
-        
-        # Handle first N pages
-        first_n = request.form.get("first_n", "")
-        if first_n:
-            try:
-                split_options['first_n'] = int(first_n)
-            except ValueError:
-                return jsonify({"error": "Invalid number for first pages"}), 400
-        
-        # Handle last N pages
-        last_n = request.form.get("last_n", "")
-        if last_n:
-            try:
-                split_options['last_n'] = int(last_n)
-            except ValueError:
-                return jsonify({"error": "Invalid number for last pages"}), 400
-        
-        # Split PDF and get list of BytesIO buffers
-        split_pdfs = PDFOperations.split_pdf(pdf_data, split_options if split_options else None)
+        try:
+            split_options = parse_split_options(request.form)["split_options"]
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        part_name = split_part_name(split_options)
         
-        # Create a ZIP file in memory
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for i, pdf_buffer in enumerate(split_pdfs, 1):
-                zf.writestr(f"page_{i}.pdf", pdf_buffer.getvalue())
+        # Split PDF lazily and stream each part into the ZIP as it is produced
+        split_pdfs = iter_operation("iter_split_pdf", pdf_data, split_options)
         
-        zip_buffer.seek(0)
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
+        return zip_response(
+            ((part_name.format(n=i), pdf_buffer) for i, pdf_buffer in enumerate(split_pdfs, 1)),
             download_name="split_pages.zip"
         )
         
@@ -149,26 +437,15 @@ def pdf_to_images():
     try:
         # Get DPI setting
         try:
-            dpi = int(request.form.get("dpi", 200))
-            if dpi < 72 or dpi > 600:
-                return jsonify({"error": "DPI must be between 72 and 600"}), 400
-        except ValueError:
-            return jsonify({"error": "Invalid DPI value"}), 400
-        
-        # Convert PDF to images (returns list of BytesIO buffers)
-        image_buffers = PDFOperations.pdf_to_images(file.read(), dpi=dpi)
+            options = parse_image_options(request.form)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Create a ZIP file in memory
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for i, img_buffer in enumerate(image_buffers, 1):
-                zf.writestr(f"page_{i}.png", img_buffer.getvalue())
+        # Render pages lazily and stream each image into the ZIP as it is produced
+        image_buffers = iter_operation("iter_pdf_to_images", upload_data(file), **options)
         
-        zip_buffer.seek(0)
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
+        return zip_response(
+            ((f"page_{i}.png", img_buffer) for i, img_buffer in enumerate(image_buffers, 1)),
             download_name="pdf_images.zip"
         )
         
@@ -187,10 +464,10 @@ def images_to_pdf():
         for file in files:
             if not file.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
                 return jsonify({"error": "Only PNG and JPG images are allowed"}), 400
-            image_data.append(file.read())
+            image_data.append(upload_data(file))
         
         # Convert images to PDF (returns BytesIO buffer)
-        pdf_buffer = PDFOperations.images_to_pdf(image_data)
+        pdf_buffer = run_operation("images_to_pdf", image_data)
         
         return send_file(
             pdf_buffer,
@@ -211,19 +488,20 @@ def compress_pdf():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Only PDF files are allowed"}), 400
         
-    quality = request.form.get("quality", "medium")
-    if quality not in ["low", "medium", "high"]:
-        return jsonify({"error": "Invalid quality value"}), 400
+    try:
+        options = parse_compress_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
         
     try:
         # Get PDF data
-        pdf_data = file.read()
+        pdf_data = upload_data(file)
         
         # Compress PDF
-        compressed_pdf = PDFOperations.compress_pdf(pdf_data, quality)
+        compressed_pdf, cache_status = run_cached("compress_pdf", pdf_data, **options)
         
         # Get sizes for response headers
-        original_size = len(pdf_data)
+        original_size = data_size(pdf_data)
         compressed_size = get_buffer_size(compressed_pdf)
         reduction_percentage = round(((original_size - compressed_size) / original_size) * 100, 2)
         
@@ -239,6 +517,7 @@ def compress_pdf():
         response.headers['X-Original-Size'] = format_size(original_size)
         response.headers['X-Compressed-Size'] = format_size(compressed_size)
         response.headers['X-Reduction-Percentage'] = str(reduction_percentage)
+        response.headers['X-Cache'] = cache_status
         
         return response
         
@@ -254,19 +533,86 @@ def pdf_to_word():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Only PDF files are allowed"}), 400
         
+    try:
+        options = parse_pdf_to_word_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+        
     try:
         # Get PDF data
-        pdf_data = file.read()
+        pdf_data = upload_data(file)
         
         # Convert to Word
-        word_doc = PDFOperations.pdf_to_word(pdf_data)
+        word_doc, cache_status = run_cached("pdf_to_word", pdf_data, pages=options["pages"], mode=options["mode"],
+                                               tuning={"workers": options["workers"]})
         
-        return send_file(
+        response = send_file(
             word_doc,
             as_attachment=True,
             download_name="converted.docx",
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
         )
+        response.headers['X-Cache'] = cache_status
+        return response
+    except Exception as e:
+        return handle_error(e)
+
+# Response type and download extension of each text format
+TEXT_FORMATS = {
+    "text": ("text/plain", "txt"),
+    "markdown": ("text/markdown", "md"),
+    "json-blocks": ("application/x-ndjson", "ndjson"),
+}
+
+@app.route("/pdf-to-text", methods=["POST"])
+def pdf_to_text():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+        
+    file = request.files["file"]
+    if not file.filename.lower().endswith('.pdf'):
+        return jsonify({"error": "Only PDF files are allowed"}), 400
+    
+    text_format = request.form.get("format", "text")
+    if text_format not in TEXT_FORMATS:
+        return jsonify({"error": "Invalid text format"}), 400
+        
+    # Handle page selection, e.g. "1-5,8"
+    try:
+        pages = parse_page_numbers(request.form.get("pages", "")) or None
+    except ValueError:
+        return jsonify({"error": "Invalid page numbers provided"}), 400
+        
+    try:
+        # Get PDF data
+        pdf_data = upload_data(file)
+        
+        # Extract the first page before responding, so errors get a proper status code
+        text_pages = iter_operation("iter_text", pdf_data, format=text_format, pages=pages)
+        first = next(text_pages, None)
+        if first is not None:
+            text_pages = chain([first], text_pages)
+        
+        def generate():
+            try:
+                for i, page in enumerate(text_pages):
+                    if text_format == "json-blocks":
+                        yield json.dumps(page) + "\n"
+                    elif text_format == "markdown":
+                        yield ("\n\n" if i else "") + page
+                    else:
+                        # Pages end with a form feed, as with pdftotext
+                        yield page + "\f"
+            except Exception as e:
+                logger.error(f"Error streaming text: {str(e)}")
+                raise
+        
+        mimetype, extension = TEXT_FORMATS[text_format]
+        return Response(
+            stream_with_context(generate()),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="converted.{extension}"'}
+        )
     except Exception as e:
         return handle_error(e)
 
@@ -278,23 +624,467 @@ def word_to_pdf():
     file = request.files["file"]
     if not file.filename.lower().endswith('.docx'):
         return jsonify({"error": "Only DOCX files are allowed"}), 400
+    
+    try:
+        options = parse_renderer_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
         
     try:
         # Get Word document data
-        docx_data = file.read()
+        docx_data = upload_data(file)
         
         # Convert to PDF
-        pdf_doc = PDFOperations.word_to_pdf(docx_data)
+        # Pooled LibreOffice conversions are bounded by the pool's watchdog; in-process rendering isolates itself
+        pdf_doc, cache_status = run_cached("word_to_pdf", docx_data, isolate=get_libreoffice_pool() is None,
+                                           **options)
         
-        return send_file(
+        response = send_file(
             pdf_doc,
             as_attachment=True,
             download_name="converted.pdf",
             mimetype='application/pdf'
         )
+        response.headers['X-Cache'] = cache_status
+        return response
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/word-to-pdf-batch", methods=["POST"])
+def word_to_pdf_batch():
+    if not request.files.getlist("files"):
+        return jsonify({"error": "No files uploaded"}), 400
+    
+    output = request.form.get("output", "zip")
+    if output not in ["zip", "merged"]:
+        return jsonify({"error": "Invalid output value"}), 400
+    
+    try:
+        options = parse_renderer_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+        
+    try:
+        files = request.files.getlist("files")
+        
+        # Validate files
+        for file in files:
+            if not file.filename.lower().endswith('.docx'):
+                return jsonify({"error": "Only DOCX files are allowed"}), 400
+        
+        # Get Word document data from files
+        docx_data_list = [upload_data(file) for file in files]
+        
+        # Pooled LibreOffice conversions are bounded by the pool's watchdog; in-process rendering isolates itself
+        isolate = get_libreoffice_pool() is None
+        
+        if output == "merged":
+            merged_pdf = run_operation("word_to_pdf_batch", docx_data_list, merge=True, isolate=isolate,
+                                       **options)
+            return send_file(
+                merged_pdf,
+                as_attachment=True,
+                download_name="converted.pdf",
+                mimetype='application/pdf'
+            )
+        
+        pdf_buffers = run_operation("word_to_pdf_batch", docx_data_list, isolate=isolate, **options)
+        
+        return zip_response(zip(batch_pdf_names(files), pdf_buffers), download_name="converted_pdfs.zip")
+        
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/edit-pages", methods=["POST"])
+def edit_pages():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+        
+    file = request.files["file"]
+    if not file.filename.lower().endswith('.pdf'):
+        return jsonify({"error": "Only PDF files are allowed"}), 400
+    
+    try:
+        options = parse_page_edit_options(request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+        
+    try:
+        # Get PDF data
+        pdf_data = upload_data(file)
+        
+        # A spooled upload belongs to this request, so the edits are appended to it
+        # directly; stored documents are shared and edited on a copy
+        in_place = isinstance(pdf_data, str) and not get_document_store().is_stored_path(pdf_data)
+        
+        # Apply page edits
+        edited_pdf = run_operation("edit_pages", pdf_data, in_place=in_place, **options)
+        
+        return send_file(
+            edited_pdf,
+            as_attachment=True,
+            download_name="edited.pdf",
+            mimetype='application/pdf'
+        )
+    except Exception as e:
+        return handle_error(e)
+
+def merge_pdfs_job(files, form):
+    return {"method": "merge_pdfs", "list_input": True, "download_name": "merged.pdf",
+            "mimetype": "application/pdf"}
+
+def split_pdf_job(files, form):
+    options = parse_split_options(form)
+    return {"method": "iter_split_pdf", "kwargs": options, "download_name": "split_pages.zip",
+            "mimetype": "application/zip", "entry_names": split_part_name(options["split_options"])}
+
+def pdf_to_images_job(files, form):
+    return {"method": "iter_pdf_to_images", "kwargs": parse_image_options(form), "download_name": "pdf_images.zip",
+            "mimetype": "application/zip", "entry_names": "page_{n}.png"}
+
+def images_to_pdf_job(files, form):
+    return {"method": "images_to_pdf", "list_input": True, "download_name": "combined.pdf",
+            "mimetype": "application/pdf"}
+
+def compress_pdf_job(files, form):
+    return {"method": "compress_pdf", "kwargs": parse_compress_options(form), "download_name": "compressed.pdf",
+            "mimetype": "application/pdf"}
+
+def pdf_to_word_job(files, form):
+    return {"method": "pdf_to_word", "kwargs": parse_pdf_to_word_options(form), "download_name": "converted.docx",
+            "mimetype": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+def word_to_pdf_job(files, form):
+    # Pooled LibreOffice conversions are bounded by the pool's watchdog; in-process rendering isolates itself
+    return {"method": "word_to_pdf", "kwargs": parse_renderer_options(form), "isolate": get_libreoffice_pool() is None,
+            "download_name": "converted.pdf", "mimetype": "application/pdf"}
+
+def word_to_pdf_batch_job(files, form):
+    output = form.get("output", "zip")
+    if output not in ["zip", "merged"]:
+        raise ValueError("Invalid output value")
+    job = {"method": "word_to_pdf_batch", "kwargs": parse_renderer_options(form), "list_input": True,
+           "isolate": get_libreoffice_pool() is None}
+    if output == "merged":
+        job["kwargs"]["merge"] = True
+        return {**job, "download_name": "converted.pdf", "mimetype": "application/pdf"}
+    return {**job, "download_name": "converted_pdfs.zip", "mimetype": "application/zip",
+            "entry_names": batch_pdf_names(files)}
+
+def edit_pages_job(files, form):
+    return {"method": "edit_pages", "kwargs": parse_page_edit_options(form), "download_name": "edited.pdf",
+            "mimetype": "application/pdf"}
+
+# Operations that can run as background jobs: upload field, accepted file types,
+# and a function building the job from the uploads and form options
+JOB_OPERATIONS = {
+    "merge-pdfs": {"field": "files", "extensions": ('.pdf',), "build": merge_pdfs_job},
+    "split-pdf": {"field": "file", "extensions": ('.pdf',), "build": split_pdf_job},
+    "pdf-to-images": {"field": "file", "extensions": ('.pdf',), "build": pdf_to_images_job},
+    "images-to-pdf": {"field": "files", "extensions": ('.png', '.jpg', '.jpeg'), "build": images_to_pdf_job},
+    "compress-pdf": {"field": "file", "extensions": ('.pdf',), "build": compress_pdf_job},
+    "pdf-to-word": {"field": "file", "extensions": ('.pdf',), "build": pdf_to_word_job},
+    "word-to-pdf": {"field": "file", "extensions": ('.docx',), "build": word_to_pdf_job},
+    "word-to-pdf-batch": {"field": "files", "extensions": ('.docx',), "build": word_to_pdf_batch_job},
+    "edit-pages": {"field": "file", "extensions": ('.pdf',), "build": edit_pages_job}
+}
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.png', '.jpg', '.jpeg')
+
+FILE_TYPE_ERRORS = {
+    ('.pdf',): "Only PDF files are allowed",
+    ('.png', '.jpg', '.jpeg'): "Only PNG and JPG images are allowed",
+    ('.docx',): "Only DOCX files are allowed"
+}
+
+@app.route("/jobs/<operation>", methods=["POST"])
+def submit_job(operation):
+    # Same uploads and options as the synchronous route; returns immediately with a job ID
+    job_operation = JOB_OPERATIONS.get(operation)
+    if job_operation is None:
+        return jsonify({"error": f"Unknown operation: {operation}"}), 404
+    
+    files = request.files.getlist(job_operation["field"])
+    if not files:
+        return jsonify({"error": "No files uploaded" if job_operation["field"] == "files" else "No file uploaded"}), 400
+    if job_operation["field"] == "file":
+        files = files[:1]
+    
+    extensions = job_operation["extensions"]
+    for file in files:
+        if not file.filename.lower().endswith(extensions):
+            return jsonify({"error": FILE_TYPE_ERRORS[extensions]}), 400
+    
+    try:
+        job = job_operation["build"](files, request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        job_id = get_job_manager().submit(operation, inputs=[upload_data(file) for file in files],
+                                          input_suffix=extensions[0], **job)
+        return jsonify({
+            "id": job_id,
+            "status": "queued",
+            "status_url": url_for("job_status", job_id=job_id),
+            "result_url": url_for("job_result", job_id=job_id)
+        }), 202
     except Exception as e:
         return handle_error(e)
 
+# Operations that /batch/<operation> runs on every upload: the single-file job operations
+BATCH_OPERATIONS = {name: job_operation for name, job_operation in JOB_OPERATIONS.items()
+                    if job_operation["field"] == "file"}
+
+@app.route("/batch/<operation>", methods=["POST"])
+def batch(operation):
+    """Run an operation on every file uploaded as "files" concurrently and stream a ZIP of the outputs
+    
+    Options are shared by every file and take the same form fields as the
+    regular route. Outputs are named after their upload; operations with
+    several outputs per file (split-pdf, pdf-to-images) get a folder per
+    file. The archive ends with manifest.json, giving the status, outputs
+    or error of every file, so files that fail do not fail the batch.
+    """
+    batch_operation = BATCH_OPERATIONS.get(operation)
+    if batch_operation is None:
+        return jsonify({"error": f"Unknown batch operation: {operation}"}), 404
+    
+    files = request.files.getlist("files")
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({"error": f"At most {BATCH_MAX_FILES} files can be processed in one batch"}), 400
+    
+    try:
+        job = batch_operation["build"](files[:1], request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Outputs are collected per file, so streaming methods run as their list-returning counterparts
+    method = job["method"][len("iter_"):] if job["method"].startswith("iter_") else job["method"]
+    entry_names = job.get("entry_names")
+    names = batch_names(files, "" if entry_names else os.path.splitext(job["download_name"])[1])
+    
+    extensions = batch_operation["extensions"]
+    manifest = [{"filename": file.filename} for file in files]
+    indexes = []
+    inputs = []
+    for index, file in enumerate(files):
+        if file.filename.lower().endswith(extensions):
+            indexes.append(index)
+            inputs.append(upload_data(file))
+        else:
+            manifest[index].update(status="error", status_code=400, error=FILE_TYPE_ERRORS[extensions])
+    
+    def entries():
+        with closing(iter_batch(method, inputs, job.get("kwargs"), isolate=job.get("isolate", True))) as results:
+            for outcome in results:
+                item = manifest[indexes[outcome.index]]
+                name = names[indexes[outcome.index]]
+                item["seconds"] = round(outcome.seconds, 3)
+                if outcome.error is not None:
+                    body, status_code = error_details(outcome.error)
+                    item.update(status="error", status_code=status_code, **body)
+                    continue
+                
+                if entry_names:
+                    outputs = outcome.result
+                    output_names = [f"{name}/{entry_names.format(n=n)}" for n in range(1, len(outputs) + 1)]
+                else:
+                    outputs = [outcome.result]
+                    output_names = [name]
+                item.update(status="ok", outputs=output_names)
+                yield from zip(output_names, outputs)
+        
+        summary = {
+            "operation": operation,
+            "total": len(manifest),
+            "succeeded": sum(1 for item in manifest if item.get("status") == "ok"),
+            "failed": sum(1 for item in manifest if item.get("status") == "error"),
+            "files": manifest
+        }
+        yield "manifest.json", json.dumps(summary, indent=2).encode()
+    
+    try:
+        return zip_response(entries(), f"batch_{operation}.zip")
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/documents", methods=["POST"])
+def upload_document():
+    # Stores the upload once by content hash; send the returned id as "document" (or
+    # "documents" for multi-file routes) instead of uploading the file again. The
+    # response is the same whether or not the content was already stored, so it
+    # does not reveal what other clients uploaded.
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    
+    file = request.files["file"]
+    if not file.filename.lower().endswith(DOCUMENT_EXTENSIONS):
+        return jsonify({"error": "Only PDF, DOCX, PNG and JPG files are allowed"}), 400
+    
+    try:
+        document, _ = get_document_store().put(upload_data(file), file.filename)
+        return jsonify({**document, "filename": file.filename}), 201
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/documents/<document_id>", methods=["GET"])
+def document_status(document_id):
+    document = get_document_store().get(document_id)
+    if document is None:
+        return jsonify({"error": "Unknown or expired document"}), 404
+    return jsonify(document)
+
+def upload_response(upload, status_code=200):
+    # The offset is also sent as a header, so HEAD requests can read it
+    return jsonify(upload), status_code, {"Upload-Offset": str(upload["offset"])}
+
+@app.route("/uploads", methods=["POST"])
+def create_upload():
+    """Start a resumable upload
+    
+    Form fields: "filename" and, if known, the total "size" in bytes. Send
+    the content with PUT /uploads/<id> in chunks of any size, each with an
+    Upload-Offset header giving where it starts. After a failed chunk,
+    GET (or HEAD) /uploads/<id> tells where to continue. Once every byte
+    has arrived, POST /uploads/<id>/finalize turns the upload into a
+    document whose id any operation accepts as "document".
+    """
+    filename = request.form.get("filename", "")
+    if not filename.lower().endswith(DOCUMENT_EXTENSIONS):
+        return jsonify({"error": "Only PDF, DOCX, PNG and JPG files are allowed"}), 400
+    try:
+        size = int(request.form["size"]) if request.form.get("size") else None
+    except ValueError:
+        return jsonify({"error": "Invalid upload size"}), 400
+    
+    try:
+        upload = get_resumable_uploads().create(secure_filename(filename) or filename, size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return upload_response({**upload, "upload_url": url_for("upload_chunk", upload_id=upload["id"])}, 201)
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    upload = get_resumable_uploads().get(upload_id)
+    if upload is None:
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    return upload_response(upload)
+
+@app.route("/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    # The body is the raw chunk; it is copied to the upload's spool file as it is read
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Missing or invalid Upload-Offset header"}), 400
+    
+    try:
+        upload = get_resumable_uploads().append(upload_id, offset, request.stream, request.content_length)
+        return upload_response(upload)
+    except KeyError:
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    except UploadOffsetError as e:
+        return jsonify({"error": str(e), "offset": e.offset}), 409, {"Upload-Offset": str(e.offset)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/uploads/<upload_id>/finalize", methods=["POST"])
+def finalize_upload(upload_id):
+    # An optional "sha256" form field is checked against the received content
+    try:
+        document = get_resumable_uploads().finalize(upload_id, request.form.get("sha256", ""))
+        return jsonify(document), 201
+    except KeyError:
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return handle_error(e)
+
+@app.route("/uploads/<upload_id>", methods=["DELETE"])
+def delete_upload(upload_id):
+    if not get_resumable_uploads().delete(upload_id):
+        return jsonify({"error": "Unknown or expired upload"}), 404
+    return jsonify({"id": upload_id, "deleted": True})
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "No job with this ID"}), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "No job with this ID"}), 404
+    
+    result_path = manager.result_path(job_id)
+    if result_path is None:
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+    return send_file(
+        result_path,
+        mimetype=job["mimetype"],
+        as_attachment=True,
+        download_name=job["download_name"]
+    )
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    # Cancels an active job, or removes a finished one together with its result
+    manager = get_job_manager()
+    try:
+        if manager.cancel(job_id):
+            return jsonify({"id": job_id, "cancelled": True})
+    except JobNotCancellableError as e:
+        return jsonify({"error": str(e), "status": "running"}), 409
+    if manager.delete(job_id):
+        return jsonify({"id": job_id, "deleted": True})
+    return jsonify({"error": "No job with this ID"}), 404
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text format; counters are per server process
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/profiles/<trace_id>/<kind>", methods=["GET"])
+def get_profile(trace_id, kind):
+    # trace: Chrome trace events (chrome://tracing, Perfetto); stacks: collapsed stacks (flamegraph.pl, speedscope)
+    if not profiling_allowed(request.headers.get("X-Profile") or request.args.get("profile")):
+        return jsonify({"error": "Profiling is not allowed for this client"}), 403
+    if not re.fullmatch(r"[0-9a-f]{32}", trace_id) or kind not in ("trace", "stacks"):
+        return jsonify({"error": "No profile with this ID"}), 404
+    
+    path = os.path.join(PROFILE_DIR, trace_id, "trace.json" if kind == "trace" else "profile.folded")
+    if not os.path.exists(path):
+        return jsonify({"error": "No profile with this ID"}), 404
+    with open(path, 'rb') as f:
+        data = f.read()
+    if kind == "trace":
+        # Close the event array the request and its workers appended to
+        data = data.rstrip().rstrip(b",") + b"\n]\n"
+        return Response(data, mimetype="application/json")
+    return Response(data, mimetype="text/plain")
+
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    # Hit ratio and store usage of the result cache in this server process
+    return jsonify(get_result_cache().stats())
+
+@app.route("/tasks/<task_id>", methods=["DELETE"])
+def cancel_task(task_id):
+    # Kills the worker of a running request that was sent with this X-Task-ID
+    if not cancel_operation(task_id):
+        return jsonify({"error": "No running task with this ID"}), 404
+    return jsonify({"task_id": task_id, "cancelled": True})
+
 @app.route("/get-pdf-info", methods=["POST"])
 def get_pdf_info():
     if "file" not in request.files:
@@ -305,15 +1095,16 @@ def get_pdf_info():
         return jsonify({"error": "Only PDF files are allowed"}), 400
         
     try:
-        # Read PDF data and get total pages
-        pdf_data = file.read()
-        pdf = PdfReader(BytesIO(pdf_data))
-        total_pages = len(pdf.pages)
+        # Read metadata from the document structure (cached by content hash)
+        pdf_data = upload_data(file)
+        with track_operation("get_pdf_info", (pdf_data,)) as record:
+            # Counting images reads every page's resources, so it is opt-in
+            include_images = request.form.get("images", "false").lower() == "true"
+            pdf_info = PDFOperations.get_pdf_info(pdf_data, include_images=include_images)
+            record.add_pages(pdf_info["total_pages"])
+        pdf_info["filename"] = file.filename
         
-        return jsonify({
-            "total_pages": total_pages,
-            "filename": file.filename
-        })
+        return jsonify(pdf_info)
         
     except Exception as e:
         logger.error(f"Error getting PDF info: {str(e)}")
@@ -3,6 +3,8 @@ from .image_operations import ImageOperations
 from .compression_operations import CompressionOperations
 from .split_operations import SplitOperations
 from .document_operations import DocumentOperations
+from .info_operations import InfoOperations
+from .page_operations import PageOperations
 from .config import logger, format_size, get_buffer_size
 
 __all__ = [
@@ -11,6 +13,8 @@ __all__ = [
     'CompressionOperations',
     'SplitOperations',
     'DocumentOperations',
+    'InfoOperations',
+    'PageOperations',
     'get_buffer_size',
     'logger',
     'format_size'
@@ -0,0 +1,268 @@
+from .config import *
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from .isolation import OperationAbortedError, OperationCancelledError
+from .temp_files import data_size
+from .metrics import Counter, Gauge
+
+
+class ServerBusyError(OperationAbortedError):
+    """An operation was rejected because the server had no capacity for it"""
+
+    status_code = 429
+    code = "busy"
+
+    def __init__(self, operation: str, retry_after: int):
+        super().__init__(f"Server is busy, {operation} could not be started", operation)
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        return (type(self), (self.operation, self.retry_after))
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), "retry_after": self.retry_after}
+
+
+def _pdf_page_stats(pdf_data: Union[str, bytes, BytesIO]):
+    """Get the page count and the largest page area in square points from the document structure
+
+    Only a sample of up to ADMISSION_PAGE_SAMPLE pages spread over the
+    document is read, for at most ADMISSION_PAGE_SAMPLE_TIME seconds, so an
+    untrusted document costs the server process little before admission.
+    """
+    if isinstance(pdf_data, str):
+        doc = fitz.open(pdf_data)
+    elif isinstance(pdf_data, bytes):
+        doc = fitz.open(stream=pdf_data, filetype="pdf")
+    elif isinstance(pdf_data, BytesIO):
+        doc = fitz.open(stream=pdf_data.getvalue(), filetype="pdf")
+    else:
+        raise ValueError("Invalid PDF input type")
+
+    with doc:
+        page_count = doc.page_count
+        step = max(1, page_count // ADMISSION_PAGE_SAMPLE)
+        deadline = time.monotonic() + ADMISSION_PAGE_SAMPLE_TIME
+        largest_area = 0
+        for page_num in range(0, page_count, step)[:ADMISSION_PAGE_SAMPLE]:
+            # Page boxes come from the page tree, nothing is rendered or parsed
+            rect = doc.load_page(page_num).rect
+            largest_area = max(largest_area, rect.width * rect.height)
+            if time.monotonic() > deadline:
+                break
+        return page_count, largest_area
+
+
+def _image_pixels(image_data: Union[str, bytes, BytesIO]) -> int:
+    """Get the pixel count of an image from its header"""
+    if isinstance(image_data, bytes):
+        image_data = BytesIO(image_data)
+    with Image.open(image_data) as img:
+        width, height = img.size
+    return min(width * height, MAX_DIMENSION * MAX_DIMENSION)
+
+
+def operation_workers(kwargs: dict) -> int:
+    """Get the number of worker processes an operation starts from its workers argument"""
+    try:
+        workers = int(kwargs.get("workers", 1))
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(workers, MAX_CONVERSION_WORKERS))
+
+
+def estimate_cost(operation: str, args: tuple, kwargs: dict) -> int:
+    """Estimate the peak memory of an operation in bytes from cheap input metadata
+
+    Every operation costs a fixed overhead plus a multiple of its input size
+    (OPERATION_COSTS), once for each worker process it starts (such as
+    pdf_to_word with workers > 1). Rendering adds the raster of the largest
+    page at the requested DPI, and for pdf_to_images, which keeps every page,
+    one raster per page. Images to PDF adds the decoded pixels of every image.
+    """
+    inputs = args[0] if args else []
+    if not isinstance(inputs, list):
+        inputs = [inputs]
+    input_bytes = sum(data_size(data) for data in inputs)
+    fixed, factor = OPERATION_COSTS.get(operation, OPERATION_COST_DEFAULT)
+    cost = (fixed + factor * input_bytes) * operation_workers(kwargs)
+
+    try:
+        if operation in ("pdf_to_images", "iter_pdf_to_images"):
+            dpi = kwargs.get("dpi", 200)
+            page_count, largest_area = _pdf_page_stats(inputs[0])
+            # RGB pixmap, PIL copy and PNG buffer of one page
+            raster = int(largest_area * (dpi / 72) ** 2 * 3)
+            cost += raster * 3
+            if operation == "pdf_to_images":
+                cost += page_count * min(raster, 2000 * 2000 * 3)
+        elif operation == "images_to_pdf":
+            cost += sum(_image_pixels(data) for data in inputs) * 3
+    except Exception as e:
+        # Unreadable input; the operation itself reports the error
+        logger.warning(f"Could not estimate the cost of {operation}: {str(e)}")
+
+    return cost
+
+
+class _Ticket:
+    def __init__(self, controller: "AdmissionController", operation: str, cost: int, slots: int):
+        self.controller = controller
+        self.operation = operation
+        self.cost = cost
+        self.slots = slots
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        self.controller._release(self)
+
+
+class AdmissionController:
+    """Admit operations while they fit the memory budget and concurrency limits
+
+    Requests that do not fit wait in a bounded queue until running
+    operations finish. When the queue is full or the wait exceeds its
+    timeout they are rejected with ServerBusyError, whose retry_after is
+    derived from how long operations of that type usually take. Background
+    work (jobs and batches) waits as long as it takes and is counted
+    separately, so it never takes queue slots from requests. An operation
+    that starts several worker processes takes one concurrency slot per
+    worker. Limits apply per server process.
+    """
+
+    def __init__(self, memory_budget: int = ADMISSION_MEMORY_BUDGET, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.memory_budget = memory_budget
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._memory_in_use = 0
+        self._running = {}  # operation -> count
+        self._waiting = 0
+        self._waiting_background = 0
+        self._durations = {}  # operation -> moving average of seconds
+
+    def _fits(self, operation: str, cost: int, slots: int) -> bool:
+        limit = OPERATION_CONCURRENCY.get(operation, OPERATION_CONCURRENCY_DEFAULT)
+        running = self._running.get(operation, 0)
+        # More workers than the limit still run once nothing else of the type does
+        if running and running + slots > limit:
+            return False
+        # A request larger than the whole budget may still run on an otherwise idle server
+        return self._memory_in_use + cost <= self.memory_budget or self._memory_in_use == 0
+
+    def _retry_after(self, operation: str) -> int:
+        return max(1, math.ceil(self._durations.get(operation, 5)))
+
+    def acquire(self, operation: str, cost: int, wait: bool = False, slots: int = 1,
+                cancelled: Optional[threading.Event] = None) -> _Ticket:
+        """Wait until an operation may start
+
+        Args:
+            operation: Operation name, used for its concurrency limit
+            cost: Estimated peak memory in bytes
+            wait: Wait for capacity as long as it takes instead of at most
+                queue_timeout, e.g. for background jobs
+            slots: Concurrency slots taken, one per worker process
+            cancelled: Event that ends the wait when set; call wake() after setting it
+
+        Raises:
+            ServerBusyError: No capacity became available in time
+            OperationCancelledError: cancelled was set before the operation was admitted
+        """
+        timeout = None if wait else self.queue_timeout
+        is_cancelled = cancelled.is_set if cancelled is not None else lambda: False
+        with self._condition:
+            if not self._fits(operation, cost, slots) and not is_cancelled():
+                if not wait and self._waiting >= self.max_queue:
+                    ADMISSION_REJECTED.inc(operation=operation)
+                    raise ServerBusyError(operation, self._retry_after(operation))
+                if wait:
+                    self._waiting_background += 1
+                else:
+                    self._waiting += 1
+                try:
+                    if not self._condition.wait_for(lambda: is_cancelled() or self._fits(operation, cost, slots),
+                                                    timeout):
+                        logger.warning(f"Rejected {operation}: no capacity within {timeout}s")
+                        ADMISSION_REJECTED.inc(operation=operation)
+                        raise ServerBusyError(operation, self._retry_after(operation))
+                finally:
+                    if wait:
+                        self._waiting_background -= 1
+                    else:
+                        self._waiting -= 1
+            if is_cancelled():
+                raise OperationCancelledError(operation)
+
+            self._memory_in_use += cost
+            self._running[operation] = self._running.get(operation, 0) + slots
+            return _Ticket(self, operation, cost, slots)
+
+    def wake(self):
+        """Let waiting callers recheck their cancellation events"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def _release(self, ticket: _Ticket):
+        with self._condition:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._memory_in_use -= ticket.cost
+            self._running[ticket.operation] -= ticket.slots
+            duration = time.monotonic() - ticket.started
+            previous = self._durations.get(ticket.operation)
+            self._durations[ticket.operation] = duration if previous is None else 0.8 * previous + 0.2 * duration
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, operation: str, args: tuple, kwargs: dict, wait: bool = False,
+              cancelled: Optional[threading.Event] = None) -> Iterator[None]:
+        """Estimate an operation's cost and hold its capacity while the block runs"""
+        ticket = self.acquire(operation, estimate_cost(operation, args, kwargs), wait, operation_workers(kwargs),
+                              cancelled)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def stats(self) -> dict:
+        """Get current usage of the budget and queue"""
+        with self._condition:
+            return {
+                "memory_in_use": self._memory_in_use,
+                "memory_budget": self.memory_budget,
+                "running": {operation: count for operation, count in self._running.items() if count},
+                "waiting": self._waiting,
+                "waiting_background": self._waiting_background
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+ADMISSION_REJECTED = Counter(
+    "pdfconv_admission_rejected_total", "Operations rejected because the server was over capacity", ["operation"])
+ADMISSION_WAITING = Gauge(
+    "pdfconv_admission_waiting", "Operations queued waiting for capacity",
+    collect=lambda: {(): get_admission_controller().stats()["waiting"]})
+ADMISSION_WAITING_BACKGROUND = Gauge(
+    "pdfconv_admission_waiting_background", "Jobs and batch inputs waiting for capacity",
+    collect=lambda: {(): get_admission_controller().stats()["waiting_background"]})
+ADMISSION_MEMORY_IN_USE = Gauge(
+    "pdfconv_admission_memory_in_use_bytes", "Estimated peak memory of the running operations",
+    collect=lambda: {(): get_admission_controller().stats()["memory_in_use"]})
@@ -0,0 +1,95 @@
+from .config import *
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, NamedTuple, Optional
+from .isolation import run_isolated, cancel_operation, OperationCancelledError
+from .admission import get_admission_controller
+from .metrics import track_operation, count_pages
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one input of a batch"""
+    index: int
+    result: object
+    error: Optional[BaseException]
+    seconds: float
+
+
+def iter_batch(method: str, inputs: List[Union[str, bytes, BytesIO]], kwargs: Optional[dict] = None,
+               isolate: bool = True, concurrency: int = BATCH_CONCURRENCY) -> Iterator[BatchResult]:
+    """Run a PDFOperations method on every input concurrently, yielding outcomes as they finish
+
+    Each input runs in its own worker process, at most concurrency at a time
+    and within the admission controller's limits (waiting for capacity like
+    background jobs do). A failing input is reported through its
+    BatchResult.error and does not stop the others. Inputs are only started
+    as results are consumed, so at most concurrency results are held in
+    memory; closing the iterator cancels whatever is still queued or running.
+
+    Args:
+        method: Name of the PDFOperations method, called as method(input, **kwargs)
+        inputs: Inputs as file paths, bytes, or BytesIO objects
+        kwargs: Keyword arguments shared by every call
+        isolate: Run each call in a killable worker process
+        concurrency: Inputs processed at the same time
+
+    Returns:
+        Iterator of BatchResult in completion order
+    """
+    from ..pdf_operations import PDFOperations
+
+    func = getattr(PDFOperations, method)
+    kwargs = kwargs or {}
+    controller = get_admission_controller()
+    batch_id = uuid.uuid4().hex
+    closed = threading.Event()
+
+    def run(index: int, data) -> BatchResult:
+        started = time.perf_counter()
+        args = (data,)
+        try:
+            with controller.admit(method, args, kwargs, wait=True), track_operation(method, args) as record:
+                if closed.is_set():
+                    raise OperationCancelledError(method)
+                if isolate:
+                    result = run_isolated(func, data, task_id=f"{batch_id}-{index}", on_pages=record.add_pages,
+                                          **kwargs)
+                else:
+                    result = func(data, **kwargs)
+                    record.add_pages(count_pages(args, result))
+                record.add_output(result)
+            return BatchResult(index, result, None, time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Batch {method} failed for input {index + 1}: {str(e)}")
+            return BatchResult(index, None, e, time.perf_counter() - started)
+
+    queued = enumerate(inputs)
+    running = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+
+    def submit_next():
+        for index, data in queued:
+            # A context per call, so spans of a profiled request reach its trace
+            running.add(executor.submit(contextvars.copy_context().run, run, index, data))
+            return
+
+    try:
+        for _ in range(max(1, concurrency)):
+            submit_next()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.discard(future)
+                submit_next()
+                yield future.result()
+    finally:
+        if running:
+            closed.set()
+            for future in running:
+                future.cancel()
+            for index in range(len(inputs)):
+                cancel_operation(f"{batch_id}-{index}")
+        executor.shutdown(wait=False)
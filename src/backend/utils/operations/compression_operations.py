@@ -1,6 +1,7 @@
 from .config import *
 from typing import Union
 from io import BytesIO
+from .tracing import span
 
 class CompressionOperations:
     @staticmethod
@@ -31,7 +32,8 @@ class CompressionOperations:
             def compress_with_params(doc, params):
                 """Helper function to compress with parameters and check reduction"""
                 output_buffer = BytesIO()
-                doc.save(output_buffer, **params)
+                with span("save"):
+                    doc.save(output_buffer, **params)
                 compressed_size = get_buffer_size(output_buffer)
                 reduction = ((original_size - compressed_size) / original_size) * 100
                 return output_buffer, compressed_size, reduction
@@ -41,7 +43,6 @@ class CompressionOperations:
                 "deflate": True,
                 "clean": True,
                 "pretty": False,
-                "linear": True,
             }
             
             # Quality-specific settings
@@ -80,23 +81,24 @@ class CompressionOperations:
                     doc = fitz.open(stream=pdf_data.getvalue())
                 
                 # Process images
-                for page in doc:
-                    for img in page.get_images():
-                        xref = img[0]
-                        pix = fitz.Pixmap(doc, xref)
+                with span("resample_images", scale=scale):
+                    for page in doc:
+                        for img in page.get_images():
+                            xref = img[0]
+                            pix = fitz.Pixmap(doc, xref)
                         
-                        # Convert CMYK to RGB if needed
-                        if pix.n - pix.alpha >= 4:
-                            pix = fitz.Pixmap(fitz.csRGB, pix)
+                            # Convert CMYK to RGB if needed
+                            if pix.n - pix.alpha >= 4:
+                                pix = fitz.Pixmap(fitz.csRGB, pix)
                             
-                        # Resize image based on quality
-                        if quality == "high" or (quality == "medium" and (pix.width > 800 or pix.height > 800)) or \
-                           (quality == "low" and (pix.width > 1500 or pix.height > 1500)):
-                            new_width = max(100, int(pix.width * scale))
-                            new_height = max(100, int(pix.height * scale))
-                            pix = fitz.Pixmap(pix, new_width, new_height)
+                            # Resize image based on quality
+                            if quality == "high" or (quality == "medium" and (pix.width > 800 or pix.height > 800)) or \
+                               (quality == "low" and (pix.width > 1500 or pix.height > 1500)):
+                                new_width = max(100, int(pix.width * scale))
+                                new_height = max(100, int(pix.height * scale))
+                                pix = fitz.Pixmap(pix, new_width, new_height)
                             
-                        page.replace_image(xref, pixmap=pix)
+                            page.replace_image(xref, pixmap=pix)
                 
                 # Try compression
                 output_buffer, compressed_size, reduction = compress_with_params(
@@ -1,13 +1,37 @@
 import os
 import logging
+import importlib
 from typing import List, Union
 from io import BytesIO
-from PIL import Image
-import fitz  # PyMuPDF
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
 import shutil
-import docx2pdf
-import pdf2docx
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> _LazyModule:
+    """Defer importing a module until it is first used
+    
+    Conversion libraries take hundreds of milliseconds to import, and most
+    requests only need one of them. Modules used as `module.attr` (fitz,
+    PIL.Image, pdf2docx, docx2pdf) are bound with lazy_import; classes such
+    as PdfReader or Document are imported inside the methods that use them.
+    """
+    return _LazyModule(name)
+
+
+fitz = lazy_import("fitz")  # PyMuPDF
+Image = lazy_import("PIL.Image")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +41,89 @@ logger = logging.getLogger(__name__)
 TEMP_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "temp"))
 MAX_IMAGE_PIXELS = 178956970  # PIL's default limit
 MAX_DIMENSION = 4000  # Maximum width/height for any image
+RAM_TEMP_THRESHOLD = 64 * 1024 * 1024  # Temp workspaces expected below this size live in /dev/shm
+TEMP_QUOTA_BYTES = 4 * 1024 * 1024 * 1024  # Total temp space conversions may reserve at once, across all processes
+TEMP_QUOTA_RETRY_AFTER = 5  # Seconds clients are asked to wait when TEMP_QUOTA_BYTES is used up
+UPLOAD_SPOOL_THRESHOLD = 8 * 1024 * 1024  # Requests larger than this keep their uploads on disk and pass paths
+ASGI_THREADS = 32  # Request handlers running at once under the ASGI server (conversions run in worker processes)
+ASGI_MAX_BODY_BYTES = 1024 * 1024 * 1024  # Larger request bodies are answered with 413 by the ASGI server
+PDF_TO_WORD_CHUNK_SIZE = 20  # Pages parsed per worker task in pdf_to_word
+FAST_TEXT_CHUNK_SIZE = 100  # Pages per worker task for PyMuPDF text extraction
+MAX_CONVERSION_WORKERS = os.cpu_count() or 1  # Upper bound for parallel conversion workers
+
+# LibreOffice conversion pool (used for Word to PDF on non-Windows platforms)
+LIBREOFFICE_BINARY = "soffice"
+LIBREOFFICE_POOL_SIZE = 2  # Long-lived headless instances
+LIBREOFFICE_MAX_JOBS = 200  # Conversions before an instance is recycled
+LIBREOFFICE_START_TIMEOUT = 30  # Seconds to wait for an instance to accept connections
+LIBREOFFICE_QUEUE_TIMEOUT = 120  # Seconds to wait for a free instance
+LIBREOFFICE_JOB_TIMEOUT = 300  # Seconds before a conversion is killed
+
+# Isolated operation workers (used by the API so one document cannot hold a server worker forever)
+OPERATION_TIMEOUT = 300  # Default wall-clock seconds before an operation's worker is killed
+OPERATION_TIMEOUTS = {  # Per-operation overrides of OPERATION_TIMEOUT
+    "pdf_to_word": 600,
+    "word_to_pdf_batch": 900,
+}
+OPERATION_MEMORY_LIMIT = 4 * 1024 * 1024 * 1024  # Address space limit per worker in bytes (0 disables)
+# Imported once by the forkserver so isolated workers start with them loaded
+OPERATION_PRELOAD_MODULES = ["fitz", "PyPDF2", "PIL.Image", "docx", "pdf2docx"]
+
+# Admission control: requests are admitted while their estimated peak memory fits the
+# budget and their operation is below its concurrency limit, otherwise they wait in a
+# queue and are rejected with 429 when no capacity frees up in time
+ADMISSION_MEMORY_BUDGET = 6 * 1024 * 1024 * 1024  # Estimated bytes all running operations may use together
+ADMISSION_QUEUE_TIMEOUT = 10  # Seconds a request may wait for capacity before it is rejected
+ADMISSION_MAX_QUEUE = 32  # Requests waiting for capacity at once; more are rejected immediately
+ADMISSION_PAGE_SAMPLE = 16  # Pages whose size is read to estimate rendering cost
+ADMISSION_PAGE_SAMPLE_TIME = 0.05  # Seconds spent reading page sizes at most
+OPERATION_CONCURRENCY_DEFAULT = 4  # Operations of one type running at the same time
+OPERATION_CONCURRENCY = {  # Per-operation overrides of OPERATION_CONCURRENCY_DEFAULT
+    "pdf_to_images": 2,
+    "iter_pdf_to_images": 2,
+    "pdf_to_word": 2,
+    "compress_pdf": 2,
+}
+OPERATION_COST_DEFAULT = (64 * 1024 * 1024, 4)  # Estimated peak memory: (fixed bytes, multiple of input size)
+OPERATION_COSTS = {  # Per-operation overrides of OPERATION_COST_DEFAULT
+    "merge_pdfs": (64 * 1024 * 1024, 3),
+    "split_pdf": (64 * 1024 * 1024, 3),
+    "iter_split_pdf": (64 * 1024 * 1024, 3),
+    "compress_pdf": (128 * 1024 * 1024, 6),
+    "pdf_to_word": (256 * 1024 * 1024, 20),
+    "word_to_pdf": (128 * 1024 * 1024, 4),
+    "word_to_pdf_batch": (128 * 1024 * 1024, 4),
+}
+
+# On-demand profiling: requests sent with an X-Profile header or profile query
+# parameter equal to PDFCONV_PROFILE_TOKEN record stack samples and span timings
+# under PROFILE_DIR. Profiling is disabled while the token is not set.
+PROFILE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "profiles"))
+PROFILE_TOKEN = os.environ.get("PDFCONV_PROFILE_TOKEN", "")
+PROFILE_INTERVAL = 0.005  # Seconds between stack samples
+PROFILE_KEEP = 50  # Most recent profiles kept on disk
+
+# Result cache for expensive conversions, keyed by input content and parameters
+RESULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cache"))
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # Least recently used results are evicted above this size
+RESULT_CACHE_TTL = 24 * 60 * 60  # Seconds a result stays valid after it was stored
+
+# Asynchronous jobs (inputs, results and the SQLite job database live under JOBS_DIR)
+JOBS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "jobs"))
+JOB_WORKERS = max(2, os.cpu_count() or 1)  # Jobs running at the same time
+JOB_RETENTION = 24 * 60 * 60  # Seconds finished jobs and their results are kept
+
+# Uploaded documents (/documents), stored once by content hash and referenced by handle
+DOCUMENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "documents"))
+DOCUMENT_TTL = 60 * 60  # Seconds a document is kept after it was last uploaded or used
+
+# Resumable uploads (/uploads), appended to in chunks and finalized into a document
+UPLOADS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads"))
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # Seconds an unfinished upload is kept after its last chunk
+
+# Batch requests (/batch/<operation>), which run one operation on many uploads
+BATCH_MAX_FILES = 100  # Uploads accepted in one batch
+BATCH_CONCURRENCY = max(2, os.cpu_count() or 1)  # Files of one batch processed at the same time
 
 def format_size(size_in_bytes: int) -> str:
     """Format size in bytes to human readable format"""
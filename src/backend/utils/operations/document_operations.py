@@ -1,51 +1,167 @@
 from .config import *
-import docx2pdf
-import pdf2docx
-import tempfile
 import platform
 import subprocess
-from docx import Document
-from typing import Union
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union, List, Tuple, Iterator, Optional
+from collections import Counter
 from io import BytesIO
-from PyPDF2 import PdfReader
+from .libreoffice_pool import get_libreoffice_pool, convert_with_soffice
+from .merge_operations import MergeOperations
+from .temp_files import temp_workspace, data_size
+from .docx_renderer import load_docx, unsupported_docx_features, render_docx
+from .isolation import report_progress, in_worker, run_isolated, OperationAbortedError
+from .tracing import span
+
+pdf2docx = lazy_import("pdf2docx")
+docx2pdf = lazy_import("docx2pdf")
+
+def _parse_pdf_chunk(pdf_path: str, page_indexes: List[int], settings: dict) -> Tuple[dict, float]:
+    """Parse a chunk of pages with pdf2docx in a worker process
+    
+    Returns:
+        Tuple of the parsed page data (Converter.store format) and the time taken in seconds
+    """
+    start_time = perf_counter()
+    converter = pdf2docx.Converter(pdf_path)
+    try:
+        converter.load_pages(pages=page_indexes)
+        converter.parse_document(**settings).parse_pages(**settings)
+        return converter.store(), perf_counter() - start_time
+    finally:
+        converter.close()
+
+def _page_text_blocks(page) -> List[dict]:
+    """Get a page's text blocks with their dominant font size and weight
+    
+    Returns:
+        List of {"text", "size", "bold", "bbox"} dictionaries in reading order
+    """
+    # Skip image data, only text is needed
+    flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    blocks = []
+    for block in page.get_text("dict", flags=flags, sort=True)["blocks"]:
+        lines = []
+        sizes = Counter()
+        bold_chars = 0
+        for line in block.get("lines", []):
+            line_text = "".join(span["text"] for span in line["spans"]).strip()
+            if line_text:
+                lines.append(line_text)
+            for span in line["spans"]:
+                chars = len(span["text"].strip())
+                sizes[round(span["size"], 1)] += chars
+                if span["flags"] & fitz.TEXT_FONT_BOLD:
+                    bold_chars += chars
+        if lines:
+            blocks.append({
+                "text": " ".join(lines),
+                "size": sizes.most_common(1)[0][0],
+                "bold": bold_chars * 2 > sum(sizes.values()),
+                "bbox": [round(value, 1) for value in block["bbox"]]
+            })
+    return blocks
+
+def _extract_text_blocks(pdf_path: str, page_indexes: List[int]) -> List[List[dict]]:
+    """Extract the text blocks of several pages in a worker process
+    
+    Returns:
+        One list of blocks (see _page_text_blocks) per page
+    """
+    with fitz.open(pdf_path) as doc:
+        return [_page_text_blocks(doc.load_page(page_num)) for page_num in page_indexes]
+
+def _heading_level(block: dict, body_size: float) -> int:
+    """Classify a text block as a heading (1-3) or body text (0) relative to the body font size
+    
+    Blocks set noticeably larger than the body text become headings, as do
+    short bold blocks at body size.
+    """
+    if body_size and block["size"] >= body_size * 1.5:
+        return 1
+    if body_size and block["size"] >= body_size * 1.2:
+        return 2
+    if block["bold"] and len(block["text"]) < 120 and block["size"] >= body_size:
+        return 3
+    return 0
+
+def _page_indexes(pages: List[Union[int, Tuple[int, int]]], total_pages: int) -> List[int]:
+    """Resolve 1-based page numbers and (start, end) ranges to 0-based page indexes
+    
+    Ranges are checked against the page count before they are expanded, so a
+    range far past the end of the document is rejected without building it.
+    """
+    ranges = [(p, p) if isinstance(p, int) else tuple(p) for p in pages]
+    invalid_pages = [start if start == end else f"{start}-{end}" for start, end in ranges
+                     if start < 1 or end > total_pages or start > end]
+    if invalid_pages:
+        raise ValueError(f"Invalid page numbers: {invalid_pages[:10]}. Pages must be between 1 and {total_pages}")
+    return [index for start, end in ranges for index in range(start - 1, end)]
 
 class DocumentOperations:
     @staticmethod
-    def pdf_to_word(pdf_data: Union[str, bytes, BytesIO]) -> BytesIO:
+    def pdf_to_word(pdf_data: Union[str, bytes, BytesIO], pages: List[Union[int, Tuple[int, int]]] = None,
+                    workers: int = 1,
+                    chunk_size: int = PDF_TO_WORD_CHUNK_SIZE, mode: str = "layout") -> BytesIO:
         """Convert PDF to Word document
         
+        With more than one worker, the selected pages are parsed in chunks of
+        chunk_size pages on a process pool and stitched into a single DOCX.
+        The time taken by every chunk is logged to help tune chunk_size.
+        
         Args:
             pdf_data: PDF data as file path, bytes, or BytesIO
+            pages: 1-based page numbers or (start, end) ranges to convert (default: all pages)
+            workers: Number of worker processes used for parsing
+            chunk_size: Number of pages parsed per worker task
+            mode: 'layout' to reproduce the layout with pdf2docx, or 'fast' for
+                editable text with paragraphs and headings only. Layout mode
+                falls back to fast mode if pdf2docx fails.
             
         Returns:
             BytesIO object containing the Word document
         """
+        if mode not in ("layout", "fast"):
+            raise ValueError("Invalid conversion mode")
+            
         try:
-            # Create temporary files for conversion
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_temp, \
-                 tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as docx_temp:
+            # Workspace for the input and output files, removed when done
+            with temp_workspace(expected_size=data_size(pdf_data) * 3, operation="pdf_to_word") as work_dir:
+                pdf_path = os.path.join(work_dir, "input.pdf")
+                docx_path = os.path.join(work_dir, "output.docx")
                 
                 # Write PDF data to temp file
                 if isinstance(pdf_data, str):
-                    with open(pdf_data, 'rb') as f:
-                        pdf_temp.write(f.read())
+                    shutil.copyfile(pdf_data, pdf_path)
                 elif isinstance(pdf_data, bytes):
-                    pdf_temp.write(pdf_data)
+                    with open(pdf_path, 'wb') as f:
+                        f.write(pdf_data)
                 elif isinstance(pdf_data, BytesIO):
-                    pdf_temp.write(pdf_data.getvalue())
+                    with open(pdf_path, 'wb') as f:
+                        f.write(pdf_data.getbuffer())
                 else:
                     raise ValueError("Invalid PDF input type")
                 
-                pdf_temp.flush()
+                # Resolve the pages to convert
+                with fitz.open(pdf_path) as doc:
+                    total_pages = doc.page_count
+                if pages:
+                    page_indexes = sorted(set(_page_indexes(pages, total_pages)))
+                else:
+                    page_indexes = list(range(total_pages))
+                
+                if mode == "fast":
+                    output_buffer = DocumentOperations._pdf_to_word_fast(pdf_path, page_indexes, workers)
+                    logger.info("Successfully extracted text to Word document")
+                    return output_buffer
                 
                 try:
-                    # Convert PDF to Word
-                    converter = pdf2docx.Converter(pdf_temp.name)
-                    converter.convert(docx_temp.name)
-                    converter.close()
+                    DocumentOperations._convert_pdf_pages(
+                        pdf_path, docx_path, page_indexes, workers, chunk_size
+                    )
                     
                     # Read the converted file into BytesIO
-                    with open(docx_temp.name, 'rb') as f:
+                    with open(docx_path, 'rb') as f:
                         output_buffer = BytesIO(f.read())
                     
                     logger.info("Successfully converted PDF to Word")
@@ -54,102 +170,421 @@ class DocumentOperations:
                 except Exception as e:
                     logger.error(f"Error in PDF to Word conversion: {str(e)}")
                     
-                    # Fallback to simple text extraction
-                    logger.info("Falling back to simple text extraction")
-                    reader = PdfReader(pdf_temp.name)
-                    doc = Document()
-                    
-                    for page in reader.pages:
-                        text = page.extract_text()
-                        if text.strip():
-                            doc.add_paragraph(text.strip())
-                        
-                        # Add page break after each page except the last one
-                        if page != reader.pages[-1]:
-                            doc.add_page_break()
-                    
-                    # Save to BytesIO
-                    output_buffer = BytesIO()
-                    doc.save(output_buffer)
-                    output_buffer.seek(0)
+                    # Fallback to fast text extraction
+                    logger.info("Falling back to fast text extraction")
+                    output_buffer = DocumentOperations._pdf_to_word_fast(pdf_path, page_indexes, workers)
                     
                     logger.info("Successfully extracted text to Word document")
                     return output_buffer
                     
+        except OperationAbortedError:
+            raise
         except Exception as e:
             logger.error(f"Error converting PDF to Word: {str(e)}")
             raise ValueError(f"Failed to convert PDF to Word: {str(e)}")
 
     @staticmethod
-    def word_to_pdf(docx_data: Union[str, bytes, BytesIO]) -> BytesIO:
+    def iter_text(pdf_data: Union[str, bytes, BytesIO], format: str = "text",
+                  pages: List[Union[int, Tuple[int, int]]] = None) -> Iterator[Union[str, dict]]:
+        """Extract text page by page, yielding each page as soon as it is read
+        
+        Formats:
+            - 'text': plain text of the page in reading order
+            - 'markdown': paragraphs separated by blank lines, with headings
+              detected from font size and weight relative to the body text
+              seen so far
+            - 'json-blocks': {"page": n, "blocks": [...]} with the text, font
+              size, bold flag and bounding box of every text block
+        
+        Args:
+            pdf_data: PDF data as file path, bytes, or BytesIO
+            format: 'text', 'markdown', or 'json-blocks'
+            pages: 1-based page numbers or (start, end) ranges to extract (default: all pages)
+            
+        Returns:
+            Iterator of one str ('text', 'markdown') or dict ('json-blocks') per page
+        """
+        if format not in ("text", "markdown", "json-blocks"):
+            raise ValueError("Invalid text format")
+        
+        try:
+            # Open PDF from various input types
+            with span("open"):
+                if isinstance(pdf_data, str):
+                    doc = fitz.open(pdf_data)
+                elif isinstance(pdf_data, bytes):
+                    doc = fitz.open(stream=pdf_data, filetype="pdf")
+                elif isinstance(pdf_data, BytesIO):
+                    doc = fitz.open(stream=pdf_data.getvalue(), filetype="pdf")
+                else:
+                    raise ValueError("Invalid PDF input type")
+            
+            with doc:
+                if doc.needs_pass:
+                    raise ValueError("Cannot extract text from a password-protected PDF")
+                
+                total_pages = doc.page_count
+                if pages:
+                    page_indexes = _page_indexes(pages, total_pages)
+                else:
+                    page_indexes = range(total_pages)
+                
+                size_weights = Counter()
+                for page_num in page_indexes:
+                    page = doc.load_page(page_num)
+                    if format == "text":
+                        yield page.get_text("text", flags=fitz.TEXTFLAGS_TEXT, sort=True)
+                        continue
+                    
+                    blocks = _page_text_blocks(page)
+                    if format == "json-blocks":
+                        yield {"page": page_num + 1, "blocks": blocks}
+                        continue
+                    
+                    for block in blocks:
+                        size_weights[block["size"]] += len(block["text"])
+                    body_size = size_weights.most_common(1)[0][0] if size_weights else 0
+                    paragraphs = []
+                    for block in blocks:
+                        level = _heading_level(block, body_size)
+                        paragraphs.append(f"{'#' * level} {block['text']}" if level else block["text"])
+                    yield "\n\n".join(paragraphs)
+                    
+        except Exception as e:
+            logger.error(f"Error extracting text: {str(e)}")
+            raise ValueError(f"Failed to extract text: {str(e)}")
+
+    @staticmethod
+    def _pdf_to_word_fast(pdf_path: str, page_indexes: List[int], workers: int = 1) -> BytesIO:
+        """Build a DOCX from PyMuPDF text blocks, keeping paragraphs and headings
+        
+        Each text block becomes a paragraph or, relative to the body text (the
+        most common font size), a heading. Pages are extracted in parallel
+        chunks when more than one worker is requested.
+        """
+        workers = max(1, min(workers, MAX_CONVERSION_WORKERS))
+        chunks = [page_indexes[i:i + FAST_TEXT_CHUNK_SIZE] for i in range(0, len(page_indexes), FAST_TEXT_CHUNK_SIZE)]
+        
+        start_time = perf_counter()
+        with span("extract", pages=len(page_indexes)):
+            if workers == 1 or len(chunks) <= 1:
+                pages = _extract_text_blocks(pdf_path, page_indexes)
+            else:
+                pages = []
+                with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                    for chunk_pages in executor.map(_extract_text_blocks, [pdf_path] * len(chunks), chunks):
+                        pages.extend(chunk_pages)
+        logger.info(f"Extracted text from {len(page_indexes)} pages in {perf_counter() - start_time:.2f}s")
+        
+        # Body text size is the size covering the most characters
+        size_weights = Counter()
+        for blocks in pages:
+            for block in blocks:
+                size_weights[block["size"]] += len(block["text"])
+        body_size = size_weights.most_common(1)[0][0] if size_weights else 0
+        
+        from docx import Document
+        
+        doc = Document()
+        for i, blocks in enumerate(pages):
+            for block in blocks:
+                level = _heading_level(block, body_size)
+                if level:
+                    doc.add_heading(block["text"], level=level)
+                else:
+                    doc.add_paragraph(block["text"])
+            
+            # Add page break after each page except the last one
+            if i < len(pages) - 1:
+                doc.add_page_break()
+        
+        # Save to BytesIO
+        output_buffer = BytesIO()
+        with span("save"):
+            doc.save(output_buffer)
+        output_buffer.seek(0)
+        return output_buffer
+
+    @staticmethod
+    def _convert_pdf_pages(pdf_path: str, docx_path: str, page_indexes: List[int], workers: int, chunk_size: int):
+        """Parse the given pages with pdf2docx, in parallel chunks when workers > 1, and write the DOCX"""
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        workers = max(1, min(workers, MAX_CONVERSION_WORKERS))
+        chunks = [page_indexes[i:i + chunk_size] for i in range(0, len(page_indexes), chunk_size)]
+        
+        converter = pdf2docx.Converter(pdf_path)
+        try:
+            settings = converter.default_settings
+            start_time = perf_counter()
+            
+            with span("parse", pages=len(page_indexes), chunks=len(chunks)):
+                if workers == 1 or len(chunks) == 1:
+                    converter.parse(pages=page_indexes, **settings)
+                    logger.info(f"Parsed {len(page_indexes)} pages in {perf_counter() - start_time:.2f}s")
+                else:
+                    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                        futures = [executor.submit(_parse_pdf_chunk, pdf_path, chunk, settings) for chunk in chunks]
+                        for done, (chunk, future) in enumerate(zip(chunks, futures), 1):
+                            parsed_pages, elapsed = future.result()
+                            converter.restore(parsed_pages)
+                            report_progress(done, len(chunks) + 1)
+                            logger.info(
+                                f"Parsed pages {chunk[0] + 1}-{chunk[-1] + 1} ({len(chunk)} pages) in {elapsed:.2f}s "
+                                f"({elapsed / len(chunk):.3f}s/page)"
+                            )
+                    logger.info(
+                        f"Parsed {len(page_indexes)} pages in {len(chunks)} chunks with {min(workers, len(chunks))} "
+                        f"workers in {perf_counter() - start_time:.2f}s"
+                    )
+            
+            with span("make_docx"):
+                converter.make_docx(docx_path, **settings)
+        finally:
+            converter.close()
+
+    @staticmethod
+    def word_to_pdf(docx_data: Union[str, bytes, BytesIO], renderer: str = "auto") -> BytesIO:
         """Convert Word document to PDF
         
+        Simple documents (see docx_renderer for the supported features) are
+        rendered in-process with PyMuPDF; anything else goes to Word on
+        Windows or LibreOffice elsewhere.
+        
         Args:
             docx_data: Word document data as file path, bytes, or BytesIO
+            renderer: 'auto' to pick per document, 'builtin' to always render
+                in-process (skipping unsupported features), or 'external'
             
         Returns:
             BytesIO object containing the PDF data
         """
+        if renderer not in ("auto", "builtin", "external"):
+            raise ValueError("Invalid renderer")
+            
         try:
-            # Create temporary files for conversion
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as docx_temp, \
-                 tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_temp:
+            if renderer != "external":
+                output_buffer, = DocumentOperations._render_builtin_guarded([docx_data], force=renderer == "builtin")
+                if output_buffer is not None:
+                    return output_buffer
+            
+            # Workspace for the input and output files, removed when done
+            with temp_workspace(expected_size=data_size(docx_data) * 3, operation="word_to_pdf") as work_dir:
+                docx_path = os.path.join(work_dir, "input.docx")
+                pdf_path = os.path.join(work_dir, "input.pdf")
                 
                 # Write Word data to temp file
                 if isinstance(docx_data, str):
-                    with open(docx_data, 'rb') as f:
-                        docx_temp.write(f.read())
+                    shutil.copyfile(docx_data, docx_path)
                 elif isinstance(docx_data, bytes):
-                    docx_temp.write(docx_data)
+                    with open(docx_path, 'wb') as f:
+                        f.write(docx_data)
                 elif isinstance(docx_data, BytesIO):
-                    docx_temp.write(docx_data.getvalue())
+                    with open(docx_path, 'wb') as f:
+                        f.write(docx_data.getbuffer())
                 else:
                     raise ValueError("Invalid Word document input type")
                 
-                docx_temp.flush()
-                
                 # Convert Word to PDF
-                if platform.system() == 'Windows':
-                    # Use Word's COM interface on Windows
-                    docx2pdf.convert(docx_temp.name, pdf_temp.name)
-                else:
-                    # On non-Windows platforms, use LibreOffice
-                    try:
-                        subprocess.run([
-                            'soffice',
-                            '--headless',
-                            '--convert-to',
-                            'pdf',
-                            '--outdir',
-                            os.path.dirname(pdf_temp.name),
-                            docx_temp.name
-                        ], check=True)
-                        
-                        # Rename the output file if necessary
-                        generated_pdf = os.path.splitext(docx_temp.name)[0] + '.pdf'
-                        if generated_pdf != pdf_temp.name:
-                            os.rename(generated_pdf, pdf_temp.name)
+                with span("convert", renderer="external"):
+                    if platform.system() == 'Windows':
+                        # Use Word's COM interface on Windows
+                        docx2pdf.convert(docx_path, pdf_path)
+                    else:
+                        # On non-Windows platforms, use LibreOffice
+                        try:
+                            pool = get_libreoffice_pool()
+                            if pool is not None:
+                                # Long-lived instance, no per-request startup cost
+                                pool.convert(docx_path, pdf_path)
+                            else:
+                                # soffice writes input.pdf next to the input
+                                convert_with_soffice(docx_path, work_dir)
                             
-                    except subprocess.CalledProcessError:
-                        raise RuntimeError(
-                            "LibreOffice conversion failed. Please install LibreOffice:\n"
-                            "- On macOS: brew install libreoffice\n"
-                            "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
-                        )
-                    except FileNotFoundError:
-                        raise RuntimeError(
-                            "LibreOffice not found. Please install LibreOffice:\n"
-                            "- On macOS: brew install libreoffice\n"
-                            "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
-                        )
+                        except subprocess.CalledProcessError:
+                            raise RuntimeError(
+                                "LibreOffice conversion failed. Please install LibreOffice:\n"
+                                "- On macOS: brew install libreoffice\n"
+                                "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
+                            )
+                        except subprocess.TimeoutExpired:
+                            raise RuntimeError("LibreOffice conversion timed out")
+                        except FileNotFoundError:
+                            raise RuntimeError(
+                                "LibreOffice not found. Please install LibreOffice:\n"
+                                "- On macOS: brew install libreoffice\n"
+                                "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
+                            )
                 
                 # Read the converted file into BytesIO
-                with open(pdf_temp.name, 'rb') as f:
+                with open(pdf_path, 'rb') as f:
                     output_buffer = BytesIO(f.read())
                 
                 logger.info("Successfully converted Word document to PDF")
                 return output_buffer
                 
+        except OperationAbortedError:
+            raise
         except Exception as e:
             logger.error(f"Error converting Word to PDF: {str(e)}")
-            raise ValueError(f"Failed to convert Word to PDF: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Failed to convert Word to PDF: {str(e)}") 
+
+    @staticmethod
+    def _render_builtin(docx_data: Union[str, bytes, BytesIO], force: bool = False) -> Optional[BytesIO]:
+        """Render a document in-process, or return None when it needs an external converter"""
+        try:
+            document = load_docx(docx_data)
+        except Exception as e:
+            if force:
+                raise
+            logger.warning(f"Could not parse Word document, using external converter: {str(e)}")
+            return None
+        
+        unsupported = [] if force else unsupported_docx_features(document)
+        if unsupported:
+            logger.info(f"Using external converter for: {', '.join(unsupported)}")
+            return None
+        
+        start_time = perf_counter()
+        with span("render", renderer="builtin"):
+            output_buffer = BytesIO(render_docx(document))
+        logger.info(f"Rendered Word document to PDF in-process in {perf_counter() - start_time:.3f}s")
+        return output_buffer
+
+    @staticmethod
+    def _render_builtin_all(docx_data_list: List[Union[str, bytes, BytesIO]],
+                            force: bool = False) -> List[Optional[BytesIO]]:
+        """Render documents in-process, with None for those that need an external converter"""
+        output_buffers = []
+        for i, docx_data in enumerate(docx_data_list):
+            output_buffers.append(DocumentOperations._render_builtin(docx_data, force=force))
+            report_progress(i + 1, len(docx_data_list) * 2)
+        return output_buffers
+
+    @staticmethod
+    def _render_builtin_guarded(docx_data_list: List[Union[str, bytes, BytesIO]],
+                                force: bool = False) -> List[Optional[BytesIO]]:
+        """Render documents in-process, in a killable worker unless already running in one
+        
+        With a LibreOffice pool, conversions are called without isolation since the
+        pool's watchdog bounds them; only the in-process renderer needs a worker then.
+        """
+        if in_worker() or get_libreoffice_pool() is None:
+            return DocumentOperations._render_builtin_all(docx_data_list, force=force)
+        return run_isolated(DocumentOperations._render_builtin_all, docx_data_list, force=force)
+
+    @staticmethod
+    def word_to_pdf_batch(docx_data_list: List[Union[str, bytes, BytesIO]], merge: bool = False,
+                          renderer: str = "auto") -> Union[List[BytesIO], BytesIO]:
+        """Convert many Word documents to PDF in a single converter session
+        
+        Simple documents are rendered in-process. The external converter (a
+        pooled LibreOffice instance, a single soffice invocation, or one
+        Word session on Windows) is started once for the remaining documents
+        instead of once per document.
+        
+        Args:
+            docx_data_list: List of Word documents as file paths, bytes, or BytesIO
+            merge: Merge the converted documents into a single PDF
+            renderer: 'auto', 'builtin' or 'external', as for word_to_pdf
+            
+        Returns:
+            List of BytesIO objects with one PDF per document in input order,
+            or a single BytesIO with the merged PDF when merge is True
+        """
+        if not docx_data_list:
+            raise ValueError("No Word documents provided")
+        if renderer not in ("auto", "builtin", "external"):
+            raise ValueError("Invalid renderer")
+            
+        try:
+            output_buffers = [None] * len(docx_data_list)
+            if renderer != "external":
+                output_buffers = DocumentOperations._render_builtin_guarded(docx_data_list,
+                                                                            force=renderer == "builtin")
+            pending = [i for i, output_buffer in enumerate(output_buffers) if output_buffer is None]
+            if pending:
+                external_buffers = DocumentOperations._convert_batch_external([docx_data_list[i] for i in pending])
+                for i, output_buffer in zip(pending, external_buffers):
+                    output_buffers[i] = output_buffer
+            
+            if merge:
+                output_buffer = MergeOperations.merge_pdfs(output_buffers)
+                logger.info(f"Converted and merged {len(output_buffers)} Word documents")
+                return output_buffer
+            
+            logger.info(f"Converted {len(output_buffers)} Word documents to PDF")
+            return output_buffers
+                
+        except OperationAbortedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error converting Word documents to PDF: {str(e)}")
+            raise ValueError(f"Failed to convert Word documents to PDF: {str(e)}")
+
+    @staticmethod
+    def _convert_batch_external(docx_data_list: List[Union[str, bytes, BytesIO]]) -> List[BytesIO]:
+        """Convert documents with one Word or LibreOffice session, returning PDFs in input order"""
+        total_size = sum(data_size(docx_data) for docx_data in docx_data_list)
+        with temp_workspace(expected_size=total_size * 3, operation="word_to_pdf_batch") as work_dir:
+            input_dir = os.path.join(work_dir, "input")
+            output_dir = os.path.join(work_dir, "output")
+            os.makedirs(input_dir)
+            os.makedirs(output_dir)
+            
+            # Write documents under generated names so uploads with the same name cannot collide
+            input_paths = []
+            for i, docx_data in enumerate(docx_data_list, 1):
+                input_path = os.path.join(input_dir, f"document_{i}.docx")
+                if isinstance(docx_data, str):
+                    shutil.copyfile(docx_data, input_path)
+                elif isinstance(docx_data, bytes):
+                    with open(input_path, 'wb') as f:
+                        f.write(docx_data)
+                elif isinstance(docx_data, BytesIO):
+                    with open(input_path, 'wb') as f:
+                        f.write(docx_data.getbuffer())
+                else:
+                    raise ValueError("Invalid Word document input type")
+                input_paths.append(input_path)
+            
+            output_paths = [
+                os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + '.pdf')
+                for path in input_paths
+            ]
+            
+            # Convert the whole batch in one session
+            if platform.system() == 'Windows':
+                # docx2pdf converts a folder with a single Word instance
+                docx2pdf.convert(input_dir, output_dir)
+            else:
+                try:
+                    pool = get_libreoffice_pool()
+                    if pool is not None:
+                        pool.convert_batch(list(zip(input_paths, output_paths)))
+                    else:
+                        convert_with_soffice(input_paths, output_dir)
+                except subprocess.CalledProcessError:
+                    raise RuntimeError(
+                        "LibreOffice conversion failed. Please install LibreOffice:\n"
+                        "- On macOS: brew install libreoffice\n"
+                        "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
+                    )
+                except subprocess.TimeoutExpired:
+                    raise RuntimeError("LibreOffice conversion timed out")
+                except FileNotFoundError:
+                    raise RuntimeError(
+                        "LibreOffice not found. Please install LibreOffice:\n"
+                        "- On macOS: brew install libreoffice\n"
+                        "- On Ubuntu/Debian: sudo apt-get install libreoffice\n"
+                    )
+            
+            missing = [i for i, path in enumerate(output_paths, 1) if not os.path.exists(path)]
+            if missing:
+                raise RuntimeError(f"Conversion produced no PDF for documents {missing}")
+            
+            output_buffers = []
+            for path in output_paths:
+                with open(path, 'rb') as f:
+                    output_buffers.append(BytesIO(f.read()))
+            return output_buffers
@@ -0,0 +1,200 @@
+from .config import *
+import re
+import json
+import time
+import tempfile
+import threading
+from typing import Optional, Tuple
+from .metrics import Gauge
+
+_HANDLE_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class DocumentStore:
+    """Deduplicating disk store for uploaded documents, addressed by content hash
+
+    A document's handle is the SHA-256 of its content and its blob is the
+    file named after the handle, so uploading the same content twice stores
+    it once. A small JSON file next to the blob keeps the original filename.
+    The blob's mtime records when it was last uploaded or used, and documents
+    unused for longer than the TTL are removed. Writes go through a temporary
+    file and an atomic rename, so concurrent server processes can share the
+    directory.
+    """
+
+    def __init__(self, directory: str = DOCUMENTS_DIR, ttl: float = DOCUMENT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.directory, handle)
+
+    def _meta_path(self, handle: str) -> str:
+        return os.path.join(self.directory, f"{handle}.json")
+
+    def is_stored_path(self, path: str) -> bool:
+        """Check whether a path is the blob of a stored document, whose name is its content hash"""
+        directory, name = os.path.split(os.path.abspath(path))
+        return directory == self.directory and _HANDLE_PATTERN.fullmatch(name) is not None
+
+    def _describe(self, handle: str, stats: os.stat_result) -> dict:
+        try:
+            with open(self._meta_path(handle)) as f:
+                filename = json.load(f).get("filename", "")
+        except (OSError, ValueError):
+            filename = ""
+        return {
+            "id": handle,
+            "filename": filename,
+            "size": stats.st_size,
+            "expires_at": stats.st_mtime + self.ttl
+        }
+
+    def put(self, data: Union[str, bytes, BytesIO], filename: str = "") -> Tuple[dict, bool]:
+        """Store a document unless the same content is already stored
+
+        Args:
+            data: Document as file path, bytes, or BytesIO. A path is hard-linked
+                into the store when possible, so spooled uploads are not copied.
+            filename: Original filename, kept for the first upload of the content
+
+        Returns:
+            Tuple of (document description, whether it was newly stored)
+        """
+        from .info_operations import InfoOperations
+
+        self.purge_expired(throttle=True)
+        handle = InfoOperations.content_hash(data)
+        path = self._path(handle)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                return self._describe(handle, os.stat(path)), False
+
+            fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+            try:
+                if isinstance(data, str):
+                    os.close(fd)
+                    os.remove(temp_path)
+                    try:
+                        os.link(data, temp_path)
+                    except OSError:
+                        # Different file system, or links are not supported
+                        shutil.copyfile(data, temp_path)
+                else:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(data.getbuffer() if isinstance(data, BytesIO) else data)
+                with open(self._meta_path(handle), 'w') as f:
+                    json.dump({"filename": filename}, f)
+                os.replace(temp_path, path)
+                os.utime(path)
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+
+        logger.info(f"Stored document {handle} ({format_size(os.path.getsize(path))})")
+        return self._describe(handle, os.stat(path)), True
+
+    def get(self, handle: str) -> Optional[dict]:
+        """Describe a stored document, or None if it is unknown or expired"""
+        if not _HANDLE_PATTERN.fullmatch(handle or ""):
+            return None
+        try:
+            stats = os.stat(self._path(handle))
+        except FileNotFoundError:
+            return None
+        if time.time() - stats.st_mtime > self.ttl:
+            return None
+        return self._describe(handle, stats)
+
+    def open_path(self, handle: str) -> Optional[str]:
+        """Get the blob path of a document for an operation, renewing its TTL, or None if it is unknown"""
+        if self.get(handle) is None:
+            return None
+        path = self._path(handle)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def delete(self, handle: str) -> bool:
+        """Remove a document; operations already reading it keep their open file"""
+        if not _HANDLE_PATTERN.fullmatch(handle or ""):
+            return False
+        with self._lock:
+            try:
+                os.remove(self._path(handle))
+            except FileNotFoundError:
+                return False
+            try:
+                os.remove(self._meta_path(handle))
+            except OSError:
+                pass
+        return True
+
+    def purge_expired(self, throttle: bool = False) -> int:
+        """Remove documents unused for longer than the TTL
+
+        Args:
+            throttle: Skip the scan if one ran within the last minute
+
+        Returns:
+            Number of documents removed
+        """
+        now = time.time()
+        if throttle and now - self._last_purge < 60:
+            return 0
+        self._last_purge = now
+
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.startswith(".tmp-"):
+                    # Left behind by an interrupted upload
+                    if now - entry.stat().st_mtime > self.ttl:
+                        os.remove(entry.path)
+                    continue
+                if _HANDLE_PATTERN.fullmatch(entry.name) and now - entry.stat().st_mtime > self.ttl:
+                    removed += self.delete(entry.name)
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Removed {removed} expired documents")
+        return removed
+
+    def stats(self) -> dict:
+        """Get the number and total size of stored documents"""
+        count = 0
+        size = 0
+        for entry in os.scandir(self.directory):
+            if _HANDLE_PATTERN.fullmatch(entry.name):
+                try:
+                    size += entry.stat().st_size
+                    count += 1
+                except OSError:
+                    continue
+        return {"documents": count, "bytes": size}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_document_store() -> DocumentStore:
+    """Get the process-wide document store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+        return _store
+
+
+DOCUMENT_STORE_BYTES = Gauge(
+    "pdfconv_document_store_bytes", "Size of the stored uploaded documents",
+    collect=lambda: {(): get_document_store().stats()["bytes"]})
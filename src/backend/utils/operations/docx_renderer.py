@@ -0,0 +1,349 @@
+"""In-process Word to PDF rendering for simple documents
+
+Documents are parsed with python-docx, translated to HTML and laid out with
+PyMuPDF's Story engine, so no external converter is started. Supported:
+
+    - Paragraphs with the Normal, Title, Subtitle and Heading 1-6 styles
+    - Paragraph alignment (left, center, right, justified)
+    - Bold, italic, underline, strikethrough, superscript, subscript,
+      font size and color on runs; hyperlinks (rendered as text)
+    - Bulleted and numbered lists
+    - Tables without merged or nested cells
+    - Inline PNG, JPEG, GIF, BMP and TIFF images
+    - Line breaks, tabs and page breaks
+    - Page size and margins of a single section
+
+Anything else (headers and footers, footnotes, fields, text boxes, floating
+images and shapes, charts, equations, tracked changes, comments, content
+controls, multiple sections or columns, and other image formats) is listed by
+unsupported_docx_features(), and such documents are converted externally.
+"""
+from .config import *
+import html
+from typing import List, Optional
+
+NAMESPACES = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "wp": "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "m": "http://schemas.openxmlformats.org/officeDocument/2006/math",
+    "c": "http://schemas.openxmlformats.org/drawingml/2006/chart",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+}
+
+# Body elements the renderer cannot reproduce, with the feature they belong to
+UNSUPPORTED_ELEMENTS = {
+    "w:txbxContent": "text boxes",
+    "wp:anchor": "floating images or shapes",
+    "w:pict": "legacy drawings",
+    "mc:AlternateContent": "shapes",
+    "c:chart": "charts",
+    "m:oMath": "equations",
+    "w:object": "embedded objects",
+    "w:fldSimple": "fields",
+    "w:instrText": "fields",
+    "w:footnoteReference": "footnotes",
+    "w:endnoteReference": "endnotes",
+    "w:commentReference": "comments",
+    "w:ins": "tracked changes",
+    "w:del": "tracked changes",
+    "w:sdt": "content controls",
+    "w:gridSpan": "merged table cells",
+    "w:vMerge": "merged table cells",
+}
+
+SUPPORTED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/bmp", "image/tiff"}
+
+ALIGNMENTS = {1: "center", 2: "right", 3: "justify"}
+
+EMU_PER_POINT = 12700
+
+BASE_CSS = """
+body { font-family: sans-serif; font-size: %(font_size)spt; }
+p, li { margin: 0 0 %(spacing)spt 0; }
+h1, h2, h3, h4, h5, h6 { margin: %(spacing)spt 0 %(spacing)spt 0; }
+table { border-collapse: collapse; margin: 0 0 %(spacing)spt 0; }
+td { border: 0.5pt solid black; padding: 2pt 4pt; vertical-align: top; }
+td p { margin: 0; }
+"""
+
+
+def _qn(tag: str) -> str:
+    prefix, name = tag.split(":")
+    return f"{{{NAMESPACES[prefix]}}}{name}"
+
+
+def load_docx(docx_data: Union[str, bytes, BytesIO]):
+    """Parse a Word document with python-docx"""
+    from docx import Document
+
+    if isinstance(docx_data, str):
+        return Document(docx_data)
+    if isinstance(docx_data, bytes):
+        return Document(BytesIO(docx_data))
+    if isinstance(docx_data, BytesIO):
+        return Document(BytesIO(docx_data.getvalue()))
+    raise ValueError("Invalid Word document input type")
+
+
+def unsupported_docx_features(document) -> List[str]:
+    """List the features of a document that the built-in renderer cannot reproduce
+
+    Returns:
+        Sorted feature names; empty when the document can be rendered in-process
+    """
+    features = set()
+    body = document.element.body
+
+    for tag, feature in UNSUPPORTED_ELEMENTS.items():
+        if next(body.iter(_qn(tag)), None) is not None:
+            features.add(feature)
+
+    for table in body.iter(_qn("w:tbl")):
+        if next(table.iterancestors(_qn("w:tbl")), None) is not None:
+            features.add("nested tables")
+            break
+
+    for blip in body.iter(_qn("a:blip")):
+        part = document.part.related_parts.get(blip.get(_qn("r:embed")))
+        if part is None or part.content_type not in SUPPORTED_IMAGE_TYPES:
+            features.add("unsupported image formats")
+
+    sections = document.sections
+    if len(sections) > 1:
+        features.add("multiple sections")
+    for section in sections:
+        for part in (section.header, section.footer, section.first_page_header, section.first_page_footer):
+            if not part.is_linked_to_previous and (
+                    any(p.text.strip() for p in part.paragraphs) or part.tables):
+                features.add("headers and footers")
+        cols = section._sectPr.find(_qn("w:cols"))
+        if cols is not None and int(cols.get(_qn("w:num"), "1")) > 1:
+            features.add("multiple columns")
+
+    return sorted(features)
+
+
+class _HtmlBuilder:
+    """Translate python-docx paragraphs and tables to Story HTML"""
+
+    def __init__(self, document, archive):
+        self.document = document
+        self.archive = archive
+        self.parts = []
+        self.open_list = None
+        self.page_break = False
+        self.image_count = 0
+        try:
+            self.numbering = document.part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            # Document without list definitions
+            self.numbering = None
+
+    def _list_kind(self, paragraph) -> Optional[str]:
+        """Get 'ul' or 'ol' for list paragraphs, None otherwise"""
+        style_name = paragraph.style.name if paragraph.style is not None else ""
+        if style_name.startswith("List Bullet"):
+            return "ul"
+        if style_name.startswith("List Number"):
+            return "ol"
+
+        num_pr = paragraph._p.find(f"{_qn('w:pPr')}/{_qn('w:numPr')}")
+        if num_pr is None or self.numbering is None:
+            return None
+        num_id = num_pr.find(_qn("w:numId"))
+        level = num_pr.find(_qn("w:ilvl"))
+        if num_id is None or num_id.get(_qn("w:val")) == "0":
+            return None
+        level = level.get(_qn("w:val")) if level is not None else "0"
+        num_formats = self.numbering.xpath(
+            f'w:abstractNum[@w:abstractNumId=//w:num[@w:numId="{num_id.get(_qn("w:val"))}"]'
+            f'/w:abstractNumId/@w:val]/w:lvl[@w:ilvl="{level}"]/w:numFmt/@w:val'
+        )
+        return "ul" if num_formats and num_formats[0] == "bullet" else "ol"
+
+    def _close_list(self):
+        if self.open_list:
+            self.parts.append(f"</{self.open_list}>")
+            self.open_list = None
+
+    def _image(self, drawing) -> str:
+        blip = next(drawing.iter(_qn("a:blip")), None)
+        extent = next(drawing.iter(_qn("wp:extent")), None)
+        if blip is None:
+            return ""
+        part = self.document.part.related_parts[blip.get(_qn("r:embed"))]
+        self.image_count += 1
+        name = f"image{self.image_count}{os.path.splitext(part.partname)[1]}"
+        self.archive.add(part.blob, name)
+        style = ""
+        if extent is not None:
+            width = int(extent.get("cx")) / EMU_PER_POINT
+            height = int(extent.get("cy")) / EMU_PER_POINT
+            style = f' style="width:{width:.1f}pt;height:{height:.1f}pt"'
+        return f'<img src="{name}"{style}/>'
+
+    def _run(self, run) -> str:
+        """Render a run, splitting the paragraph at page breaks"""
+        pieces = []
+        for child in run._r:
+            if child.tag == _qn("w:t"):
+                pieces.append(html.escape(child.text or ""))
+            elif child.tag == _qn("w:tab"):
+                pieces.append("&#160;&#160;&#160;&#160;")
+            elif child.tag == _qn("w:br"):
+                if child.get(_qn("w:type")) == "page":
+                    pieces.append("\x00")
+                else:
+                    pieces.append("<br/>")
+            elif child.tag == _qn("w:drawing"):
+                pieces.append(self._image(child))
+        text = "".join(pieces)
+        if not text.strip("\x00"):
+            return text
+
+        font = run.font
+        styles = []
+        if font.size is not None:
+            styles.append(f"font-size:{font.size.pt:g}pt")
+        if font.color is not None and font.color.type is not None and font.color.rgb is not None:
+            styles.append(f"color:#{font.color.rgb}")
+        if styles:
+            text = f'<span style="{";".join(styles)}">{text}</span>'
+        if font.superscript:
+            text = f"<sup>{text}</sup>"
+        if font.subscript:
+            text = f"<sub>{text}</sub>"
+        if font.strike:
+            text = f"<s>{text}</s>"
+        if font.underline:
+            text = f"<u>{text}</u>"
+        if font.italic:
+            text = f"<i>{text}</i>"
+        if font.bold:
+            text = f"<b>{text}</b>"
+        return text
+
+    def _paragraph_content(self, paragraph) -> str:
+        from docx.text.run import Run
+
+        # Hyperlinks wrap their runs, so walk the runs in document order
+        return "".join(self._run(Run(r, paragraph)) for r in paragraph._p.iter(_qn("w:r")))
+
+    def _tag(self, paragraph) -> str:
+        style_name = paragraph.style.name if paragraph.style is not None else ""
+        if style_name == "Title":
+            return "h1"
+        if style_name == "Subtitle":
+            return "h2"
+        if style_name.startswith("Heading "):
+            level = style_name[len("Heading "):]
+            if level.isdigit():
+                return f"h{min(int(level), 6)}"
+        return "p"
+
+    def paragraph(self, paragraph, in_table: bool = False):
+        content = self._paragraph_content(paragraph)
+        alignment = paragraph.paragraph_format.alignment
+        if alignment is None and paragraph.style is not None:
+            alignment = paragraph.style.paragraph_format.alignment
+        align = ALIGNMENTS.get(int(alignment)) if alignment is not None else None
+
+        list_kind = None if in_table else self._list_kind(paragraph)
+        tag = "li" if list_kind else self._tag(paragraph)
+        if list_kind != self.open_list:
+            self._close_list()
+            if list_kind:
+                self.parts.append(f"<{list_kind}>")
+                self.open_list = list_kind
+
+        # Each page break starts a new block on the next page
+        for i, segment in enumerate(content.split("\x00")):
+            if i > 0:
+                self.page_break = True
+                if not segment.strip():
+                    continue
+            styles = []
+            if align:
+                styles.append(f"text-align:{align}")
+            if self.page_break and not in_table:
+                styles.append("page-break-before:always")
+                self.page_break = False
+            style = f' style="{";".join(styles)}"' if styles else ""
+            self.parts.append(f"<{tag}{style}>{segment or '&#160;'}</{tag}>")
+
+    def table(self, table):
+        self._close_list()
+        style = ' style="page-break-before:always"' if self.page_break else ""
+        self.page_break = False
+        self.parts.append(f"<table{style}>")
+        for row in table.rows:
+            self.parts.append("<tr>")
+            for cell in row.cells:
+                self.parts.append("<td>")
+                for paragraph in cell.paragraphs:
+                    self.paragraph(paragraph, in_table=True)
+                self.parts.append("</td>")
+            self.parts.append("</tr>")
+        self.parts.append("</table>")
+
+    def build(self) -> str:
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+
+        for child in self.document.element.body.iterchildren():
+            if child.tag == _qn("w:p"):
+                self.paragraph(Paragraph(child, self.document))
+            elif child.tag == _qn("w:tbl"):
+                self.table(Table(child, self.document))
+        self._close_list()
+        return "".join(self.parts)
+
+
+def _font_family(name: Optional[str]) -> str:
+    """Map a Word font name to one of the built-in font families"""
+    name = (name or "").lower()
+    if any(key in name for key in ("courier", "consolas", "mono")):
+        return "monospace"
+    if any(key in name for key in ("times", "georgia", "cambria", "garamond", "serif")) and "sans" not in name:
+        return "serif"
+    return "sans-serif"
+
+
+def render_docx(document) -> bytes:
+    """Render a parsed Word document to PDF in-process
+
+    Features outside the supported subset are skipped; check
+    unsupported_docx_features() first to route such documents elsewhere.
+
+    Returns:
+        PDF data
+    """
+    section = document.sections[0]
+    page_rect = fitz.paper_rect("letter")
+    if section.page_width is not None and section.page_height is not None:
+        page_rect = fitz.Rect(0, 0, section.page_width.pt, section.page_height.pt)
+    margins = [getattr(section, f"{side}_margin") for side in ("left", "top", "right", "bottom")]
+    left, top, right, bottom = [margin.pt if margin is not None else 72 for margin in margins]
+    content_rect = fitz.Rect(left, top, page_rect.width - right, page_rect.height - bottom)
+
+    normal_font = document.styles["Normal"].font
+    font_size = normal_font.size.pt if normal_font.size is not None else 11
+    css = BASE_CSS % {"font_size": f"{font_size:g}", "spacing": f"{font_size * 0.6:.1f}"}
+    css = css.replace("sans-serif", _font_family(normal_font.name))
+
+    archive = fitz.Archive()
+    body_html = _HtmlBuilder(document, archive).build()
+    story = fitz.Story(body_html, user_css=css, archive=archive)
+
+    output_buffer = BytesIO()
+    writer = fitz.DocumentWriter(output_buffer)
+    more = True
+    while more:
+        device = writer.begin_page(page_rect)
+        more, _ = story.place(content_rect)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return output_buffer.getvalue()
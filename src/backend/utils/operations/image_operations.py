@@ -1,4 +1,7 @@
 from .config import *
+from .isolation import report_progress
+from .tracing import span
+from typing import Iterator
 
 class ImageOperations:
     @staticmethod
@@ -12,56 +15,71 @@ class ImageOperations:
         Returns:
             List of BytesIO objects containing the generated images
         """
+        return list(ImageOperations.iter_pdf_to_images(pdf_data, dpi))
+
+    @staticmethod
+    def iter_pdf_to_images(pdf_data: Union[str, bytes, BytesIO], dpi: int = 200) -> Iterator[BytesIO]:
+        """Convert PDF pages to images lazily, yielding each page's PNG as soon as it is rendered
+        
+        Takes the same arguments as pdf_to_images. Only one page image is
+        held in memory at a time, so callers can stream pages out as they arrive.
+        
+        Returns:
+            Iterator of BytesIO objects containing the generated images
+        """
         try:
             # Calculate zoom factor
             zoom = dpi / 72  # standard PDF resolution is 72 DPI
             magnify = fitz.Matrix(zoom, zoom)
             
             # Open PDF from various input types
-            if isinstance(pdf_data, str):
-                doc = fitz.open(pdf_data)
-            elif isinstance(pdf_data, bytes):
-                doc = fitz.open(stream=pdf_data)
-            elif isinstance(pdf_data, BytesIO):
-                doc = fitz.open(stream=pdf_data.getvalue())
-            else:
-                raise ValueError("Invalid PDF input type")
-            
-            output_buffers = []
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                pix = page.get_pixmap(matrix=magnify)
-                
-                # Convert to PIL Image for optimization
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Optimize size if needed
-                if img.width > 2000 or img.height > 2000:
-                    ratio = min(2000/img.width, 2000/img.height)
-                    new_size = (int(img.width * ratio), int(img.height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Save to BytesIO buffer
-                img_buffer = BytesIO()
-                img.save(
-                    img_buffer,
-                    "PNG",
-                    optimize=True,
-                    quality=85,
-                    dpi=(dpi, dpi)
-                )
-                img_buffer.seek(0)
-                output_buffers.append(img_buffer)
-                
-                logger.info(f"Converted page {page_num + 1} to image")
-            
-            doc.close()
-            return output_buffers
-            
+            with span("open"):
+                if isinstance(pdf_data, str):
+                    doc = fitz.open(pdf_data)
+                elif isinstance(pdf_data, bytes):
+                    doc = fitz.open(stream=pdf_data)
+                elif isinstance(pdf_data, BytesIO):
+                    doc = fitz.open(stream=pdf_data.getvalue())
+                else:
+                    raise ValueError("Invalid PDF input type")
         except Exception as e:
             logger.error(f"Error converting PDF to images: {str(e)}")
             raise ValueError(f"Failed to convert PDF to images: {str(e)}")
+        
+        with doc:
+            for page_num in range(len(doc)):
+                try:
+                    with span("render", page=page_num + 1):
+                        page = doc[page_num]
+                        pix = page.get_pixmap(matrix=magnify)
+                        
+                        # Convert to PIL Image for optimization
+                        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                        
+                        # Optimize size if needed
+                        if img.width > 2000 or img.height > 2000:
+                            ratio = min(2000/img.width, 2000/img.height)
+                            new_size = (int(img.width * ratio), int(img.height * ratio))
+                            img = img.resize(new_size, Image.Resampling.LANCZOS)
+                    
+                    # Save to BytesIO buffer
+                    with span("encode", page=page_num + 1):
+                        img_buffer = BytesIO()
+                        img.save(
+                            img_buffer,
+                            "PNG",
+                            optimize=True,
+                            quality=85,
+                            dpi=(dpi, dpi)
+                        )
+                        img_buffer.seek(0)
+                except Exception as e:
+                    logger.error(f"Error converting PDF to images: {str(e)}")
+                    raise ValueError(f"Failed to convert PDF to images: {str(e)}")
+                
+                logger.info(f"Converted page {page_num + 1} to image")
+                report_progress(page_num + 1, len(doc))
+                yield img_buffer
 
     @staticmethod
     def images_to_pdf(image_data: List[Union[str, bytes, BytesIO]]) -> BytesIO:
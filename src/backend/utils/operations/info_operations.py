@@ -0,0 +1,146 @@
+from .config import *
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Union
+from io import BytesIO
+from .tracing import span
+
+# Number of documents whose metadata is kept in memory
+INFO_CACHE_SIZE = 256
+
+_info_cache = OrderedDict()
+_info_cache_lock = threading.Lock()
+
+class InfoOperations:
+    @staticmethod
+    def content_hash(pdf_data: Union[str, bytes, BytesIO]) -> str:
+        """Get the SHA-256 hex digest of a document's content
+
+        Args:
+            pdf_data: Document data as file path, bytes, or BytesIO
+
+        Returns:
+            Hex digest string
+        """
+        if isinstance(pdf_data, str):
+            from .document_store import get_document_store
+            if get_document_store().is_stored_path(pdf_data):
+                # Stored documents are named after their content hash
+                return os.path.basename(pdf_data)
+
+        digest = hashlib.sha256()
+        if isinstance(pdf_data, str):
+            with open(pdf_data, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        elif isinstance(pdf_data, bytes):
+            digest.update(pdf_data)
+        elif isinstance(pdf_data, BytesIO):
+            digest.update(pdf_data.getbuffer())
+        else:
+            raise ValueError("Invalid PDF input type")
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_pdf_info(pdf_data: Union[str, bytes, BytesIO], include_images: bool = False) -> dict:
+        """Get document metadata without parsing page content
+
+        Only the trailer, cross-reference table and page tree are read; page
+        content streams are never decoded. Results are cached by content
+        hash, so repeated lookups of the same file skip parsing entirely.
+
+        Args:
+            pdf_data: PDF data as file path, bytes, or BytesIO
+            include_images: Count the distinct images, which reads every
+                page's resources; image_count is None otherwise
+
+        Returns:
+            Dictionary with total_pages, encrypted, producer, creator, title,
+            pdf_version, file_size, image_count and page_sizes (width, height
+            in points and rotation for every page)
+        """
+        try:
+            key = InfoOperations.content_hash(pdf_data)
+            with _info_cache_lock:
+                cached = _info_cache.get(key)
+                # Entries read without the image scan cannot answer a request for it
+                if cached is not None and (not include_images or "image_count" in cached):
+                    _info_cache.move_to_end(key)
+                    return {"image_count": None, **cached}
+
+            info = InfoOperations._read_pdf_info(pdf_data, include_images)
+            info['content_hash'] = key
+
+            with _info_cache_lock:
+                cached = _info_cache.get(key)
+                if cached is None or "image_count" not in cached or "image_count" in info:
+                    _info_cache[key] = info
+                _info_cache.move_to_end(key)
+                while len(_info_cache) > INFO_CACHE_SIZE:
+                    _info_cache.popitem(last=False)
+
+            return {"image_count": None, **info}
+
+        except Exception as e:
+            logger.error(f"Error reading PDF info: {str(e)}")
+            raise ValueError(f"Failed to read PDF info: {str(e)}")
+
+    @staticmethod
+    def _read_pdf_info(pdf_data: Union[str, bytes, BytesIO], include_images: bool = False) -> dict:
+        """Read metadata from the document structure (uncached)
+
+        image_count is only set when include_images is true.
+        """
+        with span("open"):
+            if isinstance(pdf_data, str):
+                doc = fitz.open(pdf_data)
+                file_size = os.path.getsize(pdf_data)
+            elif isinstance(pdf_data, bytes):
+                doc = fitz.open(stream=pdf_data, filetype="pdf")
+                file_size = len(pdf_data)
+            elif isinstance(pdf_data, BytesIO):
+                doc = fitz.open(stream=pdf_data.getvalue(), filetype="pdf")
+                file_size = get_buffer_size(pdf_data)
+            else:
+                raise ValueError("Invalid PDF input type")
+
+        try:
+            metadata = doc.metadata or {}
+            info = {
+                "total_pages": doc.page_count,
+                "encrypted": bool(doc.is_encrypted or doc.needs_pass),
+                "producer": metadata.get("producer", ""),
+                "creator": metadata.get("creator", ""),
+                "title": metadata.get("title", ""),
+                "pdf_version": metadata.get("format", ""),
+                "file_size": file_size,
+            }
+
+            # Page dictionaries are unavailable until a password is supplied
+            if doc.needs_pass:
+                if include_images:
+                    info["image_count"] = None
+                info["page_sizes"] = []
+                return info
+
+            image_xrefs = set()
+            page_sizes = []
+            for page_num in range(doc.page_count):
+                # load_page only parses the page dictionary and its inherited attributes
+                page = doc.load_page(page_num)
+                rect = page.rect
+                page_sizes.append({
+                    "width": round(rect.width, 2),
+                    "height": round(rect.height, 2),
+                    "rotation": page.rotation
+                })
+                if include_images:
+                    image_xrefs.update(image[0] for image in doc.get_page_images(page_num))
+
+            if include_images:
+                info["image_count"] = len(image_xrefs)
+            info["page_sizes"] = page_sizes
+            return info
+        finally:
+            doc.close()
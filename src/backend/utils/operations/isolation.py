@@ -0,0 +1,374 @@
+from .config import *
+import time
+import signal
+import threading
+import multiprocessing
+from contextlib import closing
+from multiprocessing.connection import wait
+from typing import Callable, Iterator, Optional
+from .tracing import Trace, Sampler, current_trace, set_trace, span
+from .metrics import count_pages
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where only the wall-clock limit applies
+    resource = None
+
+# Worker processes are started from a forkserver that has the operation modules
+# and conversion libraries preloaded, so each operation starts quickly without
+# forking the threaded server.
+_context = None
+_context_lock = threading.Lock()
+
+_tasks = {}
+_tasks_lock = threading.Lock()
+
+# Set in worker processes: pipe to the parent and the last progress value sent
+_progress_conn = None
+_last_progress = 0.0
+
+
+class OperationAbortedError(RuntimeError):
+    """An operation was stopped before it finished"""
+
+    status_code = 500
+    code = "aborted"
+
+    def __init__(self, message: str, operation: str):
+        super().__init__(message)
+        self.operation = operation
+
+    def __reduce__(self):
+        return (type(self), (str(self), self.operation))
+
+    def to_dict(self) -> dict:
+        return {"error": str(self), "code": self.code, "operation": self.operation}
+
+
+class OperationTimeoutError(OperationAbortedError):
+    """An operation exceeded its wall-clock limit and its worker was killed"""
+
+    status_code = 504
+    code = "timeout"
+
+    def __init__(self, operation: str, timeout: float):
+        super().__init__(f"{operation} did not finish within {timeout} seconds", operation)
+        self.timeout = timeout
+
+    def __reduce__(self):
+        return (type(self), (self.operation, self.timeout))
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), "timeout": self.timeout}
+
+
+class OperationCancelledError(OperationAbortedError):
+    """An operation was cancelled by the client"""
+
+    status_code = 409
+    code = "cancelled"
+
+    def __init__(self, operation: str):
+        super().__init__(f"{operation} was cancelled", operation)
+
+    def __reduce__(self):
+        return (type(self), (self.operation,))
+
+
+class OperationMemoryError(OperationAbortedError):
+    """An operation exceeded its worker's memory limit"""
+
+    status_code = 507
+    code = "memory_limit"
+
+    def __init__(self, operation: str, memory_limit: int):
+        super().__init__(f"{operation} exceeded the memory limit of {format_size(memory_limit)}", operation)
+        self.memory_limit = memory_limit
+
+    def __reduce__(self):
+        return (type(self), (self.operation, self.memory_limit))
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), "memory_limit": self.memory_limit}
+
+
+class _Task:
+    def __init__(self, process):
+        self.process = process
+        self.cancelled = False
+
+
+def _get_context(preload_module: str):
+    global _context
+    with _context_lock:
+        if _context is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                _context = multiprocessing.get_context("forkserver")
+                _context.set_forkserver_preload([preload_module] + OPERATION_PRELOAD_MODULES)
+            else:
+                _context = multiprocessing.get_context("spawn")
+        return _context
+
+
+def _caused_by_memory_error(error: BaseException) -> bool:
+    """Check whether an exception was raised while handling a MemoryError"""
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def in_worker() -> bool:
+    """Check whether the caller runs in an isolated worker process"""
+    return _progress_conn is not None
+
+
+def report_progress(done: int, total: int):
+    """Report an operation's progress to the process that started it
+    
+    Operations call this as they work through pages or documents. It does
+    nothing outside an isolated worker, and updates smaller than 1% are
+    dropped to keep the pipe quiet.
+    """
+    global _last_progress
+    if _progress_conn is None or total <= 0:
+        return
+    progress = min(done / total, 1.0)
+    if progress - _last_progress >= 0.01 or progress == 1.0:
+        _last_progress = progress
+        try:
+            _progress_conn.send(("progress", progress))
+        except Exception:
+            pass
+
+
+def _run_worker(conn, func: Callable, args: tuple, kwargs: dict, memory_limit: int, stream: bool = False,
+                trace: Optional[Trace] = None):
+    """Entry point of the worker process
+
+    With stream=True, func returns an iterator whose items are sent to the
+    parent one by one as they are produced. With a trace, the operation's
+    spans and stack samples are recorded into the parent request's trace.
+    The pages processed (see count_pages) are sent before the result, so the
+    server never opens the documents itself for its metrics.
+    """
+    global _progress_conn
+    _progress_conn = conn
+    # Own process group, so helpers such as soffice die with the worker
+    if hasattr(os, "setsid"):
+        os.setsid()
+    if resource is not None and memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    sampler = None
+    if trace is not None:
+        set_trace(trace)
+        sampler = Sampler(threading.get_ident()).start()
+
+    try:
+        with span(func.__name__):
+            if stream:
+                input_pages = count_pages(args[:1])
+                output_pages = 0
+                for item in func(*args, **kwargs):
+                    conn.send(("item", item))
+                    if not input_pages:
+                        output_pages += count_pages(None, item)
+                pages = input_pages or output_pages
+                result = ("ok", None)
+            else:
+                result = ("ok", func(*args, **kwargs))
+                pages = count_pages(args[:1], result[1])
+        conn.send(("pages", pages))
+    except BaseException as e:
+        if _caused_by_memory_error(e):
+            e = OperationMemoryError(func.__name__, memory_limit)
+        result = ("error", e)
+
+    if sampler is not None:
+        trace.add_stacks(sampler.stop(), prefix=f"worker {func.__name__}")
+
+    try:
+        conn.send(result)
+    except Exception as e:
+        # Unpicklable result or exception
+        conn.send(("error", RuntimeError(f"{func.__name__} failed: {str(e)}")))
+    finally:
+        conn.close()
+
+
+def _kill(process):
+    """Kill a worker and everything it started"""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            # The worker has not created its process group yet
+            pass
+    process.kill()
+
+
+def _isolated_messages(func: Callable, args: tuple, kwargs: dict, timeout: Optional[float],
+                       memory_limit: Optional[int], task_id: Optional[str],
+                       on_progress: Optional[Callable[[float], None]], on_pages: Optional[Callable[[int], None]],
+                       stream: bool) -> Iterator[tuple]:
+    """Run func in a worker and yield its ("item", value) messages, ending with ("ok", result)"""
+    operation = func.__name__
+    if timeout is None:
+        timeout = OPERATION_TIMEOUTS.get(operation, OPERATION_TIMEOUT)
+    if memory_limit is None:
+        memory_limit = OPERATION_MEMORY_LIMIT
+
+    context = _get_context(func.__module__)
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    # Not a daemon, so operations can still use process pools of their own
+    process = context.Process(
+        target=_run_worker,
+        args=(child_conn, func, args, kwargs, memory_limit, stream, current_trace()),
+        name=f"operation-{operation}"
+    )
+    task = _Task(process)
+
+    if task_id is not None:
+        with _tasks_lock:
+            if task_id in _tasks:
+                raise ValueError(f"Task ID already in use: {task_id}")
+            _tasks[task_id] = task
+
+    try:
+        process.start()
+        child_conn.close()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            ready = wait([parent_conn, process.sentinel], max(0, deadline - time.monotonic()))
+            if parent_conn not in ready:
+                break
+            try:
+                status, value = parent_conn.recv()
+            except EOFError:
+                ready = [process.sentinel]
+                break
+            if status == "progress":
+                if on_progress is not None:
+                    on_progress(value)
+                continue
+            if status == "pages":
+                if on_pages is not None:
+                    on_pages(value)
+                continue
+            if status == "item":
+                # The timeout covers the operation, not a slow consumer of its items
+                yielded = time.monotonic()
+                yield status, value
+                deadline += time.monotonic() - yielded
+                continue
+            process.join()
+            if status == "ok":
+                yield status, value
+                return
+            raise value
+
+        if task.cancelled:
+            process.join()
+            logger.info(f"Cancelled {operation} (task {task_id})")
+            raise OperationCancelledError(operation)
+        if not ready:
+            logger.error(f"{operation} exceeded {timeout}s, killing worker {process.pid}")
+            _kill(process)
+            process.join()
+            raise OperationTimeoutError(operation, timeout)
+
+        process.join()
+        raise RuntimeError(f"{operation} worker exited unexpectedly (exit code {process.exitcode})")
+
+    finally:
+        parent_conn.close()
+        if process.is_alive():
+            _kill(process)
+            process.join()
+        if task_id is not None:
+            with _tasks_lock:
+                _tasks.pop(task_id, None)
+
+
+def run_isolated(func: Callable, *args, timeout: Optional[float] = None, memory_limit: Optional[int] = None,
+                 task_id: Optional[str] = None, on_progress: Optional[Callable[[float], None]] = None,
+                 on_pages: Optional[Callable[[int], None]] = None, **kwargs):
+    """Run an operation in a killable worker process
+
+    The worker is killed, together with any processes it started, when the
+    wall-clock limit is reached or the task is cancelled. Exceptions raised
+    by the operation are re-raised unchanged in the caller.
+
+    Args:
+        func: Module-level function or static method to call
+        timeout: Wall-clock limit in seconds (default: OPERATION_TIMEOUTS or OPERATION_TIMEOUT)
+        memory_limit: Address space limit in bytes (default: OPERATION_MEMORY_LIMIT)
+        task_id: Optional identifier that cancel_operation() can be called with
+        on_progress: Called with a fraction between 0 and 1 whenever the
+            operation reports progress
+        on_pages: Called with the number of pages processed, counted in the
+            worker once the operation has finished (see count_pages)
+
+    Returns:
+        The operation's return value
+
+    Raises:
+        OperationTimeoutError: The operation exceeded its time limit
+        OperationCancelledError: The operation was cancelled
+        OperationMemoryError: The operation exceeded its memory limit
+    """
+    with closing(_isolated_messages(func, args, kwargs, timeout, memory_limit, task_id, on_progress, on_pages,
+                                    False)) as messages:
+        for _, result in messages:
+            return result
+
+
+def iter_isolated(func: Callable, *args, timeout: Optional[float] = None, memory_limit: Optional[int] = None,
+                  task_id: Optional[str] = None, on_progress: Optional[Callable[[float], None]] = None,
+                  on_pages: Optional[Callable[[int], None]] = None, **kwargs) -> Iterator:
+    """Run a generator operation in a killable worker process, yielding its items
+
+    Items are sent from the worker as soon as they are produced, so only a
+    few of them are in memory at a time. The limits of run_isolated() apply
+    to the whole iteration, except that time the caller spends consuming an
+    item does not count towards the timeout. Closing the iterator early kills
+    the worker.
+
+    Args:
+        func: Module-level function or static method returning an iterator
+        timeout: Wall-clock limit in seconds (default: OPERATION_TIMEOUTS or OPERATION_TIMEOUT)
+        memory_limit: Address space limit in bytes (default: OPERATION_MEMORY_LIMIT)
+        task_id: Optional identifier that cancel_operation() can be called with
+        on_progress: Called with a fraction between 0 and 1 whenever the
+            operation reports progress
+        on_pages: Called with the number of pages processed, counted in the
+            worker once the operation has finished (see count_pages)
+
+    Returns:
+        Iterator over the operation's items
+    """
+    with closing(_isolated_messages(func, args, kwargs, timeout, memory_limit, task_id, on_progress, on_pages,
+                                    True)) as messages:
+        for status, value in messages:
+            if status == "item":
+                yield value
+
+
+def cancel_operation(task_id: str) -> bool:
+    """Kill the worker running the operation started with task_id
+
+    Returns:
+        True if a running operation was cancelled
+    """
+    with _tasks_lock:
+        task = _tasks.get(task_id)
+        if task is None or not task.process.is_alive():
+            return False
+        task.cancelled = True
+    _kill(task.process)
+    return True
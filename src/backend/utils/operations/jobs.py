@@ -0,0 +1,397 @@
+from .config import *
+import json
+import time
+import uuid
+import itertools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from .isolation import run_isolated, iter_isolated, cancel_operation, OperationAbortedError, OperationCancelledError
+from .admission import get_admission_controller
+from .metrics import Gauge, track_operation, count_pages
+
+# Job states; queued and running jobs are active, the others are final
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    operation TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    spec TEXT NOT NULL,
+    result_path TEXT,
+    error TEXT,
+    error_code TEXT,
+    owner_pid INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class JobNotCancellableError(Exception):
+    """An active job cannot be stopped from this server process"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} is running and cannot be cancelled")
+        self.job_id = job_id
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobManager:
+    """Queue of long-running operations whose state survives server restarts
+
+    Inputs and results are kept as files under the jobs directory and job
+    state in a SQLite database next to them. Each job runs in a killable
+    worker process (see run_isolated), at most `workers` at a time. When the
+    server starts, queued jobs are picked up again and jobs that were
+    running in a server that has since stopped are marked as failed.
+    Finished jobs are removed once they are older than the retention period.
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR, workers: int = JOB_WORKERS, retention: float = JOB_RETENTION):
+        self.jobs_dir = jobs_dir
+        self.retention = retention
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._db_path = os.path.join(jobs_dir, "jobs.db")
+        self._last_purge = 0.0
+        self._cancel_events = {}  # job ID -> event set when a job waiting for capacity is cancelled
+        self._cancel_events_lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(jobs)")}
+            if "cancel_requested" not in columns:
+                # Databases created before jobs waiting for capacity could be cancelled
+                db.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._recover()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _update(self, job_id: str, condition: str = "", **fields) -> bool:
+        """Set columns of a job, optionally only when a SQL condition holds"""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            cursor = db.execute(f"UPDATE jobs SET {assignments} WHERE id = ? {condition}",
+                                (*fields.values(), job_id))
+            return cursor.rowcount > 0
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def submit(self, operation: str, method: str, inputs: List[Union[str, bytes]], kwargs: Optional[dict] = None,
+               list_input: bool = False, isolate: bool = True, input_suffix: str = "",
+               download_name: str = "result", mimetype: str = "application/octet-stream",
+               entry_names: Optional[Union[str, List[str]]] = None) -> str:
+        """Queue a PDFOperations method to run in the background
+
+        Args:
+            operation: Name reported to clients, e.g. 'compress-pdf'
+            method: PDFOperations method to call
+            inputs: Uploaded files as paths or bytes, copied into the job's
+                directory until the job finishes
+            kwargs: JSON-serializable keyword arguments for the method
+            list_input: Pass the inputs as a list instead of a single argument
+            isolate: Run in a killable worker process
+            input_suffix: File extension of the stored inputs
+            download_name: File name of the result download
+            mimetype: MIME type of the result download
+            entry_names: For methods that return a list or iterator, the archive
+                names of the results or a pattern such as 'page_{n}.png'; the
+                results are then written to a ZIP as they are produced
+
+        Returns:
+            The job ID
+        """
+        self.purge_expired(throttle=True)
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+
+        input_paths = []
+        for i, data in enumerate(inputs, 1):
+            path = os.path.join(job_dir, f"input_{i}{input_suffix}")
+            if isinstance(data, str):
+                shutil.copyfile(data, path)
+            else:
+                with open(path, 'wb') as f:
+                    f.write(data)
+            input_paths.append(path)
+
+        spec = {
+            "method": method,
+            "inputs": input_paths,
+            "list_input": list_input,
+            "kwargs": kwargs or {},
+            "isolate": isolate,
+            "download_name": download_name,
+            "mimetype": mimetype,
+            "entry_names": entry_names
+        }
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, operation, status, spec, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, operation, QUEUED, json.dumps(spec), time.time())
+            )
+        logger.info(f"Queued job {job_id} ({operation})")
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _run(self, job_id: str):
+        """Run a queued job in a pool thread"""
+        # Claim the job, so it only runs once even if it was queued twice
+        if not self._update(job_id, f"AND status = '{QUEUED}'", status=RUNNING, owner_pid=os.getpid()):
+            return
+
+        with self._connect() as db:
+            row = db.execute("SELECT spec FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        spec = json.loads(row["spec"])
+        cancelled = threading.Event()
+        with self._cancel_events_lock:
+            self._cancel_events[job_id] = cancelled
+
+        try:
+            from ..pdf_operations import PDFOperations
+            func = getattr(PDFOperations, spec["method"])
+            args = (spec["inputs"],) if spec["list_input"] else tuple(spec["inputs"])
+
+            entry_names = spec["entry_names"]
+
+            def on_progress(progress):
+                self._update(job_id, progress=round(progress, 4))
+
+            # Jobs wait for capacity rather than being rejected
+            with get_admission_controller().admit(spec["method"], args, spec["kwargs"], wait=True,
+                                                  cancelled=cancelled), \
+                    track_operation(spec["method"], args) as record:
+                # started_at marks the end of the wait; a cancel requested before it is honored here
+                if not self._update(job_id, "AND cancel_requested = 0", started_at=time.time()):
+                    raise OperationCancelledError(spec["method"])
+                if not spec["isolate"]:
+                    result = func(*args, **spec["kwargs"])
+                    record.add_pages(count_pages(args[:1], result))
+                elif entry_names is not None:
+                    result = iter_isolated(func, *args, task_id=job_id, on_progress=on_progress,
+                                           on_pages=record.add_pages, **spec["kwargs"])
+                else:
+                    result = run_isolated(func, *args, task_id=job_id, on_progress=on_progress,
+                                          on_pages=record.add_pages, **spec["kwargs"])
+
+                result_path = os.path.join(self._job_dir(job_id), "result")
+                if entry_names is not None:
+                    from ..zip_stream import iter_zip
+                    if isinstance(entry_names, str):
+                        pattern = entry_names
+                        entry_names = (pattern.format(n=i) for i in itertools.count(1))
+
+                    def recorded(items):
+                        for item in items:
+                            record.add_output(item)
+                            yield item
+
+                    entries = zip(entry_names, recorded(result))
+                    with open(result_path, 'wb') as f:
+                        for chunk in iter_zip(entries):
+                            f.write(chunk)
+                else:
+                    record.add_output(result)
+                    with open(result_path, 'wb') as f:
+                        f.write(result.getbuffer())
+
+            self._update(job_id, status=DONE, progress=1.0, result_path=result_path, finished_at=time.time())
+            logger.info(f"Job {job_id} finished")
+
+        except Exception as e:
+            status = CANCELLED if getattr(e, "code", None) == "cancelled" else FAILED
+            error_code = e.code if isinstance(e, OperationAbortedError) else type(e).__name__
+            self._update(job_id, status=status, error=str(e), error_code=error_code, finished_at=time.time())
+            logger.error(f"Job {job_id} {status}: {str(e)}")
+
+        finally:
+            with self._cancel_events_lock:
+                self._cancel_events.pop(job_id, None)
+            for path in spec["inputs"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Get a job's status, or None if it does not exist"""
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        spec = json.loads(row["spec"])
+        job = {
+            "id": row["id"],
+            "operation": row["operation"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "download_name": spec["download_name"],
+            "mimetype": spec["mimetype"]
+        }
+        if row["status"] in (FAILED, CANCELLED):
+            job["error"] = row["error"]
+            job["code"] = row["error_code"]
+        return job
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        """Get the result file of a finished job"""
+        with self._connect() as db:
+            row = db.execute("SELECT status, result_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != DONE:
+            return None
+        return row["result_path"]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job
+
+        A job still waiting for capacity is cancelled right away and never
+        starts; its wait ends as soon as its server process notices. A started job can only be stopped by killing its worker, which
+        requires it to run isolated in this server process.
+
+        Returns:
+            True if the job was active and has been cancelled, False if it is
+            not active
+
+        Raises:
+            JobNotCancellableError: The job has started and cannot be stopped
+        """
+        if self._update(job_id, f"AND status = '{QUEUED}'", status=CANCELLED,
+                        error="Job was cancelled", error_code="cancelled", finished_at=time.time()):
+            logger.info(f"Cancelled queued job {job_id}")
+            return True
+        if not self._update(job_id, f"AND status = '{RUNNING}'", cancel_requested=1):
+            return False
+
+        # With cancel_requested set, a job that has not started never will (see _run)
+        if self._update(job_id, f"AND status = '{RUNNING}' AND started_at IS NULL", status=CANCELLED,
+                        error="Job was cancelled", error_code="cancelled", finished_at=time.time()):
+            with self._cancel_events_lock:
+                cancelled = self._cancel_events.get(job_id)
+            if cancelled is not None:
+                cancelled.set()
+                get_admission_controller().wake()
+            logger.info(f"Cancelled job {job_id} waiting for capacity")
+            return True
+
+        # A running job is marked as cancelled by _run once its worker is gone
+        if cancel_operation(job_id):
+            return True
+        with self._connect() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] in (DONE, FAILED):
+            return False
+        if row["status"] == CANCELLED:
+            return True
+        raise JobNotCancellableError(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a finished job and its files"""
+        with self._connect() as db:
+            cursor = db.execute(f"DELETE FROM jobs WHERE id = ? AND status IN {FINAL_STATES}", (job_id,))
+        if cursor.rowcount == 0:
+            return False
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return True
+
+    def counts(self) -> dict:
+        """Get the number of stored jobs in each state"""
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def purge_expired(self, throttle: bool = False) -> int:
+        """Remove finished jobs older than the retention period
+
+        Args:
+            throttle: Skip the scan if one ran within the last minute
+
+        Returns:
+            Number of jobs removed
+        """
+        now = time.time()
+        if throttle and now - self._last_purge < 60:
+            return 0
+        self._last_purge = now
+
+        cutoff = now - self.retention
+        with self._connect() as db:
+            rows = db.execute(f"SELECT id FROM jobs WHERE status IN {FINAL_STATES} AND finished_at < ?",
+                              (cutoff,)).fetchall()
+        for row in rows:
+            self.delete(row["id"])
+        if rows:
+            logger.info(f"Removed {len(rows)} expired jobs")
+        return len(rows)
+
+    def _recover(self):
+        """Pick up the jobs left behind by previous server processes"""
+        with self._connect() as db:
+            running = db.execute("SELECT id, owner_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            queued = db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)).fetchall()
+
+        for row in running:
+            # A job claimed under this process's PID was left by an earlier server that
+            # had the same PID, as happens when the server is PID 1 in a container
+            if row["owner_pid"] == os.getpid() or not _pid_alive(row["owner_pid"]):
+                self._update(row["id"], f"AND status = '{RUNNING}'", status=FAILED,
+                             error="Server stopped while the job was running", error_code="interrupted",
+                             finished_at=time.time())
+                logger.warning(f"Job {row['id']} was interrupted by a server restart")
+
+        for row in queued:
+            self._executor.submit(self._run, row["id"])
+        if queued:
+            logger.info(f"Resumed {len(queued)} queued jobs")
+
+        self.purge_expired()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Get the process-wide job manager, resuming stored jobs on first use"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
+
+
+def _collect_job_counts() -> dict:
+    # Only report jobs once the manager was started, instead of starting it for a scrape
+    if _manager is None:
+        return {}
+    return {(status,): count for status, count in _manager.counts().items()}
+
+JOBS = Gauge("pdfconv_jobs", "Stored background jobs, by state", ["status"], collect=_collect_job_counts)
@@ -0,0 +1,293 @@
+from .config import *
+import time
+import atexit
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional, List, Tuple, Union
+from .temp_files import disk_arena_dir
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    UNO_AVAILABLE = True
+except ImportError:
+    # python3-uno ships with LibreOffice and is not installable from PyPI
+    UNO_AVAILABLE = False
+
+
+def _uno_properties(**values) -> tuple:
+    """Build a UNO PropertyValue sequence from keyword arguments"""
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _file_url(path: str) -> str:
+    return uno.systemPathToFileUrl(os.path.abspath(path))
+
+
+class LibreOfficeInstance:
+    """A headless LibreOffice process with its own profile, driven over a UNO pipe"""
+
+    def __init__(self, instance_id: int):
+        self.instance_id = instance_id
+        self.pipe_name = f"pdfconverter_{os.getpid()}_{instance_id}_{int(time.time() * 1000)}"
+        # Profiles live in the disk arena so a crashed server's profiles are swept on restart
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo_profile_{instance_id}_", dir=disk_arena_dir())
+        self.jobs_done = 0
+        self.process = None
+        self.desktop = None
+
+    def start(self):
+        """Launch the process and wait until it accepts UNO connections"""
+        self.process = subprocess.Popen(
+            [
+                LIBREOFFICE_BINARY,
+                '--headless',
+                '--invisible',
+                '--nologo',
+                '--nodefault',
+                '--norestore',
+                '--nolockcheck',
+                f'-env:UserInstallation={_file_url(self.profile_dir)}',
+                f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + LIBREOFFICE_START_TIMEOUT
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"LibreOffice instance {self.instance_id} exited during startup")
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice instance {self.instance_id} did not start in time")
+                time.sleep(0.1)
+
+        logger.info(f"Started LibreOffice instance {self.instance_id} (pid {self.process.pid})")
+
+    def is_healthy(self) -> bool:
+        """Check that the process is alive and still answers UNO calls"""
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, input_path: str, output_path: str, filter_name: str = "writer_pdf_Export"):
+        """Convert a document with the running instance"""
+        document = self.desktop.loadComponentFromURL(
+            _file_url(input_path), "_blank", 0, _uno_properties(Hidden=True, ReadOnly=True)
+        )
+        if document is None:
+            raise RuntimeError("LibreOffice could not open the document")
+        try:
+            document.storeToURL(_file_url(output_path), _uno_properties(FilterName=filter_name))
+        finally:
+            document.close(True)
+        self.jobs_done += 1
+
+    def stop(self):
+        """Terminate the process and remove its profile"""
+        self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class LibreOfficePool:
+    """Pool of long-lived LibreOffice instances for document conversion
+
+    Instances are started lazily up to `size`, each with a private profile
+    so concurrent conversions never contend for the same user installation.
+    A conversion checks out an idle instance (waiting in line when all are
+    busy), health-checks it, and returns it afterwards. Instances are
+    replaced after `max_jobs` conversions, after any failure, and when a
+    conversion exceeds its timeout.
+    """
+
+    def __init__(self, size: int = LIBREOFFICE_POOL_SIZE, max_jobs: int = LIBREOFFICE_MAX_JOBS):
+        self.size = size
+        self.max_jobs = max_jobs
+        self._idle = []
+        self._condition = threading.Condition()
+        self._started = 0
+        self._next_id = 0
+        self._instances = set()
+
+    def _acquire(self, timeout: float) -> LibreOfficeInstance:
+        """Check out an idle instance, starting a new one if the pool is not full"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    instance = self._idle.pop()
+                    break
+                if self._started < self.size:
+                    self._started += 1
+                    self._next_id += 1
+                    instance = None
+                    instance_id = self._next_id
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError("All LibreOffice workers are busy, please retry later")
+                self._condition.wait(remaining)
+
+        if instance is None:
+            return self._start_instance(instance_id)
+
+        if not instance.is_healthy():
+            logger.warning(f"LibreOffice instance {instance.instance_id} failed health check, restarting")
+            self._discard(instance)
+            return self._acquire(max(0, deadline - time.monotonic()))
+        return instance
+
+    def _start_instance(self, instance_id: int) -> LibreOfficeInstance:
+        instance = LibreOfficeInstance(instance_id)
+        try:
+            instance.start()
+        except Exception:
+            instance.stop()
+            with self._condition:
+                self._started -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._instances.add(instance)
+        return instance
+
+    def _release(self, instance: LibreOfficeInstance):
+        if instance.jobs_done >= self.max_jobs:
+            logger.info(f"Recycling LibreOffice instance {instance.instance_id} after {instance.jobs_done} jobs")
+            self._discard(instance)
+        else:
+            with self._condition:
+                self._idle.append(instance)
+                self._condition.notify()
+
+    def _discard(self, instance: LibreOfficeInstance):
+        instance.stop()
+        with self._condition:
+            self._instances.discard(instance)
+            self._started -= 1
+            self._condition.notify()
+
+    def convert(self, input_path: str, output_path: str, timeout: float = LIBREOFFICE_JOB_TIMEOUT,
+                queue_timeout: float = LIBREOFFICE_QUEUE_TIMEOUT):
+        """Convert a document to PDF on a pooled instance
+
+        Args:
+            input_path: Path of the document to convert
+            output_path: Path to write the PDF to
+            timeout: Seconds before the instance is killed and the conversion fails
+            queue_timeout: Seconds to wait for a free instance
+        """
+        self.convert_batch([(input_path, output_path)], timeout, queue_timeout)
+
+    def convert_batch(self, conversions: List[Tuple[str, str]], timeout: float = LIBREOFFICE_JOB_TIMEOUT,
+                      queue_timeout: float = LIBREOFFICE_QUEUE_TIMEOUT):
+        """Convert several documents in one session on a single pooled instance
+
+        Args:
+            conversions: List of (input path, output path) pairs
+            timeout: Seconds allowed per document before the instance is killed
+            queue_timeout: Seconds to wait for a free instance
+        """
+        instance = self._acquire(queue_timeout)
+        for input_path, output_path in conversions:
+            timed_out = threading.Event()
+
+            def kill_instance():
+                timed_out.set()
+                logger.error(f"LibreOffice instance {instance.instance_id} timed out after {timeout}s, killing it")
+                instance.process.kill()
+
+            watchdog = threading.Timer(timeout, kill_instance)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                instance.convert(input_path, output_path)
+            except Exception as e:
+                self._discard(instance)
+                if timed_out.is_set():
+                    raise RuntimeError(f"LibreOffice conversion timed out after {timeout} seconds")
+                raise RuntimeError(f"LibreOffice conversion failed: {str(e)}")
+            finally:
+                watchdog.cancel()
+        self._release(instance)
+
+    def shutdown(self):
+        """Stop every instance"""
+        with self._condition:
+            instances = list(self._instances)
+            self._instances.clear()
+            self._idle.clear()
+            self._started = 0
+        for instance in instances:
+            instance.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_libreoffice_pool() -> Optional[LibreOfficePool]:
+    """Get the process-wide LibreOffice pool, or None when UNO is not available"""
+    global _pool
+    if not UNO_AVAILABLE:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = LibreOfficePool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def convert_with_soffice(input_paths: Union[str, List[str]], output_dir: str,
+                         timeout: float = LIBREOFFICE_JOB_TIMEOUT):
+    """Convert documents with a one-shot soffice process
+
+    Used when UNO is not available. All documents are passed to a single
+    invocation, so startup is paid once per call; the timeout applies per
+    document. A private profile directory keeps concurrent conversions from
+    colliding on the shared user installation.
+    """
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
+    profile_dir = tempfile.mkdtemp(prefix="lo_profile_", dir=disk_arena_dir())
+    try:
+        subprocess.run([
+            LIBREOFFICE_BINARY,
+            '--headless',
+            f'-env:UserInstallation={Path(profile_dir).resolve().as_uri()}',
+            '--convert-to',
+            'pdf',
+            '--outdir',
+            output_dir,
+            *input_paths
+        ], check=True, timeout=timeout * len(input_paths), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
@@ -1,4 +1,6 @@
 from .config import *
+from .isolation import report_progress
+from .tracing import span
 from typing import Union, List
 from io import BytesIO
 
@@ -16,38 +18,43 @@ class MergeOperations:
         if not pdf_data_list:
             raise ValueError("No PDF files provided for merging")
             
+        from PyPDF2 import PdfMerger
+        
         merger = None
         try:
             merger = PdfMerger()
             
             # Process each PDF
-            for pdf_data in pdf_data_list:
+            for done, pdf_data in enumerate(pdf_data_list, 1):
                 try:
-                    if isinstance(pdf_data, str):
-                        # Verify file exists and is valid
-                        if not os.path.exists(pdf_data):
-                            raise ValueError(f"PDF file not found: {pdf_data}")
-                        if not os.access(pdf_data, os.R_OK):
-                            raise ValueError(f"PDF file is not readable: {pdf_data}")
-                        if os.path.getsize(pdf_data) == 0:
-                            raise ValueError(f"PDF file is empty: {pdf_data}")
-                        with open(pdf_data, 'rb') as file:
-                            merger.append(fileobj=file)
-                    elif isinstance(pdf_data, bytes):
-                        merger.append(BytesIO(pdf_data))
-                    elif isinstance(pdf_data, BytesIO):
-                        merger.append(pdf_data)
-                    else:
-                        raise ValueError(f"Invalid PDF input type")
+                    with span("append", index=done):
+                        if isinstance(pdf_data, str):
+                            # Verify file exists and is valid
+                            if not os.path.exists(pdf_data):
+                                raise ValueError(f"PDF file not found: {pdf_data}")
+                            if not os.access(pdf_data, os.R_OK):
+                                raise ValueError(f"PDF file is not readable: {pdf_data}")
+                            if os.path.getsize(pdf_data) == 0:
+                                raise ValueError(f"PDF file is empty: {pdf_data}")
+                            with open(pdf_data, 'rb') as file:
+                                merger.append(fileobj=file)
+                        elif isinstance(pdf_data, bytes):
+                            merger.append(BytesIO(pdf_data))
+                        elif isinstance(pdf_data, BytesIO):
+                            merger.append(pdf_data)
+                        else:
+                            raise ValueError(f"Invalid PDF input type")
                     
                     logger.info("Successfully appended PDF")
+                    report_progress(done, len(pdf_data_list))
                 except Exception as e:
                     logger.error(f"Error processing PDF: {str(e)}")
                     raise ValueError(f"Failed to process PDF: {str(e)}")
             
             # Write merged PDF to buffer
             output_buffer = BytesIO()
-            merger.write(output_buffer)
+            with span("save"):
+                merger.write(output_buffer)
             output_buffer.seek(0)
             
             logger.info("Successfully merged PDFs")
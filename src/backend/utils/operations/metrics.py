@@ -0,0 +1,278 @@
+from .config import *
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Latency buckets in seconds, from quick metadata reads to the longest conversions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base of the metric types: a named family of values keyed by label values"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 collect: Optional[Callable[[], Dict[tuple, float]]] = None):
+        """
+        Args:
+            name: Metric name in Prometheus format
+            documentation: HELP text
+            labels: Label names
+            collect: Optional callback returning {label values: value}, read at
+                every scrape instead of values recorded by this process
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _samples(self) -> Iterator[str]:
+        if self._collect is not None:
+            try:
+                values = self._collect()
+            except Exception as e:
+                logger.warning(f"Could not collect metric {self.name}: {str(e)}")
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Value that only goes up, such as requests served or bytes processed"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, such as requests waiting for capacity"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, such as latencies"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Operation metrics, recorded in the server process around each PDFOperations call
+OPERATION_DURATION = Histogram(
+    "pdfconv_operation_duration_seconds", "Time spent in PDF operations", ["operation"])
+OPERATIONS_TOTAL = Counter(
+    "pdfconv_operations_total", "PDF operations finished, by outcome", ["operation", "status"])
+OPERATION_ERRORS = Counter(
+    "pdfconv_operation_errors_total", "PDF operations that failed, by exception type", ["operation", "error"])
+OPERATION_INPUT_BYTES = Counter(
+    "pdfconv_operation_input_bytes_total", "Bytes of input passed to PDF operations", ["operation"])
+OPERATION_OUTPUT_BYTES = Counter(
+    "pdfconv_operation_output_bytes_total", "Bytes of output produced by PDF operations", ["operation"])
+PAGES_PROCESSED = Counter(
+    "pdfconv_pages_processed_total", "Pages of PDF input, or of PDF output for conversions to PDF", ["operation"])
+OPERATIONS_IN_PROGRESS = Gauge(
+    "pdfconv_operations_in_progress", "PDF operations currently running", ["operation"])
+
+# HTTP metrics, recorded by the Flask request hooks
+HTTP_REQUEST_DURATION = Histogram(
+    "pdfconv_http_request_duration_seconds",
+    "Time until the response starts, by route (streamed bodies continue afterwards)", ["route", "method"])
+HTTP_REQUESTS_TOTAL = Counter(
+    "pdfconv_http_requests_total", "HTTP requests served, by route and status code", ["route", "method", "status"])
+
+
+def _page_count(data) -> int:
+    """Count the pages of PDF data given as path, bytes, or BytesIO, or 0 for anything else"""
+    try:
+        if isinstance(data, str):
+            with open(data, 'rb') as f:
+                if f.read(5) != b"%PDF-":
+                    return 0
+            with fitz.open(data) as doc:
+                return doc.page_count
+        if isinstance(data, BytesIO):
+            data = data.getbuffer()
+        if isinstance(data, (bytes, memoryview)) and bytes(data[:5]) == b"%PDF-":
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                return doc.page_count
+    except Exception:
+        pass
+    return 0
+
+
+def count_pages(inputs, outputs=None) -> int:
+    """Count the pages of the PDF inputs, or of the PDF outputs for conversions to PDF
+
+    Operations that run in a worker are counted there, after the operation,
+    so untrusted documents are never opened just for metrics in the server.
+    """
+    pages = sum(_page_count(data) for data in _flatten(inputs))
+    if not pages:
+        pages = sum(_page_count(data) for data in _flatten(outputs))
+    return pages
+
+
+def _flatten(value) -> list:
+    """Turn an operation's input or output into a list of data items"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [item for sub in value for item in _flatten(sub)]
+    if isinstance(value, (str, bytes, BytesIO)):
+        return [value]
+    return []
+
+
+class _OperationRecord:
+    """Collects what one operation call produced"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.output_bytes = 0
+        self.pages = 0
+
+    def add_output(self, value):
+        from .temp_files import data_size
+
+        for item in _flatten(value):
+            if isinstance(item, str) and not os.path.isfile(item):
+                # Text, rather than the path of a file edited in place
+                self.output_bytes += len(item.encode())
+                continue
+            self.output_bytes += data_size(item)
+
+    def add_pages(self, pages: int):
+        self.pages += pages
+
+
+@contextmanager
+def track_operation(operation: str, args: tuple = ()) -> Iterator[_OperationRecord]:
+    """Record latency, throughput and errors of an operation call
+
+    The first positional argument is taken as the input. Callers pass what
+    the operation returned to record.add_output() so output bytes are
+    counted too, and the pages processed to record.add_pages(), as reported
+    by the worker (see run_isolated's on_pages) or from count_pages().
+    """
+    from .temp_files import data_size
+
+    inputs = _flatten(args[0]) if args else []
+    OPERATION_INPUT_BYTES.inc(sum(data_size(data) for data in inputs), operation=operation)
+    record = _OperationRecord(operation)
+    OPERATIONS_IN_PROGRESS.inc(operation=operation)
+    started = time.perf_counter()
+    try:
+        yield record
+    except GeneratorExit:
+        # A streamed result was closed early, e.g. by a client disconnect
+        OPERATIONS_TOTAL.inc(operation=operation, status="closed")
+        raise
+    except BaseException as e:
+        OPERATIONS_TOTAL.inc(operation=operation, status="error")
+        OPERATION_ERRORS.inc(operation=operation, error=type(e).__name__)
+        raise
+    else:
+        OPERATIONS_TOTAL.inc(operation=operation, status="ok")
+    finally:
+        OPERATION_DURATION.observe(time.perf_counter() - started, operation=operation)
+        OPERATIONS_IN_PROGRESS.dec(operation=operation)
+        OPERATION_OUTPUT_BYTES.inc(record.output_bytes, operation=operation)
+        PAGES_PROCESSED.inc(record.pages, operation=operation)
+
+
+def track_iterator(operation: str, args: tuple, items: Callable[[_OperationRecord], Iterator]) -> Iterator:
+    """Record a generator operation over its whole iteration, counting each item as output
+
+    items is called with the operation's record, so it can pass
+    record.add_pages to the worker running the operation.
+    """
+    with track_operation(operation, args) as record:
+        for item in items(record):
+            record.add_output(item)
+            yield item
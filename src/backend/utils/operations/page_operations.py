@@ -0,0 +1,151 @@
+from .config import *
+from .temp_files import temp_workspace, data_size
+from .isolation import OperationAbortedError
+from .tracing import span
+from typing import Union, List
+from io import BytesIO
+
+class PageOperations:
+    @staticmethod
+    def edit_pages(pdf_data: Union[str, bytes, BytesIO], operations: List[dict], incremental: bool = True,
+                   in_place: bool = False) -> Union[BytesIO, str]:
+        """Rotate, delete and reorder pages
+
+        Operations are applied in order, and page numbers (1-based) always
+        refer to the document as left by the previous operation:
+            - {"op": "rotate", "angle": 90, "pages": [1, 3]}: rotate clockwise by a
+              multiple of 90 degrees (all pages when "pages" is omitted)
+            - {"op": "delete", "pages": [2, 4]}: remove pages
+            - {"op": "reorder", "order": [3, 1, 2]}: new page order, must list every page once
+
+        When possible the edits are appended to the original file as an
+        incremental update, so the cost is proportional to the edit rather
+        than the document size. Deleted pages then still occupy space in the
+        file; pass incremental=False to rewrite and compact it instead.
+
+        Incremental updates can only be written to the file the document was
+        opened from, so by default the input is copied first. With in_place
+        and a file path that the caller owns, such as a spooled upload, the
+        update is appended to that file and its path returned, so neither the
+        input nor the output is copied or read into memory.
+
+        Args:
+            pdf_data: PDF data as file path, bytes, or BytesIO
+            operations: List of operation dictionaries as described above
+            incremental: Append changes instead of rewriting the whole file
+            in_place: Edit the file at pdf_data itself (file paths only)
+
+        Returns:
+            BytesIO object containing the edited PDF data, or with in_place
+            the path of the edited file
+        """
+        if not operations:
+            raise ValueError("No page operations provided")
+        if in_place and not isinstance(pdf_data, str):
+            raise ValueError("In-place edits need a file path")
+
+        try:
+            if in_place:
+                PageOperations._edit_file(pdf_data, operations, incremental)
+                return pdf_data
+
+            # Incremental saves append to the file the document was opened from,
+            # so work on a private copy instead of the caller's data
+            with temp_workspace(expected_size=data_size(pdf_data) * 2, operation="edit_pages") as work_dir:
+                temp_path = os.path.join(work_dir, "input.pdf")
+                if isinstance(pdf_data, str):
+                    shutil.copyfile(pdf_data, temp_path)
+                elif isinstance(pdf_data, bytes):
+                    with open(temp_path, 'wb') as f:
+                        f.write(pdf_data)
+                elif isinstance(pdf_data, BytesIO):
+                    with open(temp_path, 'wb') as f:
+                        f.write(pdf_data.getbuffer())
+                else:
+                    raise ValueError("Invalid PDF input type")
+
+                PageOperations._edit_file(temp_path, operations, incremental)
+                with open(temp_path, 'rb') as f:
+                    output_buffer = BytesIO(f.read())
+
+            output_buffer.seek(0)
+            return output_buffer
+
+        except OperationAbortedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error editing pages: {str(e)}")
+            raise ValueError(f"Failed to edit pages: {str(e)}")
+
+    @staticmethod
+    def _edit_file(path: str, operations: List[dict], incremental: bool):
+        """Apply page operations to the PDF file at path, updating it incrementally when possible"""
+        with fitz.open(path) as doc:
+            if doc.needs_pass:
+                raise ValueError("Cannot edit pages of a password-protected PDF")
+
+            with span("edit", operations=len(operations)):
+                for operation in operations:
+                    PageOperations._apply_page_operation(doc, operation)
+
+            if doc.page_count == 0:
+                raise ValueError("Cannot delete every page of the document")
+
+            save_incrementally = incremental and doc.can_save_incrementally()
+            with span("save", incremental=save_incrementally):
+                if save_incrementally:
+                    doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                else:
+                    # The open document still reads from path, so write next to it and swap
+                    rewritten_path = f"{path}.rewrite"
+                    doc.save(rewritten_path, garbage=3, deflate=True)
+
+        if save_incrementally:
+            logger.info(f"Applied {len(operations)} page operations as an incremental update")
+        else:
+            os.replace(rewritten_path, path)
+            logger.info(f"Applied {len(operations)} page operations with a full rewrite")
+
+    @staticmethod
+    def _apply_page_operation(doc, operation: dict):
+        """Apply a single rotate, delete or reorder operation to an open document"""
+        if not isinstance(operation, dict):
+            raise ValueError("Each page operation must be an object")
+
+        op = operation.get("op")
+        total_pages = doc.page_count
+
+        def check_pages(pages) -> List[int]:
+            """Validate 1-based page numbers and convert them to indexes"""
+            if not isinstance(pages, list) or not all(isinstance(p, int) and not isinstance(p, bool) for p in pages):
+                raise ValueError(f"'{op}' pages must be a list of page numbers")
+            invalid_pages = [p for p in pages if p < 1 or p > total_pages]
+            if invalid_pages:
+                raise ValueError(f"Invalid page numbers: {invalid_pages}. Pages must be between 1 and {total_pages}")
+            return [p - 1 for p in pages]
+
+        if op == "rotate":
+            angle = operation.get("angle")
+            # bool is a subclass of int, but true is not an angle
+            if not isinstance(angle, int) or isinstance(angle, bool) or angle % 90 != 0:
+                raise ValueError("Rotation angle must be a multiple of 90")
+            page_indexes = check_pages(operation["pages"]) if "pages" in operation else range(total_pages)
+            for page_num in page_indexes:
+                page = doc[page_num]
+                page.set_rotation((page.rotation + angle) % 360)
+            logger.info(f"Rotated {len(page_indexes)} pages by {angle} degrees")
+
+        elif op == "delete":
+            page_indexes = check_pages(operation.get("pages"))
+            doc.delete_pages(sorted(set(page_indexes)))
+            logger.info(f"Deleted {len(set(page_indexes))} pages")
+
+        elif op == "reorder":
+            order = check_pages(operation.get("order"))
+            if sorted(order) != list(range(total_pages)):
+                raise ValueError("Page order must list every page exactly once")
+            doc.select(order)
+            logger.info("Reordered pages")
+
+        else:
+            raise ValueError(f"Unknown page operation: {op}")
@@ -0,0 +1,187 @@
+from .config import *
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+from .info_operations import InfoOperations
+from .metrics import Counter, Gauge
+
+
+class ResultCache:
+    """Disk store for operation results, addressed by input content and parameters
+
+    Each result is a single file named after its key. The file's mtime
+    records when it was stored (for the TTL) and its atime when it was last
+    used (for LRU eviction), so the index can be rebuilt from the directory
+    after a restart. Writes go through a temporary file and an atomic rename,
+    so concurrent server processes can share the directory.
+    """
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES,
+                 ttl: float = RESULT_CACHE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None  # key -> size, least recently used first
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(operation: str, data: Union[str, bytes, BytesIO], params: dict) -> str:
+        """Build the cache key for an operation on some input with some parameters"""
+        content_hash = InfoOperations.content_hash(data)
+        encoded_params = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{operation}\0{content_hash}\0{encoded_params}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _load_index(self):
+        """Rebuild the index from the directory on first use (caller holds the lock)"""
+        if self._index is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith("."):
+                continue
+            try:
+                stats = os.stat(self._path(name))
+            except OSError:
+                continue
+            entries.append((stats.st_atime, name, stats.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    def _ensure_index(self):
+        with self._lock:
+            self._load_index()
+
+    def _forget(self, key: str):
+        """Drop an entry from the index (caller holds the lock)"""
+        self._total_bytes -= self._index.pop(key, 0)
+
+    def _delete_files(self, keys: List[str]):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a stored result, or None when it is missing or expired
+
+        The file is read without holding the lock, which only guards the index.
+        """
+        self._ensure_index()
+        path = self._path(key)
+        data = None
+        expired = False
+        try:
+            stats = os.stat(path)
+            if time.time() - stats.st_mtime > self.ttl:
+                expired = True
+            else:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                # Record the access for LRU, keeping the creation time in mtime
+                os.utime(path, (time.time(), stats.st_mtime))
+        except FileNotFoundError:
+            pass
+        if expired:
+            self._delete_files([key])
+
+        with self._lock:
+            if data is None:
+                self._forget(key)
+                self.misses += 1
+            else:
+                # Also picks up results stored by another process
+                self._total_bytes += len(data) - self._index.pop(key, 0)
+                self._index[key] = len(data)
+                self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store a result, evicting least recently used entries to stay within max_bytes
+
+        The file is written without holding the lock, which only guards the index.
+        """
+        if len(data) > self.max_bytes:
+            return
+        self._ensure_index()
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not store cached result: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        evicted = []
+        with self._lock:
+            self._total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._forget(oldest)
+                evicted.append(oldest)
+        self._delete_files(evicted)
+
+    def clear(self):
+        """Remove every stored result"""
+        with self._lock:
+            self._load_index()
+            keys = list(self._index)
+            for key in keys:
+                self._forget(key)
+        self._delete_files(keys)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and store usage for this process"""
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
+
+
+RESULT_CACHE_LOOKUPS = Counter(
+    "pdfconv_result_cache_lookups_total", "Result cache lookups in this process, by outcome", ["result"],
+    collect=lambda: {("hit",): get_result_cache().hits, ("miss",): get_result_cache().misses})
+RESULT_CACHE_HIT_RATIO = Gauge(
+    "pdfconv_result_cache_hit_ratio", "Share of result cache lookups in this process that were hits",
+    collect=lambda: {(): get_result_cache().stats()["hit_ratio"]})
+RESULT_CACHE_BYTES = Gauge(
+    "pdfconv_result_cache_bytes", "Size of the stored results",
+    collect=lambda: {(): get_result_cache().stats()["bytes"]})
@@ -0,0 +1,230 @@
+from .config import *
+import re
+import json
+import time
+import uuid
+import threading
+from typing import BinaryIO, Optional
+from .document_store import get_document_store
+
+_UPLOAD_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# Bytes copied from the request body to the spool file at a time
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadOffsetError(Exception):
+    """A chunk did not start where the upload currently ends"""
+
+    def __init__(self, upload_id: str, offset: int):
+        super().__init__(f"Upload {upload_id} continues at offset {offset}")
+        self.upload_id = upload_id
+        self.offset = offset
+
+
+class ResumableUploads:
+    """Uploads sent in chunks that can be resumed after a failed request
+
+    Each upload is a spool file that chunks are appended to straight from
+    the request body, plus a small JSON file with its filename and expected
+    size. The spool file's size is the upload's offset, so a chunk that was
+    cut off halfway still counts for the bytes that arrived, and the client
+    only resends what is missing. Once complete, the upload is finalized into
+    the document store and referenced by its document handle. Uploads with
+    no new chunk for longer than the TTL are removed.
+    """
+
+    def __init__(self, directory: str = UPLOADS_DIR, ttl: float = UPLOAD_SESSION_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._upload_locks = {}  # upload ID -> lock held while a chunk is written
+        self._last_purge = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def create(self, filename: str, size: Optional[int] = None) -> dict:
+        """Start an upload
+
+        Args:
+            filename: Original filename, kept for the finalized document
+            size: Total size in bytes, if known; chunks beyond it are rejected
+
+        Returns:
+            Upload description
+        """
+        if size is not None and size < 0:
+            raise ValueError("Upload size must not be negative")
+        self.purge_expired(throttle=True)
+
+        upload_id = uuid.uuid4().hex
+        with open(self._meta_path(upload_id), 'w') as f:
+            json.dump({"filename": filename, "size": size, "created_at": time.time()}, f)
+        open(self._part_path(upload_id), 'wb').close()
+        logger.info(f"Started upload {upload_id} ({filename})")
+        return self.get(upload_id)
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        """Describe an upload, or None if it is unknown or expired"""
+        if not _UPLOAD_ID_PATTERN.fullmatch(upload_id or ""):
+            return None
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                meta = json.load(f)
+            stats = os.stat(self._part_path(upload_id))
+        except (OSError, ValueError):
+            return None
+        if time.time() - stats.st_mtime > self.ttl:
+            return None
+        return {
+            "id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "offset": stats.st_size,
+            "complete": meta["size"] is not None and stats.st_size >= meta["size"],
+            "expires_at": stats.st_mtime + self.ttl
+        }
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO, length: Optional[int] = None) -> dict:
+        """Append a chunk read from stream at offset
+
+        The chunk is copied to the spool file in COPY_CHUNK_SIZE pieces, so
+        memory use does not depend on the chunk size. If the stream ends
+        early, the bytes received so far are kept.
+
+        Args:
+            upload_id: Upload to append to
+            offset: Where the chunk starts; must be the upload's current offset
+            stream: Chunk data
+            length: Chunk size, if known, checked against the expected total size
+
+        Raises:
+            KeyError: The upload is unknown or expired
+            UploadOffsetError: offset is not where the upload currently ends
+            ValueError: The chunk would exceed the upload's size
+        """
+        with self._upload_lock(upload_id):
+            upload = self.get(upload_id)
+            if upload is None:
+                raise KeyError(upload_id)
+            if offset != upload["offset"]:
+                raise UploadOffsetError(upload_id, upload["offset"])
+
+            remaining = None if upload["size"] is None else upload["size"] - offset
+            if remaining is not None and length is not None and length > remaining:
+                raise ValueError(f"Chunk of {length} bytes exceeds the upload size by {length - remaining} bytes")
+
+            with open(self._part_path(upload_id), 'ab') as f:
+                while True:
+                    limit = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining + 1)
+                    data = stream.read(limit)
+                    if not data:
+                        break
+                    if remaining is not None:
+                        if len(data) > remaining:
+                            f.write(data[:remaining])
+                            raise ValueError("Chunk exceeds the upload size")
+                        remaining -= len(data)
+                    f.write(data)
+        return self.get(upload_id)
+
+    def finalize(self, upload_id: str, sha256: str = "") -> dict:
+        """Turn a complete upload into a stored document
+
+        Args:
+            upload_id: Upload to finalize
+            sha256: Optional expected SHA-256 hex digest of the whole content
+
+        Returns:
+            Document description, with the upload's filename
+
+        Raises:
+            KeyError: The upload is unknown or expired
+            ValueError: The upload is incomplete or its content does not match sha256
+        """
+        with self._upload_lock(upload_id):
+            upload = self.get(upload_id)
+            if upload is None:
+                raise KeyError(upload_id)
+            if upload["size"] is not None and not upload["complete"]:
+                raise ValueError(f"Upload is incomplete: {upload['offset']} of {upload['size']} bytes received")
+
+            # Hard-linked into the store when possible, so the content is not copied
+            document, created = get_document_store().put(self._part_path(upload_id), upload["filename"])
+            if sha256 and document["id"] != sha256.lower():
+                if created:
+                    get_document_store().delete(document["id"])
+                raise ValueError("Uploaded content does not match the given SHA-256")
+            self._remove(upload_id)
+
+        logger.info(f"Finalized upload {upload_id} into document {document['id']}")
+        # Whether the content was stored before is not reported, as it would reveal other clients' uploads
+        return {**document, "filename": upload["filename"]}
+
+    def _remove(self, upload_id: str):
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+
+    def delete(self, upload_id: str) -> bool:
+        """Abort an upload and remove what was received"""
+        if self.get(upload_id) is None:
+            return False
+        with self._upload_lock(upload_id):
+            self._remove(upload_id)
+        return True
+
+    def purge_expired(self, throttle: bool = False) -> int:
+        """Remove uploads without a new chunk for longer than the TTL
+
+        Args:
+            throttle: Skip the scan if one ran within the last minute
+
+        Returns:
+            Number of uploads removed
+        """
+        now = time.time()
+        if throttle and now - self._last_purge < 60:
+            return 0
+        self._last_purge = now
+
+        removed = 0
+        for entry in os.scandir(self.directory):
+            upload_id, extension = os.path.splitext(entry.name)
+            if extension != ".json" or not _UPLOAD_ID_PATTERN.fullmatch(upload_id):
+                continue
+            try:
+                last_chunk = os.stat(self._part_path(upload_id)).st_mtime
+            except FileNotFoundError:
+                last_chunk = 0
+            if now - last_chunk > self.ttl:
+                self._remove(upload_id)
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired uploads")
+        return removed
+
+
+_uploads = None
+_uploads_lock = threading.Lock()
+
+def get_resumable_uploads() -> ResumableUploads:
+    """Get the process-wide resumable upload manager"""
+    global _uploads
+    with _uploads_lock:
+        if _uploads is None:
+            _uploads = ResumableUploads()
+        return _uploads
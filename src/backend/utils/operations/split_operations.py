@@ -1,6 +1,30 @@
 from .config import *
-from typing import Union, List
+import re
+from typing import Union, List, Iterator, Dict, Optional, Tuple, Set, TYPE_CHECKING
 from io import BytesIO
+from .tracing import span
+
+if TYPE_CHECKING:
+    from PyPDF2 import PageObject, PdfReader
+
+# Rough serialized overhead per indirect object ("n 0 obj ... endobj" plus its xref entry)
+PDF_OBJECT_OVERHEAD = 40
+# Header, catalog, page tree and trailer written once per split part
+PDF_PART_OVERHEAD = 512
+
+# Resource categories whose entries are addressed by name from the content stream
+PRUNABLE_RESOURCES = ("/Font", "/XObject", "/ExtGState", "/ColorSpace", "/Pattern", "/Shading", "/Properties")
+CONTENT_NAME_PATTERN = re.compile(rb"/([^\s/\[\]<>(){}%]*)")
+NAME_ESCAPE_PATTERN = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+class _ByteCounter:
+    """Write-only stream that only counts the bytes written to it"""
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        return len(data)
 
 class SplitOperations:
     @staticmethod
@@ -14,47 +38,89 @@ class SplitOperations:
                 - ranges: List of [start, end] ranges
                 - first_n: Extract first N pages
                 - last_n: Extract last N pages
+                - max_bytes_per_part: Group consecutive pages into parts of at most
+                  this many bytes (a single oversized page gets a part of its own)
+                - by_outline_level: Start a new part at every bookmark up to this
+                  outline depth (1 = top-level chapters)
+                - prune_resources: Drop fonts, images and other resources the
+                  pages never use, and links to pages outside the part
+                  (default: True)
                 
         Returns:
             List of BytesIO objects containing the split PDFs
         """
+        return list(SplitOperations.iter_split_pdf(pdf_data, split_options))
+
+    @staticmethod
+    def iter_split_pdf(pdf_data: Union[str, bytes, BytesIO], split_options: dict = None) -> Iterator[BytesIO]:
+        """Split PDF lazily, yielding each part as soon as it is written
+        
+        Takes the same arguments as split_pdf. Only one part is held in
+        memory at a time, so callers can stream parts out as they arrive.
+        
+        Returns:
+            Iterator of BytesIO objects containing the split PDFs
+        """
+        from PyPDF2 import PdfReader, PdfWriter
+        
         try:
             # Open PDF from various input types
-            if isinstance(pdf_data, str):
-                reader = PdfReader(pdf_data)
-            elif isinstance(pdf_data, bytes):
-                reader = PdfReader(BytesIO(pdf_data))
-            elif isinstance(pdf_data, BytesIO):
-                reader = PdfReader(pdf_data)
-            else:
-                raise ValueError("Invalid PDF input type")
+            with span("open"):
+                if isinstance(pdf_data, str):
+                    reader = PdfReader(pdf_data)
+                elif isinstance(pdf_data, bytes):
+                    reader = PdfReader(BytesIO(pdf_data))
+                elif isinstance(pdf_data, BytesIO):
+                    reader = PdfReader(pdf_data)
+                else:
+                    raise ValueError("Invalid PDF input type")
+                
+                total_pages = len(reader.pages)
+            parts_created = 0
+            prune_resources = (split_options or {}).get('prune_resources', True)
+            # Pruned pages of the part being built (and the one page the size planner
+            # looks ahead), dropped once written so memory does not grow with the document
+            prepared_pages = {}
             
-            total_pages = len(reader.pages)
-            output_buffers = []
+            def get_page(page_num: int) -> 'PageObject':
+                """Get a page, pruned of unused resources when enabled"""
+                if not prune_resources:
+                    return reader.pages[page_num]
+                if page_num not in prepared_pages:
+                    prepared_pages[page_num] = SplitOperations._prune_page_resources(reader.pages[page_num])
+                return prepared_pages[page_num]
             
-            if not split_options:
-                # Default: split all pages into separate PDFs
-                for page_num in range(total_pages):
+            def write_part(page_indexes) -> BytesIO:
+                """Write the given zero-based pages into a new PDF buffer"""
+                with span("write_part", first_page=page_indexes[0] + 1, pages=len(page_indexes)):
                     writer = PdfWriter()
-                    writer.add_page(reader.pages[page_num])
+                    part_pages = {SplitOperations._object_key(reader.pages[page_num]) for page_num in page_indexes}
+                    for page_num in page_indexes:
+                        page = get_page(page_num)
+                        if prune_resources:
+                            page = SplitOperations._drop_outside_links(page, part_pages)
+                        writer.add_page(page)
                     output_buffer = BytesIO()
                     writer.write(output_buffer)
                     output_buffer.seek(0)
-                    output_buffers.append(output_buffer)
+                for page_num in page_indexes:
+                    prepared_pages.pop(page_num, None)
+                return output_buffer
+            
+            if not split_options or split_options.keys() == {'prune_resources'}:
+                # Default: split all pages into separate PDFs
+                for page_num in range(total_pages):
+                    yield write_part([page_num])
                     logger.info(f"Created PDF for page {page_num + 1}")
-                return output_buffers
+                return
             
             # Handle specific pages
             if 'pages' in split_options:
                 pages = split_options['pages']
                 for page_num in pages:
                     if 1 <= page_num <= total_pages:
-                        writer = PdfWriter()
-                        writer.add_page(reader.pages[page_num - 1])
-                        output_buffer = BytesIO()
-                        writer.write(output_buffer)
-                        output_buffer.seek(0)
-                        output_buffers.append(output_buffer)
+                        parts_created += 1
+                        yield write_part([page_num - 1])
                         logger.info(f"Created PDF for page {page_num}")
             
             # Handle page ranges
@@ -65,46 +131,313 @@ class SplitOperations:
                     if end > total_pages:
                         end = total_pages
                     if start <= end:
-                        writer = PdfWriter()
-                        for page_num in range(start - 1, end):
-                            writer.add_page(reader.pages[page_num])
-                        output_buffer = BytesIO()
-                        writer.write(output_buffer)
-                        output_buffer.seek(0)
-                        output_buffers.append(output_buffer)
+                        parts_created += 1
+                        yield write_part(range(start - 1, end))
                         logger.info(f"Created PDF with pages {start} to {end}")
             
             # Handle first N pages
             if 'first_n' in split_options:
                 n = min(split_options['first_n'], total_pages)
                 if n > 0:
-                    writer = PdfWriter()
-                    for page_num in range(n):
-                        writer.add_page(reader.pages[page_num])
-                    output_buffer = BytesIO()
-                    writer.write(output_buffer)
-                    output_buffer.seek(0)
-                    output_buffers.append(output_buffer)
+                    parts_created += 1
+                    yield write_part(range(n))
                     logger.info(f"Created PDF with first {n} pages")
             
             # Handle last N pages
             if 'last_n' in split_options:
                 n = min(split_options['last_n'], total_pages)
                 if n > 0:
-                    writer = PdfWriter()
-                    for page_num in range(total_pages - n, total_pages):
-                        writer.add_page(reader.pages[page_num])
-                    output_buffer = BytesIO()
-                    writer.write(output_buffer)
-                    output_buffer.seek(0)
-                    output_buffers.append(output_buffer)
+                    parts_created += 1
+                    yield write_part(range(total_pages - n, total_pages))
                     logger.info(f"Created PDF with last {n} pages")
             
-            if not output_buffers:
+            # Handle size-limited parts
+            if 'max_bytes_per_part' in split_options:
+                max_bytes = split_options['max_bytes_per_part']
+                if max_bytes <= 0:
+                    raise ValueError("max_bytes_per_part must be positive")
+                planned_pages = map(get_page, range(total_pages))
+                for page_indexes in SplitOperations._plan_size_parts(planned_pages, max_bytes, prune_resources):
+                    parts_created += 1
+                    yield write_part(page_indexes)
+                    logger.info(f"Created PDF with pages {page_indexes[0] + 1} to {page_indexes[-1] + 1}")
+            
+            # Handle outline (bookmark) sections
+            if 'by_outline_level' in split_options:
+                level = split_options['by_outline_level']
+                if level < 1:
+                    raise ValueError("by_outline_level must be at least 1")
+                for start, end in SplitOperations._plan_outline_parts(reader, level):
+                    parts_created += 1
+                    yield write_part(range(start, end))
+                    logger.info(f"Created PDF with pages {start + 1} to {end}")
+            
+            if not parts_created:
                 raise ValueError("No pages were extracted based on the provided options")
-                
-            return output_buffers
             
         except Exception as e:
             logger.error(f"Error splitting PDF: {str(e)}")
-            raise ValueError(f"Failed to split PDF: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Failed to split PDF: {str(e)}")
+
+    @staticmethod
+    def _content_names(page: 'PageObject') -> Set[str]:
+        """Collect every name token that appears in a page's content streams
+        
+        This is a superset of the resource names the page draws with (names
+        in operands, inline images and marked content are included too),
+        which keeps pruning safe without a full content-stream parse.
+        """
+        from PyPDF2.generic import ArrayObject
+        
+        contents = page.get("/Contents")
+        if contents is None:
+            return set()
+        contents = contents.get_object()
+        streams = contents if isinstance(contents, ArrayObject) else [contents]
+        
+        names = set()
+        for stream in streams:
+            names |= SplitOperations._stream_names(stream.get_object().get_data())
+        return names
+
+    @staticmethod
+    def _stream_names(data: bytes) -> Set[str]:
+        """Collect the name tokens of a content stream"""
+        names = set()
+        for raw in set(CONTENT_NAME_PATTERN.findall(data)):
+            raw = NAME_ESCAPE_PATTERN.sub(lambda m: bytes([int(m.group(1), 16)]), raw)
+            try:
+                names.add("/" + raw.decode("utf-8"))
+            except UnicodeDecodeError:
+                names.add("/" + raw.decode("charmap"))
+        return names
+
+    @staticmethod
+    def _prune_page_resources(page: 'PageObject') -> 'PageObject':
+        """Return a copy of a page whose resources only list what its content uses
+        
+        Producers often share one /Resources dictionary across all pages, so
+        copying a page as-is drags every font and image of the document into
+        the part. The copy keeps the original indirect reference, so
+        PdfWriter still maps links and annotations back to it; only the
+        resource entries the content names survive, and unreferenced objects
+        are never cloned into the writer. Form XObjects without resources of
+        their own draw with the page's, so the names in their content are
+        kept too. The source page is left untouched.
+        """
+        from PyPDF2 import PageObject
+        from PyPDF2.generic import DictionaryObject, NameObject
+        
+        resources = page.get("/Resources")
+        if resources is None:
+            return page
+        try:
+            resources = resources.get_object()
+            used_names = SplitOperations._content_names(page)
+            
+            xobjects = resources.get("/XObject")
+            xobjects = xobjects.get_object() if xobjects is not None else {}
+            pending = [name for name in used_names if name in xobjects]
+            visited = set()
+            while pending:
+                name = pending.pop()
+                if name in visited:
+                    continue
+                visited.add(name)
+                xobject = xobjects[name].get_object()
+                if xobject.get("/Subtype") == "/Form" and "/Resources" not in xobject:
+                    form_names = SplitOperations._stream_names(xobject.get_data())
+                    used_names |= form_names
+                    pending.extend(form_name for form_name in form_names if form_name in xobjects)
+        except Exception as e:
+            logger.warning(f"Keeping all resources, could not read page content: {str(e)}")
+            return page
+        
+        pruned_resources = DictionaryObject()
+        for category, entries in resources.items():
+            if category in PRUNABLE_RESOURCES:
+                kept = DictionaryObject()
+                kept.update((name, value) for name, value in entries.get_object().items() if name in used_names)
+                if kept:
+                    pruned_resources[category] = kept
+            else:
+                pruned_resources[category] = entries
+        
+        pruned_page = PageObject(page.pdf, page.indirect_reference)
+        pruned_page.update(page)
+        pruned_page[NameObject("/Resources")] = pruned_resources
+        return pruned_page
+
+    @staticmethod
+    def _object_key(obj) -> Optional[Tuple[int, int]]:
+        """Get the (object number, generation) of an indirect object or a page read from a file"""
+        ref = getattr(obj, "indirect_reference", None) or obj
+        idnum = getattr(ref, "idnum", None)
+        return None if idnum is None else (idnum, ref.generation)
+
+    @staticmethod
+    def _link_target(annotation) -> Optional[Tuple[int, int]]:
+        """Get the page a link annotation jumps to within the document, as an object key
+        
+        Only explicit destinations ([page /XYZ ...] in /Dest or in a /GoTo
+        action) refer to a page object; named destinations and links to
+        other files or URIs return None.
+        """
+        from PyPDF2.generic import ArrayObject
+        
+        if annotation.get("/Subtype") != "/Link":
+            return None
+        destination = annotation.get("/Dest")
+        if destination is None:
+            action = annotation.get("/A")
+            action = action.get_object() if action is not None else {}
+            if action.get("/S") != "/GoTo":
+                return None
+            destination = action.get("/D")
+        destination = destination.get_object() if destination is not None else None
+        if not isinstance(destination, ArrayObject) or not destination:
+            return None
+        return SplitOperations._object_key(destination[0])
+
+    @staticmethod
+    def _drop_outside_links(page: 'PageObject', part_pages: Set[Tuple[int, int]]) -> 'PageObject':
+        """Return a copy of a page without the links to pages that are not in its part
+        
+        PdfWriter clones a link's destination page with its content and
+        resources, so a table of contents would otherwise pull every page it
+        links to into a one-page part. Links within the part are kept. The
+        source page is left untouched.
+        """
+        from PyPDF2 import PageObject
+        from PyPDF2.generic import ArrayObject, NameObject
+        
+        annotations = page.get("/Annots")
+        if annotations is None:
+            return page
+        try:
+            annotations = annotations.get_object()
+            kept = ArrayObject()
+            for annotation in annotations:
+                target = SplitOperations._link_target(annotation.get_object())
+                if target is None or target in part_pages:
+                    kept.append(annotation)
+        except Exception as e:
+            logger.warning(f"Keeping all annotations, could not read them: {str(e)}")
+            return page
+        if len(kept) == len(annotations):
+            return page
+        
+        trimmed_page = PageObject(page.pdf, page.indirect_reference)
+        trimmed_page.update(page)
+        if kept:
+            trimmed_page[NameObject("/Annots")] = kept
+        else:
+            del trimmed_page["/Annots"]
+        return trimmed_page
+
+    @staticmethod
+    def _page_objects(page: 'PageObject', size_cache: Dict[Tuple[int, int], int],
+                      follow_pages: bool = True) -> Dict[Tuple[int, int], int]:
+        """Map every indirect object reachable from a page to its serialized size
+        
+        The page tree (/Parent) is not followed, matching what PdfWriter.add_page
+        copies. Sizes are memoized in size_cache, so each object in the source
+        file is serialized at most once no matter how many pages share it. The
+        page dictionary itself is measured as given, so a pruned copy is
+        sized by the resources it actually keeps. Without follow_pages, other
+        pages reached through links are left out, as pruned parts drop links
+        to pages they do not contain and count the pages they do on their own.
+        """
+        from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject
+        
+        objects = {}
+        if page.indirect_reference is not None:
+            counter = _ByteCounter()
+            page.write_to_stream(counter, None)
+            ref = page.indirect_reference
+            objects[(ref.idnum, ref.generation)] = counter.size + PDF_OBJECT_OVERHEAD
+        
+        stack = [value for name, value in page.items() if name != "/Parent"]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, IndirectObject):
+                key = (obj.idnum, obj.generation)
+                if key in objects:
+                    continue
+                resolved = obj.get_object()
+                if not follow_pages and isinstance(resolved, DictionaryObject) and resolved.get("/Type") == "/Page":
+                    continue
+                if key not in size_cache:
+                    counter = _ByteCounter()
+                    resolved.write_to_stream(counter, None)
+                    size_cache[key] = counter.size + PDF_OBJECT_OVERHEAD
+                objects[key] = size_cache[key]
+                stack.append(resolved)
+            elif isinstance(obj, DictionaryObject):
+                stack.extend(value for name, value in obj.items() if name != "/Parent")
+            elif isinstance(obj, ArrayObject):
+                stack.extend(obj)
+        return objects
+
+    @staticmethod
+    def _plan_size_parts(pages: Iterator['PageObject'], max_bytes: int,
+                         drop_outside_links: bool = False) -> Iterator[List[int]]:
+        """Group consecutive pages into parts whose estimated size stays under max_bytes
+        
+        Each page's cost is the size of the objects it adds to the current
+        part; objects already pulled in by earlier pages of the part (shared
+        fonts, images) are free. No trial parts are written, so planning is
+        linear in the size of the document. drop_outside_links sizes pages
+        as written with their links to other parts removed.
+        """
+        size_cache = {}
+        part_pages = []
+        part_objects = set()
+        part_size = PDF_PART_OVERHEAD
+        
+        for page_num, page in enumerate(pages):
+            page_objects = SplitOperations._page_objects(page, size_cache, follow_pages=not drop_outside_links)
+            added_size = sum(size for key, size in page_objects.items() if key not in part_objects)
+            
+            if part_pages and part_size + added_size > max_bytes:
+                yield part_pages
+                part_pages = []
+                part_objects = set()
+                part_size = PDF_PART_OVERHEAD
+                added_size = sum(page_objects.values())
+            
+            if part_size + added_size > max_bytes:
+                logger.warning(f"Page {page_num + 1} alone exceeds {format_size(max_bytes)}")
+            
+            part_pages.append(page_num)
+            part_objects.update(page_objects)
+            part_size += added_size
+        
+        if part_pages:
+            yield part_pages
+
+    @staticmethod
+    def _plan_outline_parts(reader: 'PdfReader', level: int) -> List[Tuple[int, int]]:
+        """Compute [start, end) page ranges that begin at each bookmark up to the given depth
+        
+        Pages before the first bookmark become a part of their own.
+        """
+        starts = set()
+        
+        def collect(items, depth):
+            for item in items:
+                if isinstance(item, list):
+                    if depth < level:
+                        collect(item, depth + 1)
+                    continue
+                page_num = reader.get_destination_page_number(item)
+                if page_num >= 0:
+                    starts.add(page_num)
+        
+        collect(reader.outline, 1)
+        if not starts:
+            raise ValueError("PDF has no bookmarks to split by")
+        
+        starts.add(0)
+        boundaries = sorted(starts) + [len(reader.pages)]
+        return list(zip(boundaries[:-1], boundaries[1:]))
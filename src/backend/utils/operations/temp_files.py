@@ -0,0 +1,265 @@
+from .config import *
+import json
+import atexit
+import tempfile
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from .isolation import OperationAbortedError
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the quota applies per process
+    fcntl = None
+
+# Conversions write their inputs and outputs to real files because external
+# converters (LibreOffice, pdf2docx, Word) need paths. Files expected to stay
+# below RAM_TEMP_THRESHOLD go to a tmpfs such as /dev/shm, so the typical
+# conversion never touches the disk; larger ones fall back to TEMP_DIR.
+_ram_dir_candidates = ["/dev/shm"]
+_arena_prefix = "pdfconv-"
+
+# Reservations against TEMP_QUOTA_BYTES are kept in a ledger shared by every
+# process using TEMP_DIR (server processes and their operation workers), as
+# {"<pid>:<start time>:<n>": bytes}. Entries of processes that have died, e.g.
+# workers killed on timeout, no longer count; the start time tells a restarted
+# server that got the same PID (as PID 1 in a container does) or an unrelated
+# process reusing it apart from the one that made the reservation.
+_quota_path = os.path.join(TEMP_DIR, ".quota.json")
+_reservation_ids = itertools.count()
+_ledger_pid = None  # PID whose entries of earlier processes were dropped from the ledger
+
+_lock = threading.Lock()
+_reserved_bytes = 0
+_arena_roots = {}
+
+
+class TempQuotaExceededError(OperationAbortedError):
+    """An operation could not reserve temp space because TEMP_QUOTA_BYTES is in use"""
+
+    status_code = 503
+    code = "temp_quota"
+
+    def __init__(self, operation: str, retry_after: int = TEMP_QUOTA_RETRY_AFTER):
+        super().__init__(f"Temporary storage quota exceeded, {operation} could not be started", operation)
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        return (type(self), (self.operation, self.retry_after))
+
+    def to_dict(self) -> dict:
+        return {**super().to_dict(), "retry_after": self.retry_after}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_start_time(pid: int) -> str:
+    """Get when a process started, in clock ticks since boot, or "" if unknown (no /proc or no such process)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return ""
+    # The command name may contain spaces, so fields are counted after its closing parenthesis
+    fields = stat[stat.rfind(')') + 2:].split()
+    return fields[19] if len(fields) > 19 else ""
+
+
+def _entry_alive(entry: str) -> bool:
+    """Check whether the process that made a ledger entry still exists"""
+    try:
+        pid, start_time, _ = entry.split(':')
+        pid = int(pid)
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        return start_time == _process_start_time(pid)
+    return _pid_alive(pid) and start_time == _process_start_time(pid)
+
+
+def _candidate_bases() -> List[str]:
+    return [path for path in _ram_dir_candidates if os.path.isdir(path)] + [TEMP_DIR]
+
+
+def sweep_stale_temp_dirs() -> int:
+    """Remove arenas left behind by processes that no longer exist
+
+    Arena directories are named after the owning process id, so anything
+    whose owner is gone (e.g. after a crash or SIGKILL) can be deleted.
+    Called automatically the first time a process creates its arena.
+
+    Returns:
+        Number of directories removed
+    """
+    removed = 0
+    for base in _candidate_bases():
+        try:
+            entries = os.listdir(base)
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.startswith(_arena_prefix):
+                continue
+            try:
+                pid = int(entry[len(_arena_prefix):])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                shutil.rmtree(os.path.join(base, entry), ignore_errors=True)
+                removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale temporary directories")
+    return removed
+
+
+def _cleanup_arenas():
+    for root in list(_arena_roots.values()):
+        shutil.rmtree(root, ignore_errors=True)
+    _arena_roots.clear()
+
+
+def _arena_root(base: str) -> str:
+    """Get (creating on first use) this process's arena directory under base"""
+    with _lock:
+        root = _arena_roots.get(base)
+        if root is None or not os.path.isdir(root):
+            if not _arena_roots:
+                sweep_stale_temp_dirs()
+                atexit.register(_cleanup_arenas)
+            root = os.path.join(base, f"{_arena_prefix}{os.getpid()}")
+            if base not in _arena_roots:
+                # Left by an earlier process with the same PID, e.g. the server before a container restart
+                shutil.rmtree(root, ignore_errors=True)
+            os.makedirs(root, exist_ok=True)
+            _arena_roots[base] = root
+        return root
+
+
+def disk_arena_dir() -> str:
+    """Get this process's disk-backed arena directory for long-lived temp data"""
+    return _arena_root(TEMP_DIR)
+
+
+def _ram_base(expected_size: int):
+    """Pick a RAM-backed base directory with room for expected_size, if any"""
+    if expected_size > RAM_TEMP_THRESHOLD:
+        return None
+    for path in _ram_dir_candidates:
+        try:
+            stats = os.statvfs(path)
+        except OSError:
+            continue
+        # Leave headroom so temp files never exhaust shared memory
+        if os.access(path, os.W_OK) and stats.f_bavail * stats.f_frsize > expected_size * 4:
+            return path
+    return None
+
+
+def data_size(data: Union[str, bytes, BytesIO]) -> int:
+    """Get the size of operation input given as file path, bytes, or BytesIO"""
+    if isinstance(data, str):
+        return os.path.getsize(data)
+    if isinstance(data, bytes):
+        return len(data)
+    if isinstance(data, BytesIO):
+        return data.getbuffer().nbytes
+    return 0
+
+
+@contextmanager
+def _quota_ledger() -> Iterator[dict]:
+    """Load the shared reservation ledger under an exclusive file lock, saving changes made to it"""
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    with _lock, open(_quota_path + ".lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(_quota_path) as f:
+                    ledger = json.load(f)
+            except (OSError, ValueError):
+                ledger = {}
+            yield ledger
+            fd, temp_path = tempfile.mkstemp(prefix=".quota-", dir=TEMP_DIR)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(ledger, f)
+            os.replace(temp_path, _quota_path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _reserve(size: int, operation: str) -> Optional[str]:
+    """Reserve temp space against TEMP_QUOTA_BYTES across processes, returning the reservation's key"""
+    global _reserved_bytes
+    if fcntl is None:
+        with _lock:
+            if _reserved_bytes + size > TEMP_QUOTA_BYTES:
+                raise TempQuotaExceededError(operation)
+            _reserved_bytes += size
+        return None
+
+    global _ledger_pid
+    pid = os.getpid()
+    key = f"{pid}:{_process_start_time(pid)}:{next(_reservation_ids)}"
+    with _quota_ledger() as ledger:
+        stale = [entry for entry in ledger if not _entry_alive(entry)]
+        if _ledger_pid != pid:
+            # Nothing this process reserved is in the ledger yet, so entries under its PID are
+            # leftovers, also where no start time is available to tell processes apart
+            stale += [entry for entry in ledger if entry.split(':')[0] == str(pid)]
+            _ledger_pid = pid
+        for entry in set(stale):
+            del ledger[entry]
+        if sum(ledger.values()) + size > TEMP_QUOTA_BYTES:
+            raise TempQuotaExceededError(operation)
+        ledger[key] = size
+    return key
+
+
+def _release(key: Optional[str], size: int):
+    global _reserved_bytes
+    if fcntl is None:
+        with _lock:
+            _reserved_bytes -= size
+        return
+    with _quota_ledger() as ledger:
+        ledger.pop(key, None)
+
+
+@contextmanager
+def temp_workspace(expected_size: int = 0, operation: str = "operation") -> Iterator[str]:
+    """Provide a private temporary directory that is always removed afterwards
+
+    Args:
+        expected_size: Estimated bytes the caller will write; decides between
+            RAM and disk and is reserved against TEMP_QUOTA_BYTES, which is
+            shared by all processes using TEMP_DIR
+        operation: Name of the calling operation, reported when the quota is exceeded
+
+    Yields:
+        Path of the workspace directory
+
+    Raises:
+        TempQuotaExceededError: expected_size does not fit the remaining quota
+    """
+    reservation = _reserve(expected_size, operation) if expected_size else None
+
+    workspace = None
+    try:
+        base = _ram_base(expected_size) or TEMP_DIR
+        workspace = tempfile.mkdtemp(dir=_arena_root(base))
+        yield workspace
+    finally:
+        if workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+        if expected_size:
+            _release(reservation, expected_size)
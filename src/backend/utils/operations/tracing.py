@@ -0,0 +1,184 @@
+from .config import *
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Trace of the request being handled in this context, None when it is not profiled
+_active = contextvars.ContextVar("pdfconv_trace", default=None)
+# Sampler of that request, which threads attach to while they work on it
+_active_sampler = contextvars.ContextVar("pdfconv_sampler", default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    """Destination of one profiled request's span timings and stack samples
+
+    Spans are appended to trace.json in the Chrome trace event format
+    (open it in chrome://tracing or https://ui.perfetto.dev), stack samples
+    to profile.folded in the collapsed format read by flamegraph.pl and
+    speedscope. Both files are appended to line by line, so the server and
+    its worker processes can record into the same trace; a trace without
+    its closing bracket is valid for both viewers.
+    """
+
+    def __init__(self, trace_id: str, directory: str):
+        self.trace_id = trace_id
+        self.directory = directory
+        self.trace_path = os.path.join(directory, "trace.json")
+        self.stacks_path = os.path.join(directory, "profile.folded")
+
+    def __reduce__(self):
+        return (type(self), (self.trace_id, self.directory))
+
+    def _append(self, path: str, text: str):
+        with _write_lock:
+            with open(path, 'a') as f:
+                f.write(text)
+
+    def add_span(self, name: str, start_us: int, duration_us: int, args: Optional[dict] = None):
+        """Record a complete span, with times in microseconds from time.monotonic_ns()"""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start_us,
+            "dur": duration_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self._append(self.trace_path, json.dumps(event, default=str) + ",\n")
+
+    def add_stacks(self, stacks: Counter, prefix: str = ""):
+        """Record sampled stacks as 'frame;frame;frame count' lines"""
+        lines = [f"{prefix};{stack} {count}" if prefix else f"{stack} {count}" for stack, count in stacks.items()]
+        if lines:
+            self._append(self.stacks_path, "\n".join(lines) + "\n")
+
+
+def create_trace(directory: str = PROFILE_DIR) -> Trace:
+    """Create the files of a new trace, removing the oldest traces beyond PROFILE_KEEP"""
+    os.makedirs(directory, exist_ok=True)
+    entries = sorted((entry for entry in os.scandir(directory) if entry.is_dir()), key=lambda e: e.stat().st_mtime)
+    for entry in entries[:max(0, len(entries) - PROFILE_KEEP + 1)]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+    trace_id = uuid.uuid4().hex
+    trace = Trace(trace_id, os.path.join(directory, trace_id))
+    os.makedirs(trace.directory)
+    with open(trace.trace_path, 'w') as f:
+        f.write("[\n")
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    """Get the trace recording in this context, if any"""
+    return _active.get()
+
+
+def set_trace(trace: Optional[Trace]):
+    """Record spans of this context into trace, or stop recording with None"""
+    _active.set(trace)
+
+
+def set_sampler(sampler: Optional["Sampler"]):
+    """Make sampler the one run_attached() attaches threads of this context to, or None"""
+    _active_sampler.set(sampler)
+
+
+def run_attached(func, *args):
+    """Call func for the request of this context, sampling the calling thread meanwhile if it is profiled
+
+    Used where a request continues on another thread, e.g. when the ASGI
+    bridge resumes a streamed response on whichever pool thread is free.
+    """
+    thread_id = threading.get_ident()
+    sampler = _active_sampler.get()
+    if sampler is not None:
+        sampler.attach(thread_id)
+    try:
+        return func(*args)
+    finally:
+        # func may have started or finished profiling the request
+        sampler = _active_sampler.get()
+        if sampler is not None:
+            sampler.detach(thread_id)
+
+
+def now_us() -> int:
+    return time.monotonic_ns() // 1000
+
+
+@contextmanager
+def span(name: str, **args) -> Iterator[None]:
+    """Time a stage of an operation when the current request is traced
+
+    Costs a single context variable lookup when it is not.
+    """
+    trace = _active.get()
+    if trace is None:
+        yield
+        return
+    start = now_us()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, now_us() - start, args)
+
+
+def _collapse(frame) -> str:
+    """Turn a frame into a 'root;...;leaf' stack string"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """Sample the stacks of attached threads at a fixed interval from a background thread
+
+    Uses sys._current_frames(), so the sampled code needs no changes and
+    the overhead is one stack walk per interval. Only threads attached at
+    the time of a sample are walked, so pool threads that serve a request
+    one after another (see run_attached) are sampled only while they do.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._threads = set()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        if thread_id is not None:
+            self.attach(thread_id)
+
+    def attach(self, thread_id: int):
+        self._threads.add(thread_id)
+
+    def detach(self, thread_id: int):
+        self._threads.discard(thread_id)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self._threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
@@ -3,8 +3,11 @@ from .operations.image_operations import ImageOperations
 from .operations.compression_operations import CompressionOperations
 from .operations.split_operations import SplitOperations
 from .operations.document_operations import DocumentOperations
+from .operations.info_operations import InfoOperations
+from .operations.page_operations import PageOperations
 
-class PDFOperations(MergeOperations, ImageOperations, CompressionOperations, SplitOperations, DocumentOperations):
+class PDFOperations(MergeOperations, ImageOperations, CompressionOperations, SplitOperations, DocumentOperations,
+                    InfoOperations, PageOperations):
     """Main class for PDF operations
     
     This class combines all PDF operations into a single interface:
@@ -14,7 +17,10 @@ class PDFOperations(MergeOperations, ImageOperations, CompressionOperations, Spl
     - Convert images to PDF
     - Compress PDF files
     - Convert PDF to Word
+    - Extract text, Markdown or text blocks page by page
     - Convert Word to PDF
+    - Read document metadata
+    - Rotate, delete and reorder pages
     
     Example usage:
         # Merge PDFs
@@ -35,8 +41,21 @@ class PDFOperations(MergeOperations, ImageOperations, CompressionOperations, Spl
         # Convert PDF to Word
         word_buffer = PDFOperations.pdf_to_word(pdf_data)
         
+        # Stream text page by page
+        for page_text in PDFOperations.iter_text(pdf_data, format='markdown'):
+            print(page_text)
+        
         # Convert Word to PDF
         pdf_buffer = PDFOperations.word_to_pdf(word_data)
+        
+        # Convert many Word documents in one converter session
+        pdf_buffers = PDFOperations.word_to_pdf_batch([word_data1, word_data2])
+        
+        # Read metadata (cached by content hash)
+        info = PDFOperations.get_pdf_info(pdf_data)
+        
+        # Rotate, delete and reorder pages
+        edited_pdf = PDFOperations.edit_pages(pdf_data, [{'op': 'rotate', 'angle': 90, 'pages': [1]}])
     """
     pass
 
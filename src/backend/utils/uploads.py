@@ -0,0 +1,78 @@
+import os
+import tempfile
+from io import BytesIO
+from typing import IO, List, Optional, Union
+from flask import Request
+from werkzeug.datastructures import FileStorage, MultiDict
+from .operations.config import UPLOAD_SPOOL_THRESHOLD
+from .operations.temp_files import disk_arena_dir
+from .operations.document_store import get_document_store
+
+
+class SpoolingRequest(Request):
+    """Request that writes large uploads to named files in the temp arena
+
+    Uploads of requests up to UPLOAD_SPOOL_THRESHOLD stay in memory. Larger
+    ones are streamed to a file on disk while the form is parsed, and
+    upload_data() hands operations that file's path, so a multi-GB upload is
+    never held in memory. The files are removed when the request is closed.
+
+    Documents stored with POST /documents can be sent instead of uploads:
+    each "document" form field becomes a "file" upload and each "documents"
+    field (repeated or comma-separated) a "files" upload, backed by the
+    stored file, so routes handle them like any spooled upload.
+    """
+
+    _missing_documents = None
+
+    def _load_form_data(self) -> None:
+        loaded = "form" in self.__dict__
+        super()._load_form_data()
+        if not loaded:
+            self._attach_documents()
+
+    def _attach_documents(self):
+        handles = [("file", handle) for handle in self.form.getlist("document")]
+        handles += [("files", handle) for value in self.form.getlist("documents") for handle in value.split(",")]
+        self._missing_documents = []
+        if not handles:
+            return
+
+        store = get_document_store()
+        files = MultiDict(self.files)
+        for field, handle in handles:
+            handle = handle.strip()
+            document = store.get(handle)
+            path = store.open_path(handle) if document is not None else None
+            if path is None:
+                self._missing_documents.append(handle)
+                continue
+            # Closed with the other uploads when the request is closed
+            files.add(field, FileStorage(open(path, 'rb'), filename=document["filename"], name=field))
+        self.__dict__["files"] = self.parameter_storage_class(files)
+
+    @property
+    def missing_documents(self) -> List[str]:
+        """Document handles sent with the request that are unknown or expired"""
+        self._load_form_data()
+        return self._missing_documents or []
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_THRESHOLD:
+            return BytesIO()
+        if os.name == "nt":
+            # Open temporary files cannot be reopened by path on Windows
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        suffix = os.path.splitext(filename or "")[1].lower()
+        return tempfile.NamedTemporaryFile("wb+", prefix="upload-", suffix=suffix, dir=disk_arena_dir())
+
+
+def upload_data(file: FileStorage) -> Union[str, bytes]:
+    """Get an upload as operation input: its spooled file path, or its bytes when it is in memory"""
+    stream = file.stream
+    path = getattr(stream, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        stream.flush()
+        return path
+    return file.read()
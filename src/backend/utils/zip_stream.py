@@ -0,0 +1,189 @@
+import os
+import time
+import zlib
+import zipfile
+import logging
+from io import BytesIO
+from itertools import chain
+from typing import Iterable, Iterator, Tuple, Union
+from flask import Response, stream_with_context
+from .operations.tracing import current_trace, now_us
+
+logger = logging.getLogger(__name__)
+
+# Size of the pieces copied into an entry before the output is flushed to the client
+CHUNK_SIZE = 256 * 1024
+# Bytes sampled from an entry to decide whether deflating it is worth the CPU
+SAMPLE_SIZE = 64 * 1024
+# Deflate only when the sample shrinks below this ratio
+DEFLATE_RATIO_THRESHOLD = 0.9
+
+ZipEntryData = Union[str, bytes, BytesIO]
+
+
+class _StreamSink:
+    """Write-only file object that collects ZIP output between flushes
+
+    zipfile detects that the sink is not seekable and switches to data
+    descriptors, so every entry can be written in a single forward pass.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_size(data: ZipEntryData) -> int:
+    """Get the size of an entry without reading it"""
+    if isinstance(data, str):
+        return os.path.getsize(data)
+    if isinstance(data, bytes):
+        return len(data)
+    if isinstance(data, BytesIO):
+        return data.getbuffer().nbytes
+    raise ValueError("Invalid ZIP entry type")
+
+
+def _read_at(data: ZipEntryData, offset: int, size: int) -> bytes:
+    """Read a slice of an entry for compressibility sampling"""
+    if isinstance(data, str):
+        with open(data, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+    if isinstance(data, BytesIO):
+        return bytes(data.getbuffer()[offset:offset + size])
+    return data[offset:offset + size]
+
+
+def _iter_chunks(data: ZipEntryData) -> Iterator[bytes]:
+    """Yield an entry's content in CHUNK_SIZE pieces"""
+    if isinstance(data, str):
+        with open(data, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        return
+    view = data.getbuffer() if isinstance(data, BytesIO) else memoryview(data)
+    try:
+        for offset in range(0, view.nbytes, CHUNK_SIZE):
+            yield bytes(view[offset:offset + CHUNK_SIZE])
+    finally:
+        view.release()
+
+
+def choose_compression(data: ZipEntryData) -> int:
+    """Pick ZIP_DEFLATED or ZIP_STORED from a quick compressibility sample
+
+    A few slices spread across the entry are deflated at the fastest level.
+    PDFs, PNGs and JPEGs are mostly compressed streams already, so they
+    usually come out as ZIP_STORED and skip deflate entirely.
+    """
+    size = _entry_size(data)
+    if size == 0:
+        return zipfile.ZIP_STORED
+
+    slices = 4
+    slice_size = SAMPLE_SIZE // slices
+    if size <= SAMPLE_SIZE:
+        sample = _read_at(data, 0, size)
+    else:
+        step = (size - slice_size) // (slices - 1)
+        sample = b"".join(_read_at(data, i * step, slice_size) for i in range(slices))
+
+    ratio = len(zlib.compress(sample, 1)) / len(sample)
+    return zipfile.ZIP_DEFLATED if ratio < DEFLATE_RATIO_THRESHOLD else zipfile.ZIP_STORED
+
+
+def iter_zip(entries: Iterable[Tuple[str, ZipEntryData]], compression: str = "auto") -> Iterator[bytes]:
+    """Build a ZIP archive incrementally, yielding its bytes as entries are written
+
+    Args:
+        entries: Iterable of (archive name, data) pairs, data as file path, bytes, or BytesIO.
+            It is consumed lazily, so a generator only produces the next entry once
+            the previous one has been sent.
+        compression: 'stored', 'deflated', or 'auto' to sample each entry
+
+    Returns:
+        Iterator of byte chunks forming a valid ZIP (ZIP64 when needed)
+    """
+    if compression not in ("auto", "stored", "deflated"):
+        raise ValueError("Invalid ZIP compression mode")
+
+    # Traced time of each entry excludes the time spent waiting for the client
+    trace = current_trace()
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as zf:
+        for name, data in entries:
+            started = resumed = now_us()
+            busy = 0
+            if compression == "auto":
+                compress_type = choose_compression(data)
+            elif compression == "deflated":
+                compress_type = zipfile.ZIP_DEFLATED
+            else:
+                compress_type = zipfile.ZIP_STORED
+
+            size = _entry_size(data)
+            zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+            zinfo.compress_type = compress_type
+            zinfo.file_size = size
+
+            # The entry is streamed, so the local header must reserve ZIP64 fields up front
+            force_zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+            with zf.open(zinfo, 'w', force_zip64=force_zip64) as dest:
+                for chunk in _iter_chunks(data):
+                    dest.write(chunk)
+                    busy += now_us() - resumed
+                    yield sink.drain()
+                    resumed = now_us()
+            busy += now_us() - resumed
+            if trace is not None:
+                trace.add_span("zip", started, busy, {"entry": name, "size": size,
+                                                      "deflated": compress_type == zipfile.ZIP_DEFLATED})
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
+
+
+def zip_response(entries: Iterable[Tuple[str, ZipEntryData]], download_name: str,
+                 compression: str = "auto") -> Response:
+    """Stream a ZIP archive to the client as its entries are produced
+
+    The first entry is produced before the response is returned, so errors
+    raised while opening the input still reach the caller's error handler
+    instead of surfacing as a truncated download.
+    """
+    entries = iter(entries)
+    try:
+        first = next(entries)
+        entries = chain([first], entries)
+    except StopIteration:
+        pass
+
+    def generate():
+        try:
+            for chunk in iter_zip(entries, compression):
+                if chunk:
+                    yield chunk
+        except Exception as e:
+            logger.error(f"Error streaming ZIP {download_name}: {str(e)}")
+            raise
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+    )
@@ -21,6 +21,29 @@ def handle_error_response(response):
         error_message = f"Error: {response.status_code}"
     return error_message
 
+# Kept well below the backend's DOCUMENT_TTL, so cached handles are still valid when used
+@st.cache_data(show_spinner=False, max_entries=32, ttl=600)
+def upload_document(file_data: bytes, filename: str) -> str:
+    """Upload a file to the API once and get its document handle, cached per file content across reruns"""
+    response = requests.post(
+        f"{API_URL}/documents",
+        files={"file": (filename, file_data)}
+    )
+    if response.status_code not in (200, 201):
+        raise RuntimeError(handle_error_response(response))
+    return response.json()["id"]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_pdf_info(pdf_data: bytes) -> dict:
+    """Fetch PDF metadata from the API, cached per file content across reruns"""
+    response = requests.post(
+        f"{API_URL}/get-pdf-info",
+        data={"document": upload_document(pdf_data, "input.pdf")}
+    )
+    if response.status_code != 200:
+        raise RuntimeError(handle_error_response(response))
+    return response.json()
+
 def main():
     st.title("📄 PDF Converter")
     st.markdown("""
@@ -98,18 +121,16 @@ def split_pdf_ui():
         # Get total pages
         try:
             pdf_data = uploaded_file.read()
-            response = requests.post(
-                f"{API_URL}/get-pdf-info",
-                files={"file": ("input.pdf", pdf_data, "application/pdf")}
-            )
-            if response.status_code == 200:
-                total_pages = response.json()["total_pages"]
+            pdf_info = get_pdf_info(pdf_data)
+            if pdf_info:
+                total_pages = pdf_info["total_pages"]
                 st.info(f"Total pages in PDF: {total_pages}")
             
                 # Split method selection
                 split_method = st.radio(
                     "Choose splitting method",
-                    ["All Pages", "Specific Pages", "Page Range", "First N Pages", "Last N Pages"]
+                    ["All Pages", "Specific Pages", "Page Range", "First N Pages", "Last N Pages",
+                     "Maximum Part Size", "By Bookmarks"]
                 )
                 
                 split_options = {}
@@ -168,14 +189,23 @@ def split_pdf_ui():
                 elif split_method == "Last N Pages":
                     n = st.number_input("Number of pages from end", min_value=1, max_value=total_pages, value=1)
                     split_options['last_n'] = str(n)
+                    
+                elif split_method == "Maximum Part Size":
+                    st.write("Pages are grouped into parts no larger than the given size (e.g., an email attachment limit).")
+                    max_mb = st.number_input("Maximum size per part (MB)", min_value=0.1, value=10.0, step=0.5)
+                    split_options['max_bytes_per_part'] = str(int(max_mb * 1024 * 1024))
+                    
+                elif split_method == "By Bookmarks":
+                    st.write("A new part starts at every bookmark up to the chosen level (1 = chapters).")
+                    level = st.number_input("Bookmark level", min_value=1, max_value=10, value=1)
+                    split_options['by_outline_level'] = str(level)
                 
                 if st.button("Split PDF"):
                     with st.spinner("Splitting PDF..."):
                         try:
-                            # Reset file pointer
-                            uploaded_file.seek(0)
-                            files = {"file": uploaded_file}
-                            response = requests.post(f"{API_URL}/split-pdf", files=files, data=split_options)
+                            # The file was uploaded once for its page count; split it by handle
+                            data = {**split_options, "document": upload_document(pdf_data, "input.pdf")}
+                            response = requests.post(f"{API_URL}/split-pdf", data=data)
                             
                             if response.status_code == 200:
                                 st.success("PDF split successfully!")
@@ -222,11 +252,10 @@ def pdf_to_images_ui():
     if uploaded_file and st.button("Convert to Images"):
         with st.spinner("Converting PDF to images..."):
             try:
-                files = {"file": uploaded_file}
+                document = upload_document(uploaded_file.getvalue(), uploaded_file.name)
                 response = requests.post(
                     f"{API_URL}/pdf-to-images",
-                    files=files,
-                    data={"dpi": str(dpi)}
+                    data={"dpi": str(dpi), "document": document}
                 )
                 
                 if response.status_code == 200:
@@ -294,11 +323,10 @@ def compress_pdf_ui():
     if uploaded_file and st.button("Compress PDF"):
         with st.spinner("Compressing PDF..."):
             try:
-                files = {"file": uploaded_file}
+                document = upload_document(uploaded_file.getvalue(), uploaded_file.name)
                 response = requests.post(
                     f"{API_URL}/compress-pdf",
-                    files=files,
-                    data={"quality": quality}
+                    data={"quality": quality, "document": document}
                 )
                 
                 if response.status_code == 200:
@@ -343,11 +371,27 @@ def pdf_to_word_ui():
     
     uploaded_file = st.file_uploader("Upload PDF file", type="pdf")
     
+    mode = st.radio(
+        "Conversion mode",
+        ["layout", "fast"],
+        format_func=lambda m: "Keep layout" if m == "layout" else "Fast (editable text only)",
+        help="Fast mode keeps paragraphs and headings but not the page layout, and is much quicker on large files"
+    )
+    pages = st.text_input("Pages to convert (e.g., 1-5,8; leave empty for all pages)")
+    workers = st.number_input(
+        "Parallel workers",
+        min_value=1,
+        max_value=16,
+        value=1,
+        help="Large documents convert faster with more workers"
+    )
+    
     if uploaded_file and st.button("Convert to Word"):
         with st.spinner("Converting PDF to Word..."):
             try:
-                files = {"file": uploaded_file}
-                response = requests.post(f"{API_URL}/pdf-to-word", files=files)
+                document = upload_document(uploaded_file.getvalue(), uploaded_file.name)
+                data = {"pages": pages, "workers": str(workers), "mode": mode, "document": document}
+                response = requests.post(f"{API_URL}/pdf-to-word", data=data)
                 
                 if response.status_code == 200:
                     st.success("PDF converted to Word successfully!")
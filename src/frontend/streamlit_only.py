@@ -1,18 +1,15 @@
 import streamlit as st
 from io import BytesIO
 import zipfile
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
-from PIL import Image
-import fitz  # PyMuPDF
 import os
 import tempfile
-from pdf2docx import Converter
-import docx2pdf
 import platform
 import subprocess
-from docx import Document
 import logging
 
+# PDF and Word libraries are imported inside the functions that use them, so
+# the app starts without loading converters the chosen tool does not need
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -42,6 +39,8 @@ def get_buffer_size(buffer):
 
 def merge_pdfs(pdf_data_list):
     """Merge multiple PDFs"""
+    from PyPDF2 import PdfMerger
+    
     merger = PdfMerger()
     for pdf_data in pdf_data_list:
         merger.append(BytesIO(pdf_data))
@@ -54,6 +53,8 @@ def merge_pdfs(pdf_data_list):
 
 def split_pdf(pdf_data, split_options=None):
     """Split PDF based on options"""
+    from PyPDF2 import PdfReader, PdfWriter
+    
     reader = PdfReader(BytesIO(pdf_data))
     total_pages = len(reader.pages)
     output_buffers = []
@@ -124,6 +125,9 @@ def split_pdf(pdf_data, split_options=None):
 
 def pdf_to_images(pdf_data, dpi=200):
     """Convert PDF to images"""
+    import fitz  # PyMuPDF
+    from PIL import Image
+    
     doc = fitz.open(stream=pdf_data, filetype="pdf")
     zoom = dpi / 72  # base resolution is 72 dpi
     matrix = fitz.Matrix(zoom, zoom)
@@ -150,6 +154,8 @@ def pdf_to_images(pdf_data, dpi=200):
 
 def images_to_pdf(image_data_list):
     """Convert images to PDF"""
+    from PIL import Image
+    
     if not image_data_list:
         raise ValueError("No images provided")
     
@@ -174,6 +180,8 @@ def images_to_pdf(image_data_list):
 
 def compress_pdf(pdf_data, quality='medium'):
     """Compress PDF"""
+    import fitz  # PyMuPDF
+    
     doc = fitz.open(stream=pdf_data, filetype="pdf")
     output_buffer = BytesIO()
     
@@ -200,6 +208,7 @@ def pdf_to_word(pdf_data):
         
         try:
             # Convert using pdf2docx
+            from pdf2docx import Converter
             converter = Converter(pdf_temp.name)
             converter.convert(docx_temp.name)
             converter.close()
@@ -211,6 +220,8 @@ def pdf_to_word(pdf_data):
             
         except Exception as e:
             # Fallback to simple text extraction
+            from PyPDF2 import PdfReader
+            from docx import Document
             reader = PdfReader(BytesIO(pdf_data))
             doc = Document()
             
@@ -241,6 +252,7 @@ def word_to_pdf(docx_data):
         try:
             if platform.system() == 'Windows':
                 # Use Word's COM interface on Windows
+                import docx2pdf
                 docx2pdf.convert(docx_temp.name, pdf_temp.name)
             else:
                 # Use LibreOffice on other platforms
@@ -329,6 +341,7 @@ def main():
         if uploaded_file:
             try:
                 # Get PDF info
+                from PyPDF2 import PdfReader
                 pdf_data = uploaded_file.read()
                 reader = PdfReader(BytesIO(pdf_data))
                 total_pages = len(reader.pages)